@@ -0,0 +1,91 @@
+"""Entities and inference time of a CRF recogniser on long documents analysed whole
+against chunk by chunk with ChunkedRecogniser.
+
+Documents are CoNLL 2003 test sentences joined together. Entities found whole are
+taken as the reference, those lost or changed by chunking are counted as misses.
+
+Usage, from the project root:
+    poetry run python benchmarks/chunked_recogniser.py --document_chars 100000
+"""
+import argparse
+import time
+from dataclasses import astuple
+from typing import List
+from unittest.mock import patch
+
+from pii_recognition.data_readers.conll_reader import ConllReader
+from pii_recognition.recognisers import registry
+from pii_recognition.tokenisation.detokenisers import TreebankWordDetokeniser
+
+ENTITIES = ["I-LOC", "I-ORG", "I-PER", "I-MISC"]
+RECOGNISER_SETUP = {
+    "name": "CrfRecogniser",
+    "config": {
+        "supported_entities": ENTITIES,
+        "supported_languages": ["en"],
+        "model_path": "pii_recognition/exported_models/conll2003-en.crfsuite",
+        "tokeniser_setup": {"name": "FastTreebankWordTokeniser"},
+    },
+}
+
+
+def read_documents(document_chars: int) -> List[str]:
+    # labels are not needed
+    with patch.object(ConllReader, "_validate_entity"):
+        data = ConllReader(TreebankWordDetokeniser()).get_test_data(
+            "pii_recognition/datasets/conll2003/eng.testb", []
+        )
+    documents = [""]
+    for sentence in data.sentences:
+        if len(documents[-1]) >= document_chars:
+            documents.append("")
+        documents[-1] += sentence + " "
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="chunked_recogniser")
+    parser.add_argument("--document_chars", type=int, default=100000)
+    parser.add_argument("--max_chunk_chars", type=int, default=4096)
+    parser.add_argument("--overlap_chars", type=int, default=256)
+    args = parser.parse_args()
+
+    documents = read_documents(args.document_chars)
+    print(f"{len(documents)} documents of about {args.document_chars} characters")
+
+    whole = registry.create_instance(
+        RECOGNISER_SETUP["name"], RECOGNISER_SETUP["config"]
+    )
+    start = time.perf_counter()
+    expected = whole.analyse_batch(documents, ENTITIES)
+    print(f"whole    inference={(time.perf_counter() - start) * 1000:.0f}ms")
+
+    chunked = registry.create_instance(
+        "ChunkedRecogniser",
+        {
+            "recogniser_setup": RECOGNISER_SETUP,
+            "max_chunk_chars": args.max_chunk_chars,
+            "overlap_chars": args.overlap_chars,
+        },
+    )
+    start = time.perf_counter()
+    actual = chunked.analyse_batch(documents, ENTITIES)
+    seconds = time.perf_counter() - start
+
+    found = sum(len(entities) for entities in expected)
+    missed = sum(
+        len(set(map(astuple, expected_entities)) - set(map(astuple, actual_entities)))
+        for expected_entities, actual_entities in zip(expected, actual)
+    )
+    extra = sum(
+        len(set(map(astuple, actual_entities)) - set(map(astuple, expected_entities)))
+        for expected_entities, actual_entities in zip(expected, actual)
+    )
+    print(
+        f"chunked  inference={seconds * 1000:.0f}ms entities={found} "
+        f"missed={missed} extra={extra}"
+    )
+
+
+if __name__ == "__main__":
+    main()
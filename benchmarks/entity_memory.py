@@ -0,0 +1,111 @@
+"""Memory and throughput of entity containers.
+
+Synthetic entities are held as dataclass instances with a __dict__, as slotted
+Entity instances and as a columnar EntityArray. Memory is the size allocated while
+building them, measured with tracemalloc, and throughput is that of character
+level evaluation of one long text.
+
+Usage, from the project root:
+    poetry run python benchmarks/entity_memory.py --entities 1000000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+from pii_recognition.evaluation.character_level_evaluation import (
+    compute_entity_recalls_for_ground_truth_vectorised,
+)
+from pii_recognition.labels.entity_array import EntityArray
+from pii_recognition.labels.schema import Entity
+
+
+@dataclass
+class DictEntity:
+    """Entity before slots were added."""
+
+    entity_type: str
+    start: int
+    end: int
+
+
+def make_spans(num_entities: int, seed: int = 0) -> List[Tuple[str, int, int]]:
+    rng = random.Random(seed)
+    spans = []
+    position = 0
+    for _ in range(num_entities):
+        start = position + rng.randint(0, 20)
+        end = start + rng.randint(1, 10)
+        spans.append((rng.choice(["PER", "LOC", "ORG"]), start, end))
+        position = end
+    return spans
+
+
+def measure_memory(build: Callable[[], object]) -> Tuple[float, object]:
+    tracemalloc.start()
+    built = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20, built
+
+
+def measure_seconds(run: Callable[[], object], repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        run()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="entity_memory")
+    parser.add_argument("--entities", type=int, default=1000000)
+    parser.add_argument("--eval_entities", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    spans = make_spans(args.entities)
+    containers = {
+        "dataclass": lambda: [DictEntity(*span) for span in spans],
+        "slots": lambda: [Entity(*span) for span in spans],
+        "EntityArray": lambda: EntityArray.from_entities(
+            [Entity(*span) for span in spans]
+        ),
+    }
+    for name, build in containers.items():
+        mib, built = measure_memory(build)
+        if isinstance(built, EntityArray):
+            # the entities it was built from are temporary
+            mib = (
+                built.type_ids.nbytes + built.starts.nbytes + built.ends.nbytes
+            ) / 2 ** 20
+        print(f"{name:12} entities={args.entities} memory={mib:8.1f}MiB")
+
+    eval_spans = spans[: args.eval_entities]
+    text_length = eval_spans[-1][2]
+    label_mapping = {"PER": 1, "LOC": 2, "ORG": 3}
+    true_entities = [Entity(*span) for span in eval_spans]
+    pred_entities = [Entity(type_, start + 1, end) for type_, start, end in eval_spans]
+    inputs = {
+        "slots": (true_entities, pred_entities),
+        "EntityArray": (
+            EntityArray.from_entities(true_entities),
+            EntityArray.from_entities(pred_entities),
+        ),
+    }
+    for name, (trues, preds) in inputs.items():
+        seconds = measure_seconds(
+            lambda: compute_entity_recalls_for_ground_truth_vectorised(
+                text_length, trues, preds, label_mapping
+            ),
+            args.repeats,
+        )
+        print(
+            f"{name:12} entities={len(eval_spans)} recall time={seconds * 1000:8.1f}ms "
+            f"({len(eval_spans) / seconds:,.0f} entities/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-call latency of GoogleRecogniser with and without client reuse.
+
+A local stub replaces the Google client, simulating the cost of reading
+credentials and setting up a gRPC channel, and the cost of entity analysis for a
+short text. No network access or credentials are needed.
+
+Usage, from the project root:
+    GOOGLE_APPLICATION_CREDENTIALS=stub IDENTITY_POOL_ID=stub poetry run python \
+        benchmarks/google_client_reuse.py --calls 200
+"""
+import argparse
+import statistics
+import time
+from typing import List
+from unittest.mock import patch
+
+from google.cloud.language_v1 import AnalyzeEntitiesResponse
+
+from pii_recognition.recognisers.google_recogniser import GoogleRecogniser
+
+TEXT = "Please update billing addrress with Markt 84, MÜLLNERN 9123"
+
+
+class StubClient:
+    def __init__(self, setup_seconds: float, analyse_seconds: float):
+        time.sleep(setup_seconds)
+        self._analyse_seconds = analyse_seconds
+        self.transport = self
+        self.grpc_channel = self
+
+    def analyze_entities(self, request) -> AnalyzeEntitiesResponse:
+        time.sleep(self._analyse_seconds)
+        return AnalyzeEntitiesResponse({"language": "en", "entities": []})
+
+    def close(self):
+        ...
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def measure(recogniser: GoogleRecogniser, calls: int, reuse: bool) -> List[float]:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        recogniser.analyse(TEXT, recogniser.supported_entities)
+        latencies.append(time.perf_counter() - start)
+        if not reuse:
+            # same as creating a client on every call
+            recogniser.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="google_client_reuse")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--setup_ms", type=float, default=30.0)
+    parser.add_argument("--analyse_ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    def stub_from_service_account_json(path: str) -> StubClient:
+        return StubClient(args.setup_ms / 1000, args.analyse_ms / 1000)
+
+    with patch(
+        "pii_recognition.recognisers.google_recogniser.language_v1"
+        ".LanguageServiceClient.from_service_account_json",
+        new=stub_from_service_account_json,
+    ):
+        recogniser = GoogleRecogniser(["PERSON"], ["en"])
+        for reuse in [False, True]:
+            latencies = measure(recogniser, args.calls, reuse)
+            print(
+                f"reuse client={str(reuse):5} "
+                f"mean={statistics.mean(latencies) * 1000:7.2f}ms "
+                f"p50={percentile(latencies, 50) * 1000:7.2f}ms "
+                f"p99={percentile(latencies, 99) * 1000:7.2f}ms"
+            )
+        recogniser.close()
+
+
+if __name__ == "__main__":
+    main()
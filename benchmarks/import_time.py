@@ -0,0 +1,94 @@
+"""Import time, peak memory and heavy frameworks loaded by the pipeline entry points.
+
+Each entry point is imported in a fresh interpreter with `python -X importtime`, the
+cumulative time of its top level module is reported along with the slowest imports
+below it. The CLI modules parse arguments when imported, so the modules they import
+are measured instead.
+
+Usage, from the project root:
+    PYTHONPATH=. poetry run python benchmarks/import_time.py --repeats 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ENTRY_POINTS = {
+    "pii_validation_pipeline_cli": "pii_recognition.pipelines.pii_validation_pipeline",
+    "pakkr_evaluation": "pii_recognition.evaluation.pakkr_pipeline",
+}
+FRAMEWORKS = [
+    "boto3",
+    "flair",
+    "google.cloud.language_v1",
+    "mlflow",
+    "nltk",
+    "sklearn",
+    "spacy",
+    "stanza",
+    "torch",
+]
+REPORT = (
+    "import resource, sys; "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024); "
+    "print(' '.join(m for m in {frameworks} if m in sys.modules))"
+)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """Cumulative microseconds of every import, in the order they are reported."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        imports.append((name.strip(), int(cumulative)))
+    return imports
+
+
+def measure(module: str) -> Tuple[List[Tuple[str, int]], float, List[str]]:
+    code = f"import {module}; " + REPORT.format(frameworks=FRAMEWORKS)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    peak_rss, frameworks = completed.stdout.splitlines()
+    return parse_importtime(completed.stderr), float(peak_rss), frameworks.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="import_time")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for entry_point, module in ENTRY_POINTS.items():
+        totals = []
+        peak_rss = []
+        slowest: Dict[str, List[int]] = {}
+        for _ in range(args.repeats):
+            imports, rss, frameworks = measure(module)
+            totals.append(dict(imports)[module])
+            peak_rss.append(rss)
+            for name, cumulative in imports:
+                slowest.setdefault(name, []).append(cumulative)
+
+        print(
+            f"{entry_point}: import={statistics.median(totals) / 1000:.0f}ms "
+            f"peak_rss={statistics.median(peak_rss):.1f}MiB "
+            f"frameworks={','.join(frameworks) or '-'}"
+        )
+        medians = sorted(
+            ((statistics.median(times), name) for name, times in slowest.items()),
+            reverse=True,
+        )
+        # the top level module is the slowest, list those below it
+        for cumulative, name in medians[1 : args.top + 1]:
+            print(f"    {cumulative / 1000:8.0f}ms {name}")
+
+
+if __name__ == "__main__":
+    main()
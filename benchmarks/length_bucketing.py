@@ -0,0 +1,97 @@
+"""Padding and inference time of batches in the given order against batches bucketed
+by text length, on the Presidio fake PII set.
+
+Padding is counted in tokens, the fraction of a padded batch that is not padding
+is reported as efficiency. Inference stands in for Flair with a BiLSTM of random
+weights over padded batches of token embeddings, no model download is needed.
+
+Usage, from the project root:
+    poetry run python benchmarks/length_bucketing.py --batch_size 32 --repeats 3
+"""
+import argparse
+import statistics
+import time
+from typing import List
+
+import torch
+
+from pii_recognition.data_readers.presidio_fake_pii_reader import PresidioFakePiiReader
+from pii_recognition.tokenisation.tokenisers import FastTreebankWordTokeniser
+from pii_recognition.utils import batch_indices_by_length, batched
+
+DATA_FILE = (
+    "pii_recognition/datasets/predisio_fake_pii/"
+    "generated_size_500_date_August_25_2020.json"
+)
+VOCABULARY_SIZE = 10000
+
+
+def padding_efficiency(token_ids: List[List[int]], batches: List[List[int]]) -> float:
+    tokens = sum(len(ids) for ids in token_ids)
+    padded = sum(
+        len(indices) * max(len(token_ids[index]) for index in indices)
+        for indices in batches
+    )
+    return tokens / padded
+
+
+def infer(
+    model: torch.nn.Module,
+    embedding: torch.nn.Embedding,
+    token_ids: List[List[int]],
+    batches: List[List[int]],
+) -> float:
+    start = time.perf_counter()
+    with torch.no_grad():
+        for indices in batches:
+            sequences = [torch.tensor(token_ids[index]) for index in indices]
+            padded = torch.nn.utils.rnn.pad_sequence(sequences, batch_first=True)
+            model(embedding(padded))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="length_bucketing")
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--hidden_size", type=int, default=256)
+    args = parser.parse_args()
+
+    data = PresidioFakePiiReader().build_data(DATA_FILE)
+    texts = [item.text for item in data.items if item.text != ""]
+    tokeniser = FastTreebankWordTokeniser()
+    token_ids = [
+        [hash(token.text) % VOCABULARY_SIZE for token in tokeniser.tokenise(text)]
+        for text in texts
+    ]
+    lengths = sorted(len(ids) for ids in token_ids)
+    print(
+        f"{len(texts)} texts, tokens min={lengths[0]} "
+        f"median={lengths[len(lengths) // 2]} max={lengths[-1]}"
+    )
+
+    torch.manual_seed(0)
+    embedding = torch.nn.Embedding(VOCABULARY_SIZE, 100)
+    model = torch.nn.LSTM(
+        100, args.hidden_size, batch_first=True, bidirectional=True
+    ).eval()
+
+    orders = {
+        "given order": list(batched(range(len(texts)), args.batch_size)),
+        "bucketed": batch_indices_by_length(
+            [len(text) for text in texts], args.batch_size
+        ),
+    }
+    for name, batches in orders.items():
+        seconds = [
+            infer(model, embedding, token_ids, batches) for _ in range(args.repeats)
+        ]
+        efficiency = padding_efficiency(token_ids, batches)
+        print(
+            f"{name:11} padding efficiency={efficiency:.1%} "
+            f"inference={statistics.median(seconds) * 1000:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
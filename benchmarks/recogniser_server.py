@@ -0,0 +1,135 @@
+"""Latency of a warm CRF recogniser server against loading the model per process.
+
+The server runs in a forked process and is sent CoNLL 2003 sentences from
+concurrent clients over a Unix socket, with and without coalescing texts into
+batches, and with batches waiting up to max_wait for more texts. The cold cost is
+that of a process importing and loading the recogniser for its first text.
+
+Usage, from the project root:
+    poetry run python benchmarks/recogniser_server.py --clients 8 --requests 200
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Process
+from typing import List
+from unittest.mock import patch
+
+from pii_recognition.data_readers.conll_reader import ConllReader
+from pii_recognition.serving.client import RecogniserClient
+from pii_recognition.serving.server import serve
+from pii_recognition.tokenisation.detokenisers import TreebankWordDetokeniser
+from pii_recognition.utils import percentile
+
+ENTITIES = ["I-LOC", "I-ORG", "I-PER", "I-MISC"]
+RECOGNISER_PARAMS = {
+    "supported_entities": ENTITIES,
+    "supported_languages": ["en"],
+    "model_path": "pii_recognition/exported_models/conll2003-en.crfsuite",
+    "tokeniser_setup": {"name": "FastTreebankWordTokeniser"},
+}
+COLD_START = f"""
+from pii_recognition.recognisers import registry
+registry.create_instance("CrfRecogniser", {RECOGNISER_PARAMS}).analyse(
+    "I love Melbourne.", {ENTITIES}
+)
+"""
+
+
+def read_sentences() -> List[str]:
+    # labels are not needed
+    with patch.object(ConllReader, "_validate_entity"):
+        data = ConllReader(TreebankWordDetokeniser()).get_test_data(
+            "pii_recognition/datasets/conll2003/eng.testb", []
+        )
+    return data.sentences
+
+
+def wait_until_serving(address: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client = RecogniserClient(address)
+            client.stats()
+            client.close()
+            return
+        except (ConnectionError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def send(address: str, texts: List[str]) -> List[float]:
+    client = RecogniserClient(address)
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        client.analyse(text, ENTITIES)
+        latencies.append(time.perf_counter() - start)
+    client.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="recogniser_server")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", COLD_START], check=True, env=os.environ)
+    print(f"cold start per process: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    sentences = read_sentences()
+    for max_batch_size, max_wait in [(1, 0.0), (32, 0.0), (32, 0.002)]:
+        address = f"unix:{tempfile.mkdtemp()}/server.sock"
+        server = Process(
+            target=serve,
+            args=(
+                "CrfRecogniser",
+                RECOGNISER_PARAMS,
+                address,
+                1,
+                max_batch_size,
+                max_wait,
+            ),
+        )
+        server.start()
+        wait_until_serving(address)
+
+        shards = [
+            sentences[i * args.requests : (i + 1) * args.requests]
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as executor:
+            latencies = [
+                latency
+                for shard in executor.map(lambda texts: send(address, texts), shards)
+                for latency in shard
+            ]
+        seconds = time.perf_counter() - start
+
+        client = RecogniserClient(address)
+        stats = client.stats()
+        client.close()
+        server.terminate()
+        server.join()
+        print(
+            f"max_batch_size={max_batch_size:2} max_wait={max_wait * 1000:.0f}ms "
+            f"throughput={len(latencies) / seconds:6.0f}/s "
+            f"client p50={percentile(latencies, 50) * 1000:6.2f}ms "
+            f"p99={percentile(latencies, 99) * 1000:6.2f}ms "
+            f"server p50={stats['p50_ms']:6.2f}ms p99={stats['p99_ms']:6.2f}ms "
+            f"queue wait p99={stats['wait_p99_ms']:5.2f}ms "
+            f"mean_batch_size={stats['mean_batch_size']:.1f} "
+            f"max_queue_depth={stats['max_queue_depth']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Speed of span_labels_to_token_labels against the naive matching on long texts.
+
+Synthetic documents of many tokens and predicted spans are converted with the sweep
+implementation and with the previous check of every token against every span.
+
+Usage, from the project root:
+    poetry run python benchmarks/span_labels_to_token_labels.py --tokens 20000
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from pii_recognition.labels.schema import Entity
+from pii_recognition.labels.span import (
+    _match_token_labels_naively,
+    span_labels_to_token_labels,
+)
+from pii_recognition.tokenisation.token_schema import Token
+
+
+def make_document(
+    num_tokens: int, span_ratio: float, seed: int = 0
+) -> Tuple[List[Entity], List[Token]]:
+    rng = random.Random(seed)
+    tokens = []
+    position = 0
+    for _ in range(num_tokens):
+        length = rng.randint(1, 10)
+        tokens.append(Token("x" * length, position, position + length))
+        position += length + 1
+
+    span_labels = []
+    for _ in range(int(num_tokens * span_ratio)):
+        first = rng.randrange(num_tokens)
+        last = min(num_tokens - 1, first + rng.randint(0, 3))
+        span_labels.append(
+            Entity(rng.choice(["PER", "LOC"]), tokens[first].start, tokens[last].end)
+        )
+    return span_labels, tokens
+
+
+def timeit(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="span_labels_to_token_labels")
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--span_ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    for num_tokens in [args.tokens // 100, args.tokens // 10, args.tokens]:
+        span_labels, tokens = make_document(num_tokens, args.span_ratio)
+        naive = timeit(_match_token_labels_naively, span_labels, tokens)
+        sweep = timeit(span_labels_to_token_labels, span_labels, tokens)
+        print(
+            f"tokens={num_tokens:7d} spans={len(span_labels):6d} "
+            f"naive={naive * 1000:10.2f}ms sweep={sweep * 1000:8.2f}ms "
+            f"speedup={naive / sweep:8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
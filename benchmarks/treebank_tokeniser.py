@@ -0,0 +1,76 @@
+"""Speed of FastTreebankWordTokeniser against the NLTK Treebank tokeniser.
+
+Sentences of CoNLL 2003 and WNUT 2017 are detokenised and tokenised again, once as
+a recogniser alone would, and twice as an evaluator and a recogniser do for every
+sample, where the cache of token offsets pays off.
+
+Usage, from the project root:
+    poetry run python benchmarks/treebank_tokeniser.py --repeats 3
+"""
+import argparse
+import time
+from typing import Callable, List
+from unittest.mock import patch
+
+from pii_recognition.data_readers.conll_reader import ConllReader
+from pii_recognition.data_readers.wnut_reader import WnutReader
+from pii_recognition.tokenisation.detokenisers import TreebankWordDetokeniser
+from pii_recognition.tokenisation.tokenisers import (
+    FastTreebankWordTokeniser,
+    Tokeniser,
+    TreebankWordTokeniser,
+)
+
+DATASETS = {
+    "conll2003": (ConllReader, "pii_recognition/datasets/conll2003/eng.train"),
+    "wnut2017": (
+        WnutReader,
+        "pii_recognition/datasets/wnut2017/emerging.test.annotated",
+    ),
+}
+
+
+def read_sentences(reader, file_path: str) -> List[str]:
+    # labels are not needed
+    with patch.object(reader, "_validate_entity"):
+        data = reader(TreebankWordDetokeniser()).get_test_data(file_path, [])
+    return data.sentences
+
+
+def measure(
+    make_tokeniser: Callable[[], Tokeniser], texts: List[str], times: int
+) -> float:
+    tokeniser = make_tokeniser()
+    start = time.perf_counter()
+    for text in texts:
+        for _ in range(times):
+            tokeniser.tokenise(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="treebank_tokeniser")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--cache_size", type=int, default=4096)
+    args = parser.parse_args()
+
+    tokenisers = {
+        "nltk": TreebankWordTokeniser,
+        "fast": lambda: FastTreebankWordTokeniser(cache_size=0),
+        "fast+cache": lambda: FastTreebankWordTokeniser(cache_size=args.cache_size),
+    }
+    for dataset, (reader, file_path) in DATASETS.items():
+        texts = read_sentences(reader, file_path)
+        for times in [1, 2]:
+            for name, make_tokeniser in tokenisers.items():
+                seconds = min(
+                    measure(make_tokeniser, texts, times) for _ in range(args.repeats)
+                )
+                print(
+                    f"{dataset:10} sentences={len(texts)} times={times} "
+                    f"{name:10} time={seconds * 1000:8.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
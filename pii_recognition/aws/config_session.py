@@ -1,19 +1,84 @@
+import threading
+from typing import Dict, Optional, Tuple
+
 import boto3
 from boto3.session import Session
+from botocore.credentials import RefreshableCredentials
+from botocore.session import get_session
 
 
-def config_cognito_session(identity_pool_id: str, region: str) -> Session:
-    client = boto3.client(service_name="cognito-identity", region_name=region)
+class CognitoCredentialProvider:
+    """
+    Temporary credentials of an unauthenticated identity in a Cognito identity pool.
+
+    The identity id is requested once and reused. Credentials are refreshed by
+    botocore when they are about to expire: a caller of the credentials within 15
+    minutes of the expiry refreshes them while others keep using the current ones,
+    and all callers wait for a refresh only within the last 10 minutes.
+
+    Attributes:
+        identity_pool_id: id of a Cognito identity pool.
+        region: AWS region of the identity pool.
+    """
+
+    METHOD = "cognito-identity"
+
+    def __init__(self, identity_pool_id: str, region: str):
+        self.identity_pool_id = identity_pool_id
+        self.region = region
+        self._client = boto3.client(service_name="cognito-identity", region_name=region)
+        self._identity_id: Optional[str] = None
+        self._identity_lock = threading.Lock()
+        self.credentials = RefreshableCredentials.create_from_metadata(
+            metadata=self._fetch_credentials(),
+            refresh_using=self._fetch_credentials,
+            method=self.METHOD,
+        )
+
+    @property
+    def identity_id(self) -> str:
+        with self._identity_lock:
+            if self._identity_id is None:
+                response = self._client.get_id(IdentityPoolId=self.identity_pool_id)
+                self._identity_id = response["IdentityId"]
+            return self._identity_id
 
-    response = client.get_id(IdentityPoolId=identity_pool_id)
-    identity_id = response["IdentityId"]
+    def _fetch_credentials(self) -> Dict[str, str]:
+        response = self._client.get_credentials_for_identity(
+            IdentityId=self.identity_id
+        )
+        credentials = response["Credentials"]
+        return {
+            "access_key": credentials["AccessKeyId"],
+            "secret_key": credentials["SecretKey"],
+            "token": credentials["SessionToken"],
+            "expiry_time": credentials["Expiration"].isoformat(),
+        }
+
+
+# providers shared in the process keyed by (identity_pool_id, region)
+_providers: Dict[Tuple[str, str], CognitoCredentialProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_cognito_credential_provider(
+    identity_pool_id: str, region: str
+) -> CognitoCredentialProvider:
+    key = (identity_pool_id, region)
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = CognitoCredentialProvider(identity_pool_id, region)
+        return _providers[key]
+
+
+def config_cognito_session(identity_pool_id: str, region: str) -> Session:
+    """Create a session with the process-wide credentials of a Cognito identity pool.
 
-    response = client.get_credentials_for_identity(IdentityId=identity_id)
-    secretKey = response['Credentials']['SecretKey']
-    accessKey = response['Credentials']['AccessKeyId']
-    sessionToken = response['Credentials']['SessionToken']
+    Only the first call for an identity pool sends requests to Cognito, sessions
+    created afterwards share the same auto-refreshing credentials.
+    """
+    provider = get_cognito_credential_provider(identity_pool_id, region)
 
-    return Session(aws_access_key_id=accessKey,
-                   aws_secret_access_key=secretKey,
-                   aws_session_token=sessionToken,
-                   region_name=region)
+    botocore_session = get_session()
+    botocore_session._credentials = provider.credentials
+    return Session(botocore_session=botocore_session, region_name=region)
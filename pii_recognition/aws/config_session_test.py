@@ -1,15 +1,66 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from dateutil.tz import tzutc
 from moto import mock_cognitoidentity
 
-from pii_recognition.aws.config_session import config_cognito_session
+from pii_recognition.aws.config_session import _providers, config_cognito_session
+
+
+@pytest.fixture(autouse=True)
+def clear_providers():
+    _providers.clear()
+    yield
+    _providers.clear()
 
 
 @mock_cognitoidentity
 def test_create_cognito_session():
     session = config_cognito_session(
         identity_pool_id="us-west-2:11aa1111-1aa1-1a1a-11aa-11aa1aaaa111",
-        region="us-west-2")
+        region="us-west-2",
+    )
 
     credentials = session.get_credentials()
     assert session.region_name == "us-west-2"
     assert credentials.access_key == "TESTACCESSKEY12345"
     assert credentials.secret_key == "ABCSECRETKEY"
+
+
+@patch("pii_recognition.aws.config_session.boto3.client")
+def test_create_cognito_session_for_shared_refreshing_credentials(mock_client):
+    now = datetime.now(tzutc())
+    cognito = mock_client.return_value
+    cognito.get_id.return_value = {"IdentityId": "identity"}
+    cognito.get_credentials_for_identity.side_effect = [
+        {
+            "Credentials": {
+                "AccessKeyId": "expiring",
+                "SecretKey": "secret",
+                "SessionToken": "token",
+                "Expiration": now + timedelta(minutes=5),
+            }
+        },
+        {
+            "Credentials": {
+                "AccessKeyId": "refreshed",
+                "SecretKey": "secret",
+                "SessionToken": "token",
+                "Expiration": now + timedelta(hours=1),
+            }
+        },
+    ]
+
+    pool = "us-west-2:11aa1111-1aa1-1a1a-11aa-11aa1aaaa111"
+    session = config_cognito_session(identity_pool_id=pool, region="us-west-2")
+    another_session = config_cognito_session(identity_pool_id=pool, region="us-west-2")
+    assert mock_client.call_count == 1
+    assert cognito.get_credentials_for_identity.call_count == 1
+
+    # credentials expiring soon are refreshed on access and shared by sessions
+    assert session.get_credentials().access_key == "refreshed"
+    assert another_session.get_credentials().access_key == "refreshed"
+    assert cognito.get_credentials_for_identity.call_count == 2
+    cognito.get_id.assert_called_once_with(IdentityPoolId=pool)
+    cognito.get_credentials_for_identity.assert_called_with(IdentityId="identity")
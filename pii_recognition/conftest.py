@@ -0,0 +1,71 @@
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from unittest.mock import Mock
+
+import pytest
+
+from pii_recognition.labels.schema import Entity
+from pii_recognition.recognisers.entity_recogniser import EntityRecogniser
+
+
+class StubRecogniser(EntityRecogniser):
+    """
+    A recogniser for tests finding "PER" wherever pattern matches, by default "Bob"
+    at the start of a text.
+
+    It fails on the text "crash" and blocks a batch with the text "block" until
+    released is set. Batches are recorded with their entities and take delay
+    seconds.
+    """
+
+    def __init__(self, pattern: str = r"^Bob", delay: float = 0.0):
+        super().__init__(supported_entities=["PER", "LOC"], supported_languages=["en"])
+        self.pattern = pattern
+        self.delay = delay
+        self.batches: List[Tuple[List[str], List[str]]] = []
+        self.entered = threading.Event()
+        self.released = threading.Event()
+        self.closed = False
+
+    def analyse(self, text: str, entities: List[str]) -> List[Entity]:
+        if text == "crash":
+            raise RuntimeError("crashed")
+        return [
+            Entity("PER", match.start(), match.end())
+            for match in re.finditer(self.pattern, text)
+        ]
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        self.batches.append((texts, entities))
+        if "block" in texts:
+            self.entered.set()
+            self.released.wait()
+        time.sleep(self.delay)
+        return [self.analyse(text, entities) for text in texts]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stub_recogniser() -> Callable[..., StubRecogniser]:
+    """Make StubRecogniser instances, see StubRecogniser for its arguments."""
+    return StubRecogniser
+
+
+def _mock_analyse_batch(recogniser: Mock):
+    def analyse_batch(texts, entities, batch_size=32):
+        return [recogniser.analyse(text, entities) for text in texts]
+
+    recogniser.analyse_batch.side_effect = analyse_batch
+
+
+@pytest.fixture
+def mock_analyse_batch() -> Callable[[Mock], None]:
+    """Make analyse_batch of a mock recogniser call its analyse on every text, so
+    predictions are set up on analyse alone."""
+    return _mock_analyse_batch
@@ -1,14 +1,13 @@
 from pii_recognition.registration.registry import Registry
 
-from .conll_reader import ConllReader
 from .reader import Reader
-from .wnut_reader import WnutReader
 
 
 def init() -> Registry:
+    # readers are imported on first use, the NLTK corpus readers are slow to import
     registry = Registry[Reader]()
-    registry.register(ConllReader)
-    registry.register(WnutReader)
+    registry.register_lazy(f"{__name__}.conll_reader.ConllReader")
+    registry.register_lazy(f"{__name__}.wnut_reader.WnutReader")
 
     return registry
 
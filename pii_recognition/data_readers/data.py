@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, TypeVar, Set, Generic, Optional
+from typing import Iterator, List, TypeVar, Set, Generic, Optional
 from pii_recognition.labels.schema import Entity
 
 # Two kinds of entity labels
@@ -20,3 +20,12 @@ class Data:
     items: List[DataItem]
     supported_entities: Set[str]
     is_io_schema: bool
+
+
+@dataclass
+class DataStream:
+    """Data of which items are read lazily one at a time."""
+
+    items: Iterator[DataItem]
+    supported_entities: Set[str]
+    is_io_schema: bool
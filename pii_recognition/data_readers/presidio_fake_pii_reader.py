@@ -1,8 +1,8 @@
-from typing import Dict, List, Set
+from typing import Iterator, Optional, Set
 from typing_extensions import TypedDict
 
-from pii_recognition.data_readers.data import Data, DataItem, Entity
-from pii_recognition.utils import load_json_file
+from pii_recognition.data_readers.data import Data, DataItem, DataStream, Entity
+from pii_recognition.utils import iter_json_records
 
 # mypy assumes that Dict is homogeneous, however, we
 # need it to be heterogenous thus use TypedDict
@@ -18,25 +18,41 @@ PresidioSpan = TypedDict(
 
 
 class PresidioFakePiiReader:
-    def _get_supported_entities(self, data: List[Dict]) -> Set[str]:
-        unique_labels = set()
-        for item in data:
-            spans = item["spans"]
-            for span in spans:
-                unique_labels.add(span["entity_type"])
-        return unique_labels
-
     def _span_to_entity(self, span: PresidioSpan) -> Entity:
         return Entity(span["entity_type"], span["start_position"], span["end_position"])
 
-    def build_data(self, file_path: str) -> Data:
-        data = load_json_file(file_path)
-        supported_entities = self._get_supported_entities(data)
+    def iter_items(
+        self, file_path: str, supported_entities: Optional[Set[str]] = None
+    ) -> Iterator[DataItem]:
+        """Lazily yield data items from a JSON array or JSON Lines file.
+
+        Args:
+            file_path: path to the benchmark file.
+            supported_entities: an optional set updated in place with entity types of
+                the items yielded so far.
+        """
+        for record in iter_json_records(file_path):
+            entities = [self._span_to_entity(span) for span in record["spans"]]
+            if supported_entities is not None:
+                supported_entities.update(entity.entity_type for entity in entities)
+            yield DataItem(text=record["full_text"], true_labels=entities)
+
+    def stream_data(self, file_path: str) -> DataStream:
+        """Build data whose items are read lazily from the file.
+
+        Supported entities are collected while items are consumed, they are complete
+        only after the last item has been read.
+        """
+        supported_entities: Set[str] = set()
+        return DataStream(
+            items=self.iter_items(file_path, supported_entities),
+            supported_entities=supported_entities,
+            is_io_schema=False,
+        )
 
-        items = []
-        for item in data:
-            entities = [self._span_to_entity(span) for span in item["spans"]]
-            items.append(DataItem(text=item["full_text"], true_labels=entities))
+    def build_data(self, file_path: str) -> Data:
+        supported_entities: Set[str] = set()
+        items = list(self.iter_items(file_path, supported_entities))
 
         return Data(
             items=items, supported_entities=supported_entities, is_io_schema=False,
@@ -57,3 +57,27 @@ def test_build_data_for_presidio_fake_pii_reader(mock_file):
     ]
     assert [item.pred_labels for item in data.items] == [None, None]
     assert data.supported_entities == {"BIRTHDAY", "ORGANIZATION", "LOCATION"}
+
+
+def presidio_fake_pii_json_lines():
+    return "\n".join(json.dumps(item) for item in json.loads(presidio_fake_pii_json()))
+
+
+@patch(
+    "builtins.open", new_callable=mock_open, read_data=presidio_fake_pii_json_lines()
+)
+def test_stream_data_for_presidio_fake_pii_reader(mock_file):
+    reader = PresidioFakePiiReader()
+    data = reader.stream_data("fake_path/file.jsonl")
+    assert data.supported_entities == set()
+    assert not mock_file.called
+
+    first_item = next(data.items)
+    assert first_item.text == "It's like that since 12/17/1967"
+    assert first_item.true_labels == [Entity("BIRTHDAY", 21, 31)]
+    assert data.supported_entities == {"BIRTHDAY"}
+
+    assert [item.true_labels for item in data.items] == [
+        [Entity("ORGANIZATION", 15, 30), Entity("LOCATION", 34, 58)],
+    ]
+    assert data.supported_entities == {"BIRTHDAY", "ORGANIZATION", "LOCATION"}
@@ -6,11 +6,16 @@ from pii_recognition.evaluation.character_level_evaluation import (
     build_label_mapping,
     compute_entity_precisions_for_prediction,
     compute_entity_recalls_for_ground_truth,
+    compute_entity_precisions_for_prediction_vectorised,
+    compute_entity_recalls_for_ground_truth_vectorised,
     compute_pii_detection_fscore,
+    get_evaluation_engine,
     label_encoder,
+    vectorised_label_encoder,
     EntityRecall,
     EntityPrecision,
 )
+from pii_recognition.labels.entity_array import EntityArray
 from pii_recognition.labels.schema import Entity
 
 
@@ -47,6 +52,115 @@ def test_label_encoder_for_span_beyond_range():
     )
 
 
+def test_vectorised_label_encoder_for_multi_labels():
+    spans = [
+        Entity(entity_type="LOC", start=5, end=8),
+        Entity(entity_type="PER", start=10, end=15),
+        Entity(entity_type="PERSON", start=2, end=5),
+    ]
+
+    actual = vectorised_label_encoder(20, spans, {"LOC": 1, "PER": 2, "PERSON": 2})
+    assert actual.tolist() == label_encoder(
+        20, spans, {"LOC": 1, "PER": 2, "PERSON": 2}
+    )
+
+
+def test_vectorised_label_encoder_for_invalid_inputs():
+    spans = [Entity(entity_type="PER", start=10, end=15)]
+    with pytest.raises(Exception) as error:
+        vectorised_label_encoder(20, spans, {"LOC": 1})
+    assert str(error.value) == ("Missing label 'PER' in 'label_to_int' mapping.")
+
+    spans = [Entity(entity_type="LOC", start=3, end=7)]
+    with pytest.raises(ValueError) as error:
+        vectorised_label_encoder(5, spans, {"LOC": 1})
+    assert str(error.value) == (
+        "Entity span index is out of range: text length is 5 but got span index 7."
+    )
+
+    # the first invalid entity decides the error
+    spans = EntityArray.from_entities(
+        [Entity("LOC", 3, 7), Entity("PER", 0, 1), Entity("DATE", 0, 9)]
+    )
+    with pytest.raises(ValueError):
+        vectorised_label_encoder(5, spans, {"LOC": 1, "DATE": 0})
+    with pytest.raises(Exception) as error:
+        vectorised_label_encoder(8, spans, {"LOC": 1, "DATE": 0})
+    assert str(error.value) == ("Missing label 'PER' in 'label_to_int' mapping.")
+
+
+@pytest.mark.parametrize(
+    "true_entities,pred_entities,label_to_int",
+    [
+        # partial overlaps and label groups
+        (
+            [Entity("LOC", 3, 7), Entity("PER", 10, 15), Entity("LOC", 23, 32)],
+            [Entity("LOC", 1, 4), Entity("PER", 3, 20), Entity("PERSON", 28, 35)],
+            {"LOC": 1, "PER": 2, "PERSON": 2},
+        ),
+        # non-targeted labels and overlapping entities
+        (
+            [Entity("LOC", 3, 20), Entity("DATE", 5, 9), Entity("PER", 18, 30)],
+            [Entity("LOC", 3, 7), Entity("DATE", 10, 15), Entity("LOC", 4, 25)],
+            {"LOC": 1, "PER": 2, "DATE": 0},
+        ),
+        # zero length entity and empty prediction
+        ([Entity("LOC", 3, 3), Entity("PER", 0, 50)], [], {"LOC": 1, "PER": 2}),
+        ([], [Entity("LOC", 3, 3), Entity("PER", 0, 50)], {"LOC": 1, "PER": 2}),
+    ],
+)
+def test_vectorised_engine_agrees_with_sklearn_engine(
+    true_entities, pred_entities, label_to_int
+):
+    expected = compute_entity_precisions_for_prediction(
+        50, true_entities, pred_entities, label_to_int
+    )
+    actual = compute_entity_precisions_for_prediction_vectorised(
+        50, true_entities, pred_entities, label_to_int
+    )
+    assert [p.entity for p in actual] == [p.entity for p in expected]
+    assert_almost_equal(
+        [p.precision for p in actual], [p.precision for p in expected]
+    )
+
+    expected = compute_entity_recalls_for_ground_truth(
+        50, true_entities, pred_entities, label_to_int
+    )
+    actual = compute_entity_recalls_for_ground_truth_vectorised(
+        50, true_entities, pred_entities, label_to_int
+    )
+    assert [r.entity for r in actual] == [r.entity for r in expected]
+    assert_almost_equal([r.recall for r in actual], [r.recall for r in expected])
+
+    # the same on columnar entities
+    actual = compute_entity_recalls_for_ground_truth_vectorised(
+        50,
+        EntityArray.from_entities(true_entities),
+        EntityArray.from_entities(pred_entities),
+        label_to_int,
+    )
+    assert [r.entity for r in actual] == [r.entity for r in expected]
+    assert_almost_equal([r.recall for r in actual], [r.recall for r in expected])
+
+
+def test_get_evaluation_engine():
+    assert get_evaluation_engine("sklearn") == (
+        compute_entity_precisions_for_prediction,
+        compute_entity_recalls_for_ground_truth,
+    )
+    assert get_evaluation_engine("numpy") == (
+        compute_entity_precisions_for_prediction_vectorised,
+        compute_entity_recalls_for_ground_truth_vectorised,
+    )
+
+    with pytest.raises(ValueError) as error:
+        get_evaluation_engine("unknown")
+    assert str(error.value) == (
+        "Available evaluation engines are: ['sklearn', 'numpy'] "
+        "but got engine named unknown"
+    )
+
+
 def test_compute_precisions_recalls_for_exact_match():
     true_entities = pred_entities = [
         Entity(entity_type="LOC", start=3, end=7),
@@ -1,7 +1,6 @@
 from typing import List, TypeVar
 
 import numpy as np
-from sklearn.metrics import precision_score, recall_score
 
 # LT for label type
 LT = TypeVar("LT", int, str)
@@ -26,6 +25,9 @@ def compute_label_precision(
     settings. The invoked sklearn function is not stable on string and integer mixed
     labels, may encouter ValueError. So mixed types in an argument is not allowed.
     """
+    # sklearn is slow to import and not needed by the vectorised evaluation
+    from sklearn.metrics import precision_score
+
     return precision_score(y_true, y_pred, average=None, labels=[label_name])[0]
 
 
@@ -36,4 +38,6 @@ def compute_label_recall(y_true: List[LT], y_pred: List[LT], label_name: LT,) ->
     settings. The invoked sklearn function is not stable on string and integer mixed
     labels, may encouter ValueError. So mixed types in an arguments is not allowed.
     """
+    from sklearn.metrics import recall_score
+
     return recall_score(y_true, y_pred, average=None, labels=[label_name])[0]
@@ -1,5 +1,7 @@
+import copy
 from collections import Counter
-from typing import Dict, List, Optional, Tuple
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
@@ -8,11 +10,61 @@ from pii_recognition.labels.schema import EvalLabel, Entity, TokenLabel
 from pii_recognition.labels.span import span_labels_to_token_labels
 from pii_recognition.recognisers.entity_recogniser import EntityRecogniser
 from pii_recognition.tokenisation.tokenisers import Tokeniser
+from pii_recognition.utils import batch_indices_by_length, batched
 
-from .metrics import compute_f_beta
+from .prediction_cache import PredictionCache
 from .prediction_error import SampleError, TokenError
 
 
+def merge_counters(counters: Iterable[Counter]) -> Counter:
+    """Add up counters in place of a single counter, unlike sum() it does not copy
+    the running total on every addition."""
+    merged: Counter = Counter()
+    for counter in counters:
+        merged.update(counter)
+    return merged
+
+
+# evaluator owned by a worker process, see _init_evaluator_worker
+_worker_evaluator: Optional["ModelEvaluator"] = None
+
+
+def _init_evaluator_worker(evaluator: "ModelEvaluator"):
+    global _worker_evaluator
+    # the prediction cache is only used by the parent process, a SQLite connection
+    # cannot be used across fork
+    _worker_evaluator = copy.copy(evaluator)
+    _worker_evaluator.prediction_cache = None
+
+
+def _evaluate_shard_in_worker(
+    shard: Tuple[List[Tuple[str, List[str]]], Dict[int, Optional[List[Entity]]]]
+) -> Tuple[Counter, List[Optional[SampleError]], List[Optional[List[Entity]]]]:
+    """Evaluate a shard of texts and annotations, predictions already found in the
+    cache are given by the position of their texts in the shard. Predictions made
+    for the other texts are returned for the parent process to cache."""
+    assert _worker_evaluator is not None, "Worker evaluator is not initialised."
+    samples, cached = shard
+    texts = [text for text, _ in samples]
+    annotations = [text_annotations for _, text_annotations in samples]
+
+    missed = [position for position in range(len(texts)) if position not in cached]
+    missed_predictions: List[Optional[List[Entity]]] = []
+    if missed:
+        missed_predictions = _worker_evaluator.recogniser.analyse_batch(
+            [texts[position] for position in missed],
+            _worker_evaluator.target_entities,
+            batch_size=len(texts),
+        )
+    predictions = dict(cached)
+    predictions.update(zip(missed, missed_predictions))
+
+    counters, errors = _worker_evaluator._evaluate_predictions(
+        texts, annotations, [predictions[position] for position in range(len(texts))]
+    )
+    return merge_counters(counters), errors, missed_predictions
+
+
 class ModelEvaluator:
     """
     Evaluates a named entity recogniser.
@@ -25,6 +77,8 @@ class ModelEvaluator:
         switch_labels: a dict {model_label: test_data_label} facilitates the entity
             conversion between predicted and test labels. Predicted entity labels could
             differ from the test entity labels, e.g., PERSON and PER.
+        prediction_cache: an optional PredictionCache consulted before asking the
+            recogniser for predictions.
     """
 
     def __init__(
@@ -33,9 +87,11 @@ class ModelEvaluator:
         tokeniser: Tokeniser,
         target_entities: List[str],
         switch_labels: Optional[Dict[str, str]] = None,
+        prediction_cache: Optional[PredictionCache] = None,
     ):
         self.recogniser = recogniser
         self.tokeniser = tokeniser
+        self.prediction_cache = prediction_cache
 
         # TODO: Add many-to-one support. The switch_labels dict supports one to one and
         # one to many
@@ -91,18 +147,69 @@ class ModelEvaluator:
             f"{sorted(list(predicted_entities - asked_entities))}"
         )
 
-    def get_span_based_prediction(self, text: str) -> List[Entity]:
-        predicted_spans = self.recogniser.analyse(text, self.target_entities)
+    def _rectify_span_based_prediction(
+        self, predicted_spans: Optional[List[Entity]]
+    ) -> List[Entity]:
         if predicted_spans:
             self._validate_predictions([label.entity_type for label in predicted_spans])
             return predicted_spans
         # TODO: use optional instead of returning empty list
         return []
 
+    def get_span_based_prediction(self, text: str) -> List[Entity]:
+        if self.prediction_cache is not None:
+            return self.get_span_based_predictions([text])[0]
+
+        predicted_spans = self.recogniser.analyse(text, self.target_entities)
+        return self._rectify_span_based_prediction(predicted_spans)
+
+    def _analyse_batch_with_cache(
+        self, texts: List[str], batch_size: int
+    ) -> List[Optional[List[Entity]]]:
+        assert self.prediction_cache is not None
+        batch_predictions = self.prediction_cache.get_many(texts, self.target_entities)
+
+        missed_texts = [
+            text for index, text in enumerate(texts) if index not in batch_predictions
+        ]
+        if missed_texts:
+            missed_predictions = self.recogniser.analyse_batch(
+                missed_texts, self.target_entities, batch_size=batch_size
+            )
+            self.prediction_cache.put_many(
+                missed_texts, self.target_entities, missed_predictions
+            )
+            missed_indices = [
+                index for index in range(len(texts)) if index not in batch_predictions
+            ]
+            batch_predictions.update(zip(missed_indices, missed_predictions))
+
+        return [batch_predictions[index] for index in range(len(texts))]
+
+    def get_span_based_predictions(
+        self, texts: List[str], batch_size: int = 32
+    ) -> List[List[Entity]]:
+        """Span based predictions for a batch of texts using recogniser batching."""
+        if self.prediction_cache is not None:
+            batch_predictions = self._analyse_batch_with_cache(texts, batch_size)
+        else:
+            batch_predictions = self.recogniser.analyse_batch(
+                texts, self.target_entities, batch_size=batch_size
+            )
+        return [
+            self._rectify_span_based_prediction(predicted_spans)
+            for predicted_spans in batch_predictions
+        ]
+
+    def _spans_to_token_labels(
+        self, text: str, recognised_entities: List[Entity]
+    ) -> List[TokenLabel]:
+        tokens = self.tokeniser.tokenise(text)
+        return span_labels_to_token_labels(recognised_entities, tokens)
+
     def get_token_based_prediction(self, text: str) -> List[TokenLabel]:
         recognised_entities = self.get_span_based_prediction(text)
-        tokens = self.tokeniser.tokenise(text)
-        token_labels = span_labels_to_token_labels(recognised_entities, tokens)
+        token_labels = self._spans_to_token_labels(text, recognised_entities)
 
         return token_labels
 
@@ -153,12 +260,22 @@ class ModelEvaluator:
         return label_pair_counter, rectified_sample_error
 
     def evaluate_sample(
-        self, text: str, annotations: List[str]
+        self,
+        text: str,
+        annotations: List[str],
+        recognised_entities: Optional[List[Entity]] = None,
     ) -> Tuple[Counter, Optional[SampleError]]:
+        """Evaluate predictions on one text. Predictions are made by the recogniser
+        unless they have already been given in recognised_entities."""
         masked_annotations = mask_labels(annotations, self._translated_entities)
 
         # make prediction
-        token_based_predictions = self.get_token_based_prediction(text)
+        if recognised_entities is None:
+            token_based_predictions = self.get_token_based_prediction(text)
+        else:
+            token_based_predictions = self._spans_to_token_labels(
+                text, recognised_entities
+            )
         predictions = [pred.entity_type for pred in token_based_predictions]
         translated_predictions = (
             map_labels(predictions, self._switch_labels)
@@ -174,22 +291,151 @@ class ModelEvaluator:
 
         return label_pair_counter, sample_error
 
+    def _evaluate_predictions(
+        self,
+        texts: List[str],
+        annotations: List[List[str]],
+        batch_predictions: List[Optional[List[Entity]]],
+    ) -> Tuple[List[Counter], List[Optional[SampleError]]]:
+        """Evaluate texts on predictions of the recogniser, a counter and an optional
+        error is returned per text."""
+        results = [
+            self.evaluate_sample(
+                text,
+                text_annotations,
+                self._rectify_span_based_prediction(predicted_spans),
+            )
+            for text, text_annotations, predicted_spans in zip(
+                texts, annotations, batch_predictions
+            )
+        ]
+        return (
+            [counter for counter, _ in results],
+            [sample_error for _, sample_error in results],
+        )
+
+    def _evaluate_batches(
+        self,
+        texts: List[str],
+        annotations: List[List[str]],
+        batches: Iterable[List[int]],
+        batch_size: int,
+    ) -> Tuple[List[Counter], List[Optional[SampleError]]]:
+        """Evaluate texts predicted batch by batch, batches are given as indices of
+        texts. A counter and an optional error is returned per text in the order of
+        texts."""
+        results: Dict[int, Tuple[Counter, Optional[SampleError]]] = dict()
+        for indices in batches:
+            batch_predictions = self.get_span_based_predictions(
+                [texts[index] for index in indices], batch_size
+            )
+            for index, recognised_entities in zip(indices, batch_predictions):
+                results[index] = self.evaluate_sample(
+                    texts[index], annotations[index], recognised_entities
+                )
+
+        ordered = [results[index] for index in range(len(texts))]
+        return (
+            [counter for counter, _ in ordered],
+            [sample_error for _, sample_error in ordered],
+        )
+
     def evaluate_all(
-        self, texts: List[str], annotations: List[List[str]]
+        self,
+        texts: List[str],
+        annotations: List[List[str]],
+        batch_size: int = 32,
+        num_workers: int = 1,
+        bucket_by_length: bool = False,
     ) -> Tuple[List[Counter], List[SampleError]]:
+        """Evaluate predictions on all texts.
+
+        Texts are predicted in batches of batch_size. When num_workers is greater than
+        one, batches are evaluated as shards across a pool of processes and a merged
+        counter is returned per shard instead of a counter per text. Workers inherit
+        the evaluator when processes are forked, otherwise it must be picklable. The
+        prediction cache is looked up and written by this process, workers are only
+        sent texts missing it.
+
+        When bucket_by_length is true, texts are batched with others of similar
+        lengths, which saves padding of recognisers such as Flair and Stanza. Counters
+        and mistakes are still in the order of texts.
+        """
         assert len(texts) == len(annotations)
 
-        counters = []
-        mistakes = []
-        for i in range(len(texts)):
-            label_pair_counter, sample_error = self.evaluate_sample(
-                texts[i], annotations[i]
+        batches: Iterable[List[int]]
+        if bucket_by_length:
+            batches = batch_indices_by_length([len(text) for text in texts], batch_size)
+        else:
+            batches = batched(range(len(texts)), batch_size)
+
+        if num_workers > 1:
+            counters = []
+            errors: List[Optional[SampleError]] = [None] * len(texts)
+            order = [index for indices in batches for index in indices]
+
+            # the cache is looked up and written here, workers only predict texts
+            # missing it
+            cached: Dict[int, Optional[List[Entity]]] = dict()
+            if self.prediction_cache is not None:
+                found = self.prediction_cache.get_many(
+                    [texts[index] for index in order], self.target_entities
+                )
+                cached = {order[position]: found[position] for position in found}
+            shards = (
+                (
+                    [(texts[index], annotations[index]) for index in indices],
+                    {
+                        position: cached[index]
+                        for position, index in enumerate(indices)
+                        if index in cached
+                    },
+                )
+                for indices in batched(order, batch_size)
+            )
+
+            done = 0
+            with Pool(
+                num_workers, initializer=_init_evaluator_worker, initargs=(self,)
+            ) as pool:
+                for shard_counter, shard_errors, missed_predictions in pool.imap(
+                    _evaluate_shard_in_worker, shards
+                ):
+                    counters.append(shard_counter)
+                    shard_indices = order[done : done + len(shard_errors)]
+                    for index, sample_error in zip(shard_indices, shard_errors):
+                        errors[index] = sample_error
+                    done += len(shard_errors)
+
+                    if self.prediction_cache is not None and missed_predictions:
+                        self.prediction_cache.put_many(
+                            [texts[i] for i in shard_indices if i not in cached],
+                            self.target_entities,
+                            missed_predictions,
+                        )
+        else:
+            counters, errors = self._evaluate_batches(
+                texts, annotations, batches, batch_size
             )
-            counters.append(label_pair_counter)
-            if sample_error is not None:
-                mistakes.append(sample_error)
+
+        mistakes = [sample_error for sample_error in errors if sample_error is not None]
         return counters, mistakes
 
+    def _build_confusion_matrix(
+        self, all_results: Counter
+    ) -> Tuple[Dict[str, int], np.ndarray]:
+        """Count label pairs in a dense annotated x predicted matrix."""
+        labels = sorted(
+            {label for label_pair in all_results for label in label_pair}
+            | set(self._translated_entities)
+        )
+        label_index = {label: i for i, label in enumerate(labels)}
+
+        confusion_matrix = np.zeros((len(labels), len(labels)), dtype=np.int64)
+        for (annotated, predicted), count in all_results.items():
+            confusion_matrix[label_index[annotated], label_index[predicted]] += count
+        return label_index, confusion_matrix
+
     def calculate_score(
         self,
         all_eval_counters: List[Counter],
@@ -197,39 +443,29 @@ class ModelEvaluator:
         use_test_labels: bool = True,
     ) -> Tuple[Dict, Dict, Dict]:
         # aggregate results
-        all_results: Counter = sum(all_eval_counters, Counter())
-
-        # compute score per entity
-        entity_recall = {}
-        entity_precision = {}
-        entity_f_score = {}
-
-        for entity in self._translated_entities:
-            annotated = sum(
-                [all_results[x] for x in all_results if x.annotated == entity]
+        all_results = merge_counters(all_eval_counters)
+        label_index, confusion_matrix = self._build_confusion_matrix(all_results)
+
+        # compute score per entity from the confusion matrix
+        entity_rows = [label_index[entity] for entity in self._translated_entities]
+        annotated = confusion_matrix.sum(axis=1)[entity_rows]
+        predicted = confusion_matrix.sum(axis=0)[entity_rows]
+        tp = confusion_matrix[entity_rows, entity_rows]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            recalls = np.where(annotated > 0, tp / annotated, np.nan)
+            precisions = np.where(predicted > 0, tp / predicted, np.nan)
+            # compute_f_beta(recall, precision, f_beta) element-wise
+            f_scores = np.where(
+                (recalls == 0.0) & (precisions == 0.0),
+                0.0,
+                ((1 + f_beta ** 2) * recalls * precisions)
+                / (((f_beta ** 2) * recalls) + precisions),
             )
-            predicted = sum(
-                [all_results[x] for x in all_results if x.predicted == entity]
-            )
-            tp = all_results[(entity, entity)]
-
-            if annotated > 0:
-                entity_recall[entity] = tp / annotated
-            else:
-                entity_recall[entity] = np.NaN
-
-            if predicted > 0:
-                per_entity_tp = all_results[(entity, entity)]
-                entity_precision[entity] = per_entity_tp / predicted
-            else:
-                entity_precision[entity] = np.NaN
-
-            if annotated > 0 and predicted > 0:
-                entity_f_score[entity] = compute_f_beta(
-                    entity_recall[entity], entity_precision[entity], f_beta
-                )
-            else:
-                entity_f_score[entity] = np.NaN
+
+        entity_recall = dict(zip(self._translated_entities, recalls.tolist()))
+        entity_precision = dict(zip(self._translated_entities, precisions.tolist()))
+        entity_f_score = dict(zip(self._translated_entities, f_scores.tolist()))
 
         # use recogniser entity labels
         if (use_test_labels is False) and (self._switch_labels is not None):
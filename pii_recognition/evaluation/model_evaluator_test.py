@@ -1,14 +1,20 @@
+import os
+import random
 from collections import Counter
+from tempfile import TemporaryDirectory
 from typing import List
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
 from pytest import fixture
 
 from pii_recognition.labels.schema import EvalLabel, Entity
 from pii_recognition.tokenisation.token_schema import Token
 
-from .model_evaluator import ModelEvaluator
+from .metrics import compute_f_beta
+from .model_evaluator import ModelEvaluator, merge_counters
+from .prediction_cache import PredictionCache
 from .prediction_error import SampleError, TokenError
 
 
@@ -18,23 +24,25 @@ def text():
 
 
 @fixture
-def mock_recogniser():
+def mock_recogniser(mock_analyse_batch):
     recogniser = Mock()
     recogniser.analyse.return_value = [
         Entity("PER", 8, 11),
         Entity("LOC", 17, 26),
     ]
+    mock_analyse_batch(recogniser)
     recogniser.supported_entities = ["PER", "LOC"]
     return recogniser
 
 
 @fixture
-def mock_bad_recogniser():
+def mock_bad_recogniser(mock_analyse_batch):
     # failed to predict location entity
     recogniser = Mock()
     recogniser.analyse.return_value = [
         Entity("PER", 8, 11),
     ]
+    mock_analyse_batch(recogniser)
     recogniser.supported_entities = ["PER", "LOC"]
     return recogniser
 
@@ -301,6 +309,105 @@ def test_evaulate_all(text, mock_recogniser, mock_tokeniser):
     assert mistakes == []
 
 
+def test_evaulate_all_in_batches(text, mock_recogniser, mock_tokeniser):
+    evaluator = ModelEvaluator(
+        recogniser=mock_recogniser,
+        tokeniser=mock_tokeniser,
+        target_entities=["PER", "LOC"],
+    )
+    counters, mistakes = evaluator.evaluate_all(
+        texts=[text] * 3,
+        annotations=[["O", "O", "PER", "O", "LOC", "O"]] * 3,
+        batch_size=2,
+    )
+
+    assert [
+        args[0] for args, _ in mock_recogniser.analyse_batch.call_args_list
+    ] == [[text] * 2, [text]]
+    mock_recogniser.analyse_batch.assert_called_with(
+        [text], ["PER", "LOC"], batch_size=2
+    )
+    assert len(counters) == 3
+    assert mistakes == []
+
+
+def test_evaluate_all_bucketed_by_length(mock_recogniser, mock_tokeniser):
+    mock_recogniser.analyse.return_value = []
+    mock_tokeniser.tokenise.side_effect = lambda text: [
+        Token(word, text.index(word), text.index(word) + len(word))
+        for word in text.split()
+    ]
+    evaluator = ModelEvaluator(
+        recogniser=mock_recogniser,
+        tokeniser=mock_tokeniser,
+        target_entities=["PER"],
+    )
+    texts = ["Bob is here", "Bob", "Bob is", "Bob is not here"]
+    annotations = [["PER"] + ["O"] * (len(text.split()) - 1) for text in texts]
+
+    counters, mistakes = evaluator.evaluate_all(
+        texts, annotations, batch_size=2, bucket_by_length=True
+    )
+
+    assert [
+        args[0] for args, _ in mock_recogniser.analyse_batch.call_args_list
+    ] == [["Bob", "Bob is"], ["Bob is here", "Bob is not here"]]
+    # results are in the order of texts
+    assert [counter[EvalLabel("O", "O")] for counter in counters] == [2, 0, 1, 3]
+    assert [mistake.full_text for mistake in mistakes] == texts
+
+    mock_recogniser.analyse_batch.reset_mock()
+    parallel_counters, parallel_mistakes = evaluator.evaluate_all(
+        texts, annotations, batch_size=2, num_workers=2, bucket_by_length=True
+    )
+    assert merge_counters(parallel_counters) == merge_counters(counters)
+    assert parallel_mistakes == mistakes
+
+
+def test_get_span_based_predictions(mock_recogniser, mock_tokeniser, text):
+    evaluator = ModelEvaluator(
+        recogniser=mock_recogniser, tokeniser=mock_tokeniser, target_entities=["PER"],
+    )
+    with pytest.raises(AssertionError) as err:
+        evaluator.get_span_based_predictions([text])
+    assert str(err.value) == "Predictions contain unasked entities ['LOC']"
+
+    mock_recogniser.analyse.return_value = None
+    actual = evaluator.get_span_based_predictions([text, text])
+    assert actual == [[], []]
+
+
+def test_get_span_based_predictions_with_prediction_cache(
+    mock_recogniser, mock_tokeniser, text
+):
+    with TemporaryDirectory() as tmpdirname:
+        cache = PredictionCache(
+            os.path.join(tmpdirname, "predictions.sqlite"), "MockRecogniser"
+        )
+        evaluator = ModelEvaluator(
+            recogniser=mock_recogniser,
+            tokeniser=mock_tokeniser,
+            target_entities=["PER", "LOC"],
+            prediction_cache=cache,
+        )
+        expected = [Entity("PER", 8, 11), Entity("LOC", 17, 26)]
+
+        assert evaluator.get_span_based_predictions([text, text]) == [
+            expected,
+            expected,
+        ]
+        assert mock_recogniser.analyse.call_count == 2
+        assert (cache.hits, cache.misses) == (0, 2)
+
+        assert evaluator.get_span_based_prediction(text) == expected
+        actual = evaluator.get_span_based_predictions([text, "Bob"])
+        assert actual == [expected, expected]
+        mock_recogniser.analyse.assert_called_with("Bob", ["PER", "LOC"])
+        assert mock_recogniser.analyse.call_count == 3
+        assert (cache.hits, cache.misses) == (2, 3)
+        cache.close()
+
+
 def test_calculate_score(mock_recogniser, mock_tokeniser):
     evaluator = ModelEvaluator(
         recogniser=mock_recogniser,
@@ -366,3 +473,102 @@ def test_calculate_score(mock_recogniser, mock_tokeniser):
     assert recall == {"PER": 1.0, "LOC": 1.0}
     assert precision == {"PER": 1.0, "LOC": 1.0}
     assert f1 == {"PER": 1.0, "LOC": 1.0}
+
+
+def test_calculate_score_on_random_counters(mock_recogniser, mock_tokeniser):
+    evaluator = ModelEvaluator(
+        recogniser=mock_recogniser,
+        tokeniser=mock_tokeniser,
+        target_entities=["PER", "LOC"],
+    )
+    rng = random.Random(42)
+    labels = ["O", "PER", "LOC", "MISC"]
+    counters = [
+        Counter(
+            {
+                EvalLabel(rng.choice(labels), rng.choice(labels)): rng.randint(1, 5)
+                for _ in range(3)
+            }
+        )
+        for _ in range(50)
+    ]
+
+    all_results = merge_counters(counters)
+    assert all_results == sum(counters, Counter())
+
+    recall, precision, f1 = evaluator.calculate_score(counters, f_beta=2.0)
+    for entity in ["PER", "LOC"]:
+        annotated = sum(c for pair, c in all_results.items() if pair[0] == entity)
+        predicted = sum(c for pair, c in all_results.items() if pair[1] == entity)
+        tp = all_results[(entity, entity)]
+        assert recall[entity] == tp / annotated
+        assert precision[entity] == tp / predicted
+        assert f1[entity] == compute_f_beta(tp / annotated, tp / predicted, 2.0)
+
+    # undefined when there is nothing annotated or predicted
+    recall, precision, f1 = evaluator.calculate_score(
+        [Counter({EvalLabel("O", "PER"): 1})]
+    )
+    assert np.isnan(recall["PER"]) and precision["PER"] == 0.0 and np.isnan(f1["PER"])
+    assert np.isnan(recall["LOC"]) and np.isnan(precision["LOC"])
+
+
+def test_evaluate_all_with_process_pool(text, mock_recogniser, mock_tokeniser):
+    evaluator = ModelEvaluator(
+        recogniser=mock_recogniser,
+        tokeniser=mock_tokeniser,
+        target_entities=["PER", "LOC"],
+    )
+    texts = [text] * 5
+    annotations = [["O", "O", "PER", "O", "LOC", "O"]] * 4 + [["O"] * 6]
+
+    counters, mistakes = evaluator.evaluate_all(
+        texts, annotations, batch_size=2, num_workers=2
+    )
+    serial_counters, serial_mistakes = evaluator.evaluate_all(texts, annotations)
+
+    # a merged counter per shard
+    assert len(counters) == 3
+    assert merge_counters(counters) == merge_counters(serial_counters)
+    assert mistakes == serial_mistakes
+    assert evaluator.calculate_score(counters) == evaluator.calculate_score(
+        serial_counters
+    )
+
+
+def test_evaluate_all_with_process_pool_and_prediction_cache(
+    mock_recogniser, mock_tokeniser
+):
+    texts = [f"This is Bob from Melbourne{i}" for i in range(5)]
+    annotations = [["O", "O", "PER", "O", "LOC", "O"]] * 5
+    with TemporaryDirectory() as tmpdirname:
+        cache = PredictionCache(
+            os.path.join(tmpdirname, "predictions.sqlite"), "MockRecogniser"
+        )
+        evaluator = ModelEvaluator(
+            recogniser=mock_recogniser,
+            tokeniser=mock_tokeniser,
+            target_entities=["PER", "LOC"],
+            prediction_cache=cache,
+        )
+        # one text is cached beforehand
+        cache.put_many(texts[:1], ["PER", "LOC"], [[Entity("PER", 8, 11)]])
+
+        counters, mistakes = evaluator.evaluate_all(
+            texts, annotations, batch_size=2, num_workers=2
+        )
+        # hits and misses are counted, and predictions of workers are cached, by
+        # the parent process
+        assert (cache.hits, cache.misses) == (1, 4)
+        assert len(cache) == 5
+        # the cached prediction is evaluated, it misses the location
+        assert [mistake.full_text for mistake in mistakes] == texts[:1]
+        assert merge_counters(counters)[EvalLabel("LOC", "LOC")] == 4
+
+        parallel_counters, parallel_mistakes = evaluator.evaluate_all(
+            texts, annotations, batch_size=2, num_workers=2
+        )
+        assert (cache.hits, cache.misses) == (6, 4)
+        assert merge_counters(parallel_counters) == merge_counters(counters)
+        assert parallel_mistakes == mistakes
+        cache.close()
@@ -8,6 +8,7 @@ from pakkr import Pipeline, returns
 from pii_recognition.data_readers import reader_registry
 from pii_recognition.data_readers.reader import Data
 from pii_recognition.evaluation.model_evaluator import ModelEvaluator
+from pii_recognition.evaluation.prediction_cache import PredictionCache
 from pii_recognition.paths.data_path import DataPath
 from pii_recognition.recognisers import registry as recogniser_registry
 from pii_recognition.recognisers.entity_recogniser import EntityRecogniser
@@ -53,13 +54,40 @@ def get_detokeniser(detokeniser_setup: Dict) -> Dict[str, Detokeniser]:
 
 # recogniser has been injected to meta
 @returns(recogniser=EntityRecogniser)
-def get_recogniser(recogniser_setup: Dict) -> Dict[str, EntityRecogniser]:
+def get_recogniser(
+    recogniser_setup: Dict, reuse_recogniser: bool = False
+) -> Dict[str, EntityRecogniser]:
+    # a reused recogniser keeps its loaded model across pipeline runs in a process
     recogniser_instance = recogniser_registry.create_instance(
-        recogniser_setup["name"], recogniser_setup.get("config")
+        recogniser_setup["name"],
+        recogniser_setup.get("config"),
+        cached=reuse_recogniser,
     )
     return {"recogniser": recogniser_instance}
 
 
+# prediction cache has been injected to meta
+@returns(prediction_cache=Optional[PredictionCache])
+def get_prediction_cache(
+    recogniser_setup: Dict,
+    recogniser: EntityRecogniser,
+    prediction_cache_path: Optional[str] = None,
+    prediction_cache_size: int = 100000,
+) -> Dict[str, Optional[PredictionCache]]:
+    if prediction_cache_path is None:
+        return {"prediction_cache": None}
+
+    return {
+        "prediction_cache": PredictionCache(
+            prediction_cache_path,
+            recogniser_setup["name"],
+            recogniser_setup.get("config"),
+            version=recogniser.prediction_version,
+            max_entries=prediction_cache_size,
+        )
+    }
+
+
 # evaluator has been injected to meta
 @returns(evaluator=ModelEvaluator)
 def get_evaluator(
@@ -67,9 +95,12 @@ def get_evaluator(
     tokeniser: Tokeniser,
     predict_on: List[str],
     switch_labels: Optional[Dict[str, str]] = None,
+    prediction_cache: Optional[PredictionCache] = None,
 ) -> Dict[str, ModelEvaluator]:
     return {
-        "evaluator": ModelEvaluator(recogniser, tokeniser, predict_on, switch_labels)
+        "evaluator": ModelEvaluator(
+            recogniser, tokeniser, predict_on, switch_labels, prediction_cache
+        )
     }
 
 
@@ -99,9 +130,19 @@ def load_test_data(
 
 @returns()
 def evaluate(
-    data: Data, evaluator: ModelEvaluator,
+    data: Data,
+    evaluator: ModelEvaluator,
+    batch_size: int = 32,
+    num_workers: int = 1,
+    bucket_by_length: bool = False,
 ):
-    counters, mistakes = evaluator.evaluate_all(data.sentences, data.labels)
+    counters, mistakes = evaluator.evaluate_all(
+        data.sentences,
+        data.labels,
+        batch_size=batch_size,
+        num_workers=num_workers,
+        bucket_by_length=bucket_by_length,
+    )
     recall, precision, f1 = evaluator.calculate_score(counters)
 
     log_entities_metric(recall, "recall")
@@ -114,6 +155,11 @@ def evaluate(
         write_iterable_to_file(mistakes, error_file_path)
         mlflow.log_artifact(error_file_path)
 
+    if evaluator.prediction_cache is not None:
+        mlflow.log_metric("prediction_cache_hits", evaluator.prediction_cache.hits)
+        mlflow.log_metric("prediction_cache_misses", evaluator.prediction_cache.misses)
+        evaluator.prediction_cache.close()
+
 
 @returns()
 def disable_tracker():
@@ -127,6 +173,7 @@ def execute_evaluation_pipeline(config_yaml: str):
         get_tokeniser,
         get_detokeniser,
         get_recogniser,
+        get_prediction_cache,
         get_evaluator,
         load_test_data,
         evaluate,
@@ -1,3 +1,5 @@
+import os
+from tempfile import TemporaryDirectory
 from typing import Any
 from unittest.mock import Mock, call, patch
 
@@ -7,6 +9,7 @@ from pii_recognition.registration.registry import Registry
 from .pakkr_pipeline import (
     evaluate,
     get_detokeniser,
+    get_prediction_cache,
     get_recogniser,
     get_tokeniser,
     load_test_data,
@@ -54,6 +57,27 @@ def test_get_recogniser():
     assert isinstance(actual, RegistryWithConfig)
     assert actual.param_a == "value_a"
 
+    # recognisers are reused across runs only if asked
+    assert get_recogniser(setup_with_config)["recogniser"] is not actual
+    reused = get_recogniser(setup_with_config, reuse_recogniser=True)["recogniser"]
+    assert get_recogniser(setup_with_config, True)["recogniser"] is reused
+
+
+def test_get_prediction_cache():
+    setup = {"name": "RegistryWithConfig", "config": {"param_a": "value_a"}}
+    recogniser = Mock(prediction_version="1.0")
+    assert get_prediction_cache(setup, recogniser)["prediction_cache"] is None
+
+    with TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, "predictions.sqlite")
+        actual = get_prediction_cache(setup, recogniser, path, 10)["prediction_cache"]
+        assert actual.path == path
+        assert actual.recogniser_name == "RegistryWithConfig"
+        assert actual.recogniser_params == {"param_a": "value_a"}
+        assert actual.version == "1.0"
+        assert actual.max_entries == 10
+        actual.close()
+
 
 @patch(
     "pii_recognition.evaluation.pakkr_pipeline.tokeniser_registry", new=mock_registry()
@@ -101,6 +125,7 @@ def test_evaluate(mock_log):
     data = Data(X_test, y_test, ["I-PER"], True)
 
     evaluator = Mock()
+    evaluator.prediction_cache = None
     evaluator.evaluate_all.return_value = "fake_counter", "fake_mistakes"
     evaluator.calculate_score.return_value = (
         {"I-PER": 0.5},
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import sqlite3
+from typing import Dict, List, Optional, Sequence
+
+from pii_recognition import __version__
+from pii_recognition.labels.schema import Entity
+
+
+class PredictionCache:
+    """
+    A persistent cache of recogniser predictions stored in a SQLite file.
+
+    Predictions are keyed by content: a hash of the recogniser name, its params, the
+    version of its predictions, the asked entities and the text. Changing any of them
+    misses the cache, so stale predictions are never returned. When the cache holds
+    more than max_entries predictions, the least recently used ones are evicted.
+
+    Attributes:
+        path: path to the SQLite file, created when it does not exist.
+        recogniser_name: name of the recogniser in the recogniser registry.
+        recogniser_params: params the recogniser is constructed with.
+        version: version of the predictions, see prediction_version of
+            EntityRecogniser, it changes with the code and model of the recogniser.
+        max_entries: maximum number of predictions kept in the cache.
+        hits: number of texts found in the cache.
+        misses: number of texts not found in the cache.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        recogniser_name: str,
+        recogniser_params: Optional[Dict] = None,
+        version: str = __version__,
+        max_entries: int = 100000,
+    ):
+        if max_entries < 1:
+            raise ValueError(
+                f"max_entries must be a positive integer but got {max_entries}"
+            )
+
+        self.path = path
+        self.recogniser_name = recogniser_name
+        self.recogniser_params = recogniser_params
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._recogniser_key = json.dumps(
+            [recogniser_name, recogniser_params, version], sort_keys=True, default=str
+        )
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, prediction TEXT, last_used INTEGER)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS predictions_last_used "
+                "ON predictions (last_used)"
+            )
+        (last_used,) = self._connection.execute(
+            "SELECT MAX(last_used) FROM predictions"
+        ).fetchone()
+        self._clock = last_used or 0
+
+    def _key(self, text: str, entities: List[str]) -> str:
+        content = json.dumps([self._recogniser_key, sorted(entities), text])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_many(
+        self, texts: Sequence[str], entities: List[str]
+    ) -> Dict[int, Optional[List[Entity]]]:
+        """Look up predictions for texts.
+
+        Returns:
+            A dict from the index of a text found in the cache to its prediction.
+            Texts missing the cache are left out.
+        """
+        found: Dict[int, Optional[List[Entity]]] = dict()
+        with self._connection:
+            for index, text in enumerate(texts):
+                key = self._key(text, entities)
+                row = self._connection.execute(
+                    "SELECT prediction FROM predictions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    continue
+
+                self.hits += 1
+                self._connection.execute(
+                    "UPDATE predictions SET last_used = ? WHERE key = ?",
+                    (self._tick(), key),
+                )
+                prediction = json.loads(row[0])
+                found[index] = (
+                    None
+                    if prediction is None
+                    else [Entity(*span) for span in prediction]
+                )
+        return found
+
+    def put_many(
+        self,
+        texts: Sequence[str],
+        entities: List[str],
+        predictions: Sequence[Optional[List[Entity]]],
+    ):
+        """Store predictions for texts and evict the least recently used ones."""
+        assert len(texts) == len(predictions)
+
+        with self._connection:
+            for text, prediction in zip(texts, predictions):
+                serialised = json.dumps(
+                    None
+                    if prediction is None
+                    else [[ent.entity_type, ent.start, ent.end] for ent in prediction]
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)",
+                    (self._key(text, entities), serialised, self._tick()),
+                )
+            self._connection.execute(
+                "DELETE FROM predictions WHERE key IN (SELECT key FROM predictions "
+                "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        (count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM predictions"
+        ).fetchone()
+        return count
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"Prediction cache {self.path}: {self.hits} hits, {self.misses} misses "
+            f"(hit rate {hit_rate:.1%}), {len(self)} entries."
+        )
+
+    def close(self):
+        self._connection.close()
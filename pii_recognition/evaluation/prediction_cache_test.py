@@ -0,0 +1,58 @@
+import os
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from pii_recognition.labels.schema import Entity
+
+from .prediction_cache import PredictionCache
+
+
+def test_prediction_cache_get_and_put():
+    with TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, "predictions.sqlite")
+        cache = PredictionCache(path, "SpacyRecogniser", {"model_name": "en"})
+
+        assert cache.get_many(["Bob", "Tim"], ["PER"]) == {}
+        cache.put_many(["Bob", "Tim"], ["PER"], [[Entity("PER", 0, 3)], None])
+        assert cache.get_many(["Ann", "Tim", "Bob"], ["PER"]) == {
+            1: None,
+            2: [Entity("PER", 0, 3)],
+        }
+        assert (cache.hits, cache.misses) == (2, 3)
+        cache.close()
+
+        # persisted across runs, but keyed on recogniser config and entities
+        cache = PredictionCache(path, "SpacyRecogniser", {"model_name": "en"})
+        assert cache.get_many(["Bob"], ["PER"]) == {0: [Entity("PER", 0, 3)]}
+        assert cache.get_many(["Bob"], ["PER", "LOC"]) == {}
+        cache.close()
+
+        for other in [
+            PredictionCache(path, "FlairRecogniser", {"model_name": "en"}),
+            PredictionCache(path, "SpacyRecogniser", {"model_name": "de"}),
+            PredictionCache(path, "SpacyRecogniser", {"model_name": "en"}, "0.0.1"),
+        ]:
+            assert other.get_many(["Bob"], ["PER"]) == {}
+            other.close()
+
+
+def test_prediction_cache_for_lru_eviction():
+    with TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, "predictions.sqlite")
+        cache = PredictionCache(path, "SpacyRecogniser", max_entries=2)
+
+        cache.put_many(["a", "b"], ["PER"], [[], []])
+        # "a" becomes more recently used than "b"
+        assert cache.get_many(["a"], ["PER"]) == {0: []}
+        cache.put_many(["c"], ["PER"], [[]])
+        assert len(cache) == 2
+        assert cache.get_many(["a", "b", "c"], ["PER"]) == {0: [], 2: []}
+        assert cache.report() == (
+            f"Prediction cache {path}: 3 hits, 1 misses (hit rate 75.0%), 2 entries."
+        )
+        cache.close()
+
+    with pytest.raises(ValueError) as err:
+        PredictionCache(path, "SpacyRecogniser", max_entries=0)
+    assert str(err.value) == "max_entries must be a positive integer but got 0"
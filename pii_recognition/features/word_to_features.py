@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 
 
 def word2features(tokenised_sentence: List[str], i: int) -> List[str]:
@@ -38,3 +38,80 @@ def word2features(tokenised_sentence: List[str], i: int) -> List[str]:
     else:
         features.append("EOS")
     return features
+
+
+_BOS = ["BOS"]
+_EOS = ["EOS"]
+
+
+class _WordAttributes:
+    """Features of a word as the token itself and as a neighbour."""
+
+    __slots__ = ("features", "previous_features", "next_features")
+
+    def __init__(self, word: str):
+        lower = word.lower()
+        isupper = str(word.isupper())
+        istitle = str(word.istitle())
+
+        self.features = [
+            "bias",
+            "word.lower=" + lower,
+            "word[-3:]=" + word[-3:],
+            "word[-2:]=" + word[-2:],
+            "word.isupper=" + isupper,
+            "word.istitle=" + istitle,
+            "word.isdigit=" + str(word.isdigit()),
+        ]
+        self.previous_features = [
+            "-1:word.lower=" + lower,
+            "-1:word.istitle=" + istitle,
+            "-1:word.isupper=" + isupper,
+        ]
+        self.next_features = [
+            "+1:word.lower=" + lower,
+            "+1:word.istitle=" + istitle,
+            "+1:word.isupper=" + isupper,
+        ]
+
+
+class SentenceFeatureExtractor:
+    """
+    Build features of all tokens in a sentence, the same as calling word2features
+    for every token.
+
+    Attributes of a word, e.g. its lower case and shape, are computed once and
+    shared by the token itself and its neighbours. Attributes of up to memo_size
+    words are also kept across sentences, words seen first are kept as frequent
+    words tend to come up early.
+
+    Attributes:
+        memo_size: maximum number of words whose attributes are kept, no memo if 0.
+    """
+
+    def __init__(self, memo_size: int = 0):
+        if memo_size < 0:
+            raise ValueError(f"memo_size must not be negative but got {memo_size}")
+
+        self.memo_size = memo_size
+        self._memo: Dict[str, _WordAttributes] = dict()
+
+    def _attributes(self, word: str) -> _WordAttributes:
+        attributes = self._memo.get(word)
+        if attributes is None:
+            attributes = _WordAttributes(word)
+            if len(self._memo) < self.memo_size:
+                self._memo[word] = attributes
+        return attributes
+
+    def __call__(self, tokenised_sentence: List[str]) -> List[List[str]]:
+        attributes = [self._attributes(word) for word in tokenised_sentence]
+        last = len(attributes) - 1
+        return [
+            [
+                *word.features,
+                *(attributes[i - 1].previous_features if i > 0 else _BOS),
+                *(attributes[i + 1].next_features if i < last else _EOS),
+            ]
+            for i, word in enumerate(attributes)
+        ]
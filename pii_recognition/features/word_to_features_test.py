@@ -0,0 +1,36 @@
+import pytest
+
+from .word_to_features import SentenceFeatureExtractor, word2features
+
+SENTENCES = [
+    [],
+    ["Bob"],
+    ["This", "is", "Bob", "Smith", "from", "MELBOURNE", "."],
+    ["In", "2020", ",", "ÄPFEL", "cost", "3.5", "€", "ǅemal", "x", "ab"],
+    ["the", "the", "The", "THE", "the"],
+]
+
+
+@pytest.mark.parametrize("memo_size", [0, 3, 1000])
+def test_sentence_feature_extractor_agrees_with_word2features(memo_size):
+    extractor = SentenceFeatureExtractor(memo_size=memo_size)
+
+    # twice so that memoised words are used
+    for sentence in SENTENCES + SENTENCES:
+        expected = [word2features(sentence, i) for i in range(len(sentence))]
+        assert extractor(sentence) == expected
+    assert len(extractor._memo) <= memo_size
+
+
+def test_sentence_feature_extractor_does_not_share_feature_lists():
+    extractor = SentenceFeatureExtractor(memo_size=10)
+
+    features = extractor(["Bob", "Bob"])
+    features[0].append("mutated")
+    assert extractor(["Bob", "Bob"]) == [
+        word2features(["Bob", "Bob"], i) for i in range(2)
+    ]
+
+    with pytest.raises(ValueError) as err:
+        SentenceFeatureExtractor(memo_size=-1)
+    assert str(err.value) == "memo_size must not be negative but got -1"
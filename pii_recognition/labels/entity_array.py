@@ -0,0 +1,151 @@
+from typing import Container, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .schema import Entity
+
+
+class EntityArray:
+    """
+    A columnar container of entities.
+
+    Entity types are stored as integer ids into entity_types, and starts and ends
+    as NumPy integer arrays, so a large number of entities takes three arrays rather
+    than an object each.
+
+    Attributes:
+        type_ids: index of the entity type of every entity in entity_types.
+        starts: start of every entity.
+        ends: end of every entity.
+        entity_types: entity types referred to by type_ids.
+    """
+
+    def __init__(
+        self,
+        type_ids: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        entity_types: List[str],
+    ):
+        assert len(type_ids) == len(starts) == len(ends)
+        self.type_ids = np.asarray(type_ids, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.entity_types = entity_types
+
+    @classmethod
+    def from_entities(
+        cls, entities: Sequence[Entity], entity_types: Optional[List[str]] = None
+    ) -> "EntityArray":
+        """Build from entities, entity_types are those of entities in order of
+        appearance unless given."""
+        if entity_types is None:
+            entity_types = list(
+                dict.fromkeys(entity.entity_type for entity in entities)
+            )
+        type_index = {entity_type: i for i, entity_type in enumerate(entity_types)}
+
+        return cls(
+            np.fromiter(
+                (type_index[entity.entity_type] for entity in entities),
+                np.int64,
+                len(entities),
+            ),
+            np.fromiter((entity.start for entity in entities), np.int64, len(entities)),
+            np.fromiter((entity.end for entity in entities), np.int64, len(entities)),
+            entity_types,
+        )
+
+    @classmethod
+    def from_tags(
+        cls,
+        tags: Sequence[str],
+        starts: Sequence[int],
+        ends: Sequence[int],
+        entities: Optional[Container[str]] = None,
+    ) -> "EntityArray":
+        """Same as labels.span.tags_to_span_labels, runs of consecutive tokens with
+        the same tag are merged into entities with NumPy."""
+        assert len(tags) == len(starts) == len(ends)
+        if not tags:
+            return cls.from_entities([])
+
+        token_types = list(dict.fromkeys(tags))
+        type_index = {entity_type: i for i, entity_type in enumerate(token_types)}
+        token_type_ids = np.fromiter(
+            (type_index[tag] for tag in tags), np.int64, len(tags)
+        )
+        token_starts = np.asarray(starts, dtype=np.int64)
+        token_ends = np.asarray(ends, dtype=np.int64)
+        assert np.all(
+            token_starts[1:] > token_starts[:-1]
+        ), "token_labels are not in ascending order"
+
+        # a run starts at the first token and wherever the tag changes
+        run_starts = np.flatnonzero(
+            np.concatenate(([True], token_type_ids[1:] != token_type_ids[:-1]))
+        )
+        run_ends = np.append(run_starts[1:], len(tags)) - 1
+        array = cls(
+            token_type_ids[run_starts],
+            token_starts[run_starts],
+            token_ends[run_ends],
+            token_types,
+        )
+        return array if entities is None else array.select(entities)
+
+    def __len__(self) -> int:
+        return len(self.type_ids)
+
+    def __getitem__(self, index: int) -> Entity:
+        return Entity(
+            self.entity_types[self.type_ids[index]],
+            int(self.starts[index]),
+            int(self.ends[index]),
+        )
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self.to_entities())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EntityArray):
+            return NotImplemented
+        return self.to_entities() == other.to_entities()
+
+    def __repr__(self) -> str:
+        return f"EntityArray({self.to_entities()})"
+
+    def to_entities(self) -> List[Entity]:
+        return [
+            Entity(self.entity_types[type_id], start, end)
+            for type_id, start, end in zip(
+                self.type_ids.tolist(), self.starts.tolist(), self.ends.tolist()
+            )
+        ]
+
+    def select(self, entity_types: Container[str]) -> "EntityArray":
+        """Keep entities of the given types only."""
+        kept_ids = [
+            i
+            for i, entity_type in enumerate(self.entity_types)
+            if entity_type in entity_types
+        ]
+        mask = np.isin(self.type_ids, kept_ids)
+        return EntityArray(
+            self.type_ids[mask], self.starts[mask], self.ends[mask], self.entity_types
+        )
+
+    def shift(self, offset: int) -> "EntityArray":
+        """Move entities by offset characters, e.g. from a piece to its text."""
+        return EntityArray(
+            self.type_ids, self.starts + offset, self.ends + offset, self.entity_types
+        )
+
+
+EntitiesLike = Union[Sequence[Entity], EntityArray]
+
+
+def as_entity_array(entities: EntitiesLike) -> EntityArray:
+    if isinstance(entities, EntityArray):
+        return entities
+    return EntityArray.from_entities(entities)
@@ -0,0 +1,82 @@
+import pickle
+import random
+
+import pytest
+
+from .entity_array import EntityArray, as_entity_array
+from .schema import Entity, TokenLabel
+from .span import tags_to_span_labels
+
+
+def test_entity_array_round_trip():
+    entities = [Entity("PER", 8, 17), Entity("LOC", 23, 32), Entity("PER", 40, 45)]
+
+    actual = EntityArray.from_entities(entities)
+    assert actual.entity_types == ["PER", "LOC"]
+    assert actual.type_ids.tolist() == [0, 1, 0]
+    assert actual.starts.tolist() == [8, 23, 40]
+    assert actual.ends.tolist() == [17, 32, 45]
+    assert len(actual) == 3
+    assert actual[1] == Entity("LOC", 23, 32)
+    assert list(actual) == entities
+    assert actual.to_entities() == entities
+    assert actual == EntityArray.from_entities(entities, ["LOC", "PER"])
+    assert as_entity_array(actual) is actual
+    assert as_entity_array(entities) == actual
+
+    assert EntityArray.from_entities([]).to_entities() == []
+    with pytest.raises(KeyError):
+        EntityArray.from_entities(entities, ["PER"])
+
+
+def test_entity_array_select_and_shift():
+    array = EntityArray.from_entities(
+        [Entity("PER", 8, 17), Entity("LOC", 23, 32), Entity("PER", 40, 45)]
+    )
+
+    assert array.select({"PER"}).to_entities() == [
+        Entity("PER", 8, 17),
+        Entity("PER", 40, 45),
+    ]
+    assert array.select(set()).to_entities() == []
+    assert array.shift(100).to_entities() == [
+        Entity("PER", 108, 117),
+        Entity("LOC", 123, 132),
+        Entity("PER", 140, 145),
+    ]
+
+
+def test_entity_array_from_tags():
+    # reference sentence: "This is Bob Smith from Melbourne."
+    tags = ["O", "O", "PER", "PER", "O", "LOC", "O"]
+    starts = [0, 5, 8, 12, 18, 23, 32]
+    ends = [4, 7, 11, 17, 22, 32, 33]
+
+    actual = EntityArray.from_tags(tags, starts, ends, {"PER", "LOC"})
+    assert actual.to_entities() == [Entity("PER", 8, 17), Entity("LOC", 23, 32)]
+    assert EntityArray.from_tags([], [], []).to_entities() == []
+
+    with pytest.raises(AssertionError) as err:
+        EntityArray.from_tags(["O", "O"], [5, 0], [7, 4])
+    assert str(err.value) == "token_labels are not in ascending order"
+
+
+def test_entity_array_from_tags_agrees_with_tags_to_span_labels():
+    rng = random.Random(7)
+    for _ in range(200):
+        n = rng.randint(0, 30)
+        tags = [rng.choice(["O", "PER", "LOC"]) for _ in range(n)]
+        starts = sorted(rng.sample(range(200), n))
+        ends = [start + rng.randint(1, 5) for start in starts]
+        for entities in [None, {"PER", "LOC"}]:
+            assert EntityArray.from_tags(
+                tags, starts, ends, entities
+            ).to_entities() == tags_to_span_labels(tags, starts, ends, entities)
+
+
+def test_slotted_labels():
+    for label in [Entity("PER", 8, 17), TokenLabel("PER", 8, 17)]:
+        assert not hasattr(label, "__dict__")
+        with pytest.raises(AttributeError):
+            label.score = 1.0  # type: ignore
+        assert pickle.loads(pickle.dumps(label)) == label
@@ -4,8 +4,11 @@ from dataclasses import dataclass
 from typing import NamedTuple
 
 
+# slots save the per-instance __dict__, millions of labels are created in evaluation
 @dataclass
 class Entity:
+    __slots__ = ("entity_type", "start", "end")
+
     entity_type: str
     start: int
     end: int
@@ -13,6 +16,8 @@ class Entity:
 
 @dataclass
 class TokenLabel:
+    __slots__ = ("entity_type", "start", "end")
+
     entity_type: str
     start: int
     end: int
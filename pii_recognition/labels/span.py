@@ -1,8 +1,8 @@
-from dataclasses import asdict
-from typing import Dict, List, Tuple
+import heapq
+from itertools import islice
+from typing import Container, List, Optional, Sequence, Tuple
 
 from pii_recognition.tokenisation.token_schema import Token
-from pii_recognition.utils import is_ascending
 
 from .schema import Entity, TokenLabel
 
@@ -23,12 +23,66 @@ def is_substring(
         return False
 
 
+def _is_sorted_and_disjoint(tokens: List[Token]) -> bool:
+    return all(token.start <= token.end for token in tokens) and all(
+        tokens[i].end <= tokens[i + 1].start for i in range(len(tokens) - 1)
+    )
+
+
+def _match_token_labels_naively(
+    span_labels: List[Entity], tokens: List[Token]
+) -> List[str]:
+    """Check every token against every span, O(tokens x spans)."""
+    labels = ["O"] * len(tokens)  # default is O, no chunck label
+
+    for i in range(len(tokens)):
+        current_token = tokens[i]
+        for label in span_labels:
+            if is_substring(
+                (current_token.start, current_token.end), (label.start, label.end)
+            ):
+                labels[i] = label.entity_type
+                break
+    return labels
+
+
+def _match_token_labels_by_sweep(
+    span_labels: List[Entity], tokens: List[Token]
+) -> List[str]:
+    """Sweep spans sorted by start along tokens, O((tokens + spans) log spans).
+
+    Tokens must be sorted and disjoint, so that token ends never decrease and a span
+    ending before a token cannot contain any following token.
+    """
+    span_order = sorted(range(len(span_labels)), key=lambda i: span_labels[i].start)
+    # indices of spans started so far, the first span in span_labels on top
+    active_spans: List[int] = []
+    next_span = 0
+
+    labels = ["O"] * len(tokens)  # default is O, no chunck label
+    for i, token in enumerate(tokens):
+        while (
+            next_span < len(span_order)
+            and span_labels[span_order[next_span]].start <= token.start
+        ):
+            heapq.heappush(active_spans, span_order[next_span])
+            next_span += 1
+        while active_spans and span_labels[active_spans[0]].end < token.end:
+            heapq.heappop(active_spans)
+
+        if active_spans:
+            labels[i] = span_labels[active_spans[0]].entity_type
+    return labels
+
+
 def span_labels_to_token_labels(
     span_labels: List[Entity], tokens: List[Token], keep_o_label: bool = True
 ) -> List[TokenLabel]:
     """
     A conversion that breaks entity labeled by spans to tokens.
 
+    A token takes the label of the first span in span_labels containing it.
+
     Args:
         tokens: Text into tokens.
         recognised_entities: Model predicted entities.
@@ -36,16 +90,10 @@ def span_labels_to_token_labels(
     Returns:
         Token based entity labels, e.g., ["O", "O", "LOC", "O"].
     """
-    labels = ["O"] * len(tokens)  # default is O, no chunck label
-
-    for i in range(len(tokens)):
-        current_token = tokens[i]
-        for label in span_labels:
-            if is_substring(
-                (current_token.start, current_token.end), (label.start, label.end)
-            ):
-                labels[i] = label.entity_type
-                break
+    if _is_sorted_and_disjoint(tokens):
+        labels = _match_token_labels_by_sweep(span_labels, tokens)
+    else:
+        labels = _match_token_labels_naively(span_labels, tokens)
 
     if keep_o_label:
         return [
@@ -61,22 +109,62 @@ def span_labels_to_token_labels(
 
 
 def token_labels_to_span_labels(token_labels: List[TokenLabel]) -> List[Entity]:
-    # order matters
-    assert is_ascending(
-        [label.start for label in token_labels]
-    ), "token_labels are not in ascending order"
-
-    span_labels = []
-    prior_span: Dict = asdict(token_labels[0])
-
-    for i in range(1, len(token_labels)):
-        current_token_label = token_labels[i]
-        if current_token_label.entity_type == prior_span["entity_type"]:
-            prior_span["end"] = current_token_label.end
+    """Merge consecutive token labels of the same entity type into spans."""
+    span_labels: List[Entity] = []
+    if not token_labels:
+        return span_labels
+
+    entity_type = token_labels[0].entity_type
+    start = prior_start = token_labels[0].start
+    end = token_labels[0].end
+    for label in islice(token_labels, 1, None):
+        # order matters
+        assert prior_start < label.start, "token_labels are not in ascending order"
+        prior_start = label.start
+
+        if label.entity_type == entity_type:
+            end = label.end
         else:
-            span_labels.append(Entity(**prior_span))
-            prior_span = asdict(current_token_label)
+            span_labels.append(Entity(entity_type, start, end))
+            entity_type, start, end = label.entity_type, label.start, label.end
+
+    span_labels.append(Entity(entity_type, start, end))
+    return span_labels
+
+
+def tags_to_span_labels(
+    tags: Sequence[str],
+    starts: Sequence[int],
+    ends: Sequence[int],
+    entities: Optional[Container[str]] = None,
+) -> List[Entity]:
+    """
+    Same as token_labels_to_span_labels but taking parallel sequences of token tags
+    and offsets, so no TokenLabel has to be created.
+
+    Args:
+        tags: entity type of every token.
+        starts: start of every token, in ascending order.
+        ends: end of every token.
+        entities: only spans of these entity types are kept if given.
 
-    span_labels.append(Entity(**prior_span))
+    Returns:
+        Spans of consecutive tokens with the same tag.
+    """
+    assert len(tags) == len(starts) == len(ends)
+
+    span_labels: List[Entity] = []
+    run_start = 0
+    for i in range(1, len(tags) + 1):
+        if i < len(tags):
+            # order matters
+            assert starts[i - 1] < starts[i], "token_labels are not in ascending order"
+            if tags[i] == tags[run_start]:
+                continue
+
+        tag = tags[run_start]
+        if entities is None or tag in entities:
+            span_labels.append(Entity(tag, starts[run_start], ends[i - 1]))
+        run_start = i
 
     return span_labels
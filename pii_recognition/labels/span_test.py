@@ -3,7 +3,12 @@ import pytest
 from pii_recognition.tokenisation.token_schema import Token
 
 from .schema import Entity, TokenLabel
-from .span import is_substring, span_labels_to_token_labels, token_labels_to_span_labels
+from .span import (
+    is_substring,
+    span_labels_to_token_labels,
+    tags_to_span_labels,
+    token_labels_to_span_labels,
+)
 
 
 def test_is_substring():
@@ -39,6 +44,35 @@ def test_span_labels_to_token_labels():
     assert [x.entity_type for x in actual] == ["PER", "PER", "LOC"]
 
 
+def test_span_labels_to_token_labels_for_overlapping_spans():
+    # reference sentence: "This is Bob Smith from Melbourne."
+    tokens = [
+        Token("This", 0, 4),
+        Token("is", 5, 7),
+        Token("Bob", 8, 11),
+        Token("Smith", 12, 17),
+        Token("from", 18, 22),
+        Token("Melbourne", 23, 32),
+        Token(".", 32, 33),
+    ]
+    # the first span containing a token wins regardless of span order
+    span_labels = [
+        Entity("LOC", 12, 33),
+        Entity("PER", 8, 17),
+        Entity("MISC", 0, 33),
+    ]
+    expected = ["MISC", "MISC", "PER", "LOC", "LOC", "LOC", "LOC"]
+    actual = span_labels_to_token_labels(span_labels, tokens)
+    assert [x.entity_type for x in actual] == expected
+
+    # unsorted tokens are supported too
+    actual = span_labels_to_token_labels(span_labels, tokens[::-1])
+    assert [x.entity_type for x in actual] == expected[::-1]
+    assert [(x.start, x.end) for x in actual] == [
+        (token.start, token.end) for token in tokens[::-1]
+    ]
+
+
 def test_token_labels_to_span_labels():
     #
     token_labels = [TokenLabel("PER", 0, 4)]
@@ -90,8 +124,37 @@ def test_token_labels_to_span_labels():
         Entity("O", 43, 60),
     ]
 
+    assert token_labels_to_span_labels([]) == []
+
     # test failure
     token_labels = [TokenLabel("O", 4, 7), TokenLabel("O", 0, 3), TokenLabel("O", 7, 8)]
     with pytest.raises(AssertionError) as err:
         token_labels_to_span_labels(token_labels)
     assert str(err.value) == "token_labels are not in ascending order"
+
+
+def test_tags_to_span_labels():
+    # text: one day, Luke Skywalker and Wedge Antilles recover a message
+    tags = ["O", "O", "O", "PER", "PER", "O", "PER", "PER", "O", "O", "O"]
+    starts = [0, 4, 7, 9, 14, 24, 28, 34, 43, 51, 53]
+    ends = [3, 7, 8, 13, 23, 27, 33, 42, 50, 52, 60]
+
+    actual = tags_to_span_labels(tags, starts, ends)
+    assert actual == [
+        Entity("O", 0, 8),
+        Entity("PER", 9, 23),
+        Entity("O", 24, 27),
+        Entity("PER", 28, 42),
+        Entity("O", 43, 60),
+    ]
+    assert actual == token_labels_to_span_labels(
+        [TokenLabel(*label) for label in zip(tags, starts, ends)]
+    )
+
+    actual = tags_to_span_labels(tags, starts, ends, entities=["PER"])
+    assert actual == [Entity("PER", 9, 23), Entity("PER", 28, 42)]
+    assert tags_to_span_labels([], [], []) == []
+
+    with pytest.raises(AssertionError) as err:
+        tags_to_span_labels(["O", "O"], [4, 0], [7, 3])
+    assert str(err.value) == "token_labels are not in ascending order"
@@ -1,22 +1,49 @@
-from typing import Dict, FrozenSet, List, Mapping, Optional, Set, Union
+import json
+import logging
+from collections import deque
+from multiprocessing import Pool
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from pakkr import Pipeline, returns
-from pii_recognition.data_readers.data import Data
+from pii_recognition.data_readers.data import Data, DataItem, DataStream
 from pii_recognition.data_readers.presidio_fake_pii_reader import PresidioFakePiiReader
 from pii_recognition.evaluation.character_level_evaluation import (
     EntityPrecision,
     EntityRecall,
     TextScore,
     build_label_mapping,
-    compute_entity_precisions_for_prediction,
-    compute_entity_recalls_for_ground_truth,
     compute_pii_detection_fscore,
+    get_evaluation_engine,
 )
+from pii_recognition.evaluation.metrics import compute_f_beta
+from pii_recognition.evaluation.prediction_cache import PredictionCache
+from pii_recognition.labels.schema import Entity
 from pii_recognition.recognisers import registry as recogniser_registry
 from pii_recognition.recognisers.entity_recogniser import EntityRecogniser
-from pii_recognition.utils import dump_to_json_file, load_yaml_file, stringify_keys
+from pii_recognition.utils import (
+    batch_indices_by_length,
+    batched,
+    dump_to_json_file,
+    load_yaml_file,
+    stringify_keys,
+)
 from tqdm import tqdm
 
+logger = logging.getLogger(__name__)
+
 
 @returns(Data)
 def read_benchmark_data(benchmark_data_file: str) -> Data:
@@ -28,29 +55,279 @@ def read_benchmark_data(benchmark_data_file: str) -> Data:
     return data
 
 
+# recogniser owned by a worker process, see _init_recogniser_worker
+_worker_recogniser: Optional[EntityRecogniser] = None
+
+
+def _init_recogniser_worker(recogniser_name: str, recogniser_params: Dict):
+    """Construct the recogniser once per worker process."""
+    global _worker_recogniser
+    _worker_recogniser = recogniser_registry.create_instance(
+        recogniser_name, recogniser_params
+    )
+
+
+def _analyse_batch_in_worker(texts: List[str]) -> List[Optional[List[Entity]]]:
+    assert _worker_recogniser is not None, "Worker recogniser is not initialised."
+    return _worker_recogniser.analyse_batch(
+        texts, _worker_recogniser.supported_entities, batch_size=len(texts)
+    )
+
+
+def _create_recogniser(
+    recogniser_name: str, recogniser_params: Dict, reuse_recogniser: bool
+) -> EntityRecogniser:
+    """Construct the recogniser of a run. Models are loaded on first use, so with
+    worker processes it only tells the entities to ask for."""
+    return recogniser_registry.create_instance(
+        recogniser_name, recogniser_params, cached=reuse_recogniser
+    )
+
+
+def _predict_in_batches(
+    text_batches: Iterable[List[str]],
+    recogniser: EntityRecogniser,
+    recogniser_name: str,
+    recogniser_params: Dict,
+    batch_size: int,
+    num_workers: int,
+) -> Iterator[List[Optional[List[Entity]]]]:
+    """Yield predictions batch by batch in the order batches are given.
+
+    Batches are predicted by the given recogniser, or by worker processes each of
+    which constructs its own recogniser from its name and params.
+    """
+    if num_workers > 1:
+        with Pool(
+            num_workers,
+            initializer=_init_recogniser_worker,
+            initargs=(recogniser_name, recogniser_params),
+        ) as pool:
+            # imap keeps the order of batches and yields as soon as the next
+            # batch in order is done, which streams progress back to the parent;
+            # it reads all given batches ahead so feed a window at a time
+            for window in batched(text_batches, 4 * num_workers):
+                yield from pool.imap(_analyse_batch_in_worker, window)
+    else:
+        for texts in text_batches:
+            yield recogniser.analyse_batch(
+                texts, recogniser.supported_entities, batch_size=batch_size
+            )
+
+
+def _open_prediction_cache(
+    prediction_cache_path: Optional[str],
+    recogniser_name: str,
+    recogniser_params: Dict,
+    prediction_cache_size: int,
+    recogniser: EntityRecogniser,
+) -> Optional[PredictionCache]:
+    if not prediction_cache_path:
+        return None
+    return PredictionCache(
+        prediction_cache_path,
+        recogniser_name,
+        recogniser_params,
+        version=recogniser.prediction_version,
+        max_entries=prediction_cache_size,
+    )
+
+
+def _close_prediction_cache(cache: Optional[PredictionCache]):
+    if cache is not None:
+        logger.info(cache.report())
+        cache.close()
+
+
+def _identify_batches(
+    batches: Iterable[List[DataItem]],
+    recogniser: EntityRecogniser,
+    recogniser_name: str,
+    recogniser_params: Dict,
+    batch_size: int,
+    num_workers: int,
+    cache: Optional[PredictionCache],
+) -> Iterator[List[DataItem]]:
+    """Set predictions of items and yield them batch by batch in the given order.
+
+    Batches are consumed lazily. Only texts missing the cache, if any, are sent to
+    the recogniser.
+    """
+    # recognisers are asked for all their supported entities
+    entities = recogniser.supported_entities
+    # batches read but not yielded yet, paired with their items to be predicted
+    pending: Deque[Tuple[List[DataItem], List[DataItem]]] = deque()
+
+    def texts_to_predict() -> Iterator[List[str]]:
+        for batch in batches:
+            missed = batch
+            if cache is not None:
+                cached = cache.get_many([item.text for item in batch], entities)
+                for index, pred_labels in cached.items():
+                    batch[index].pred_labels = pred_labels
+                missed = [item for i, item in enumerate(batch) if i not in cached]
+
+            pending.append((batch, missed))
+            if missed:
+                yield [item.text for item in missed]
+
+    predictions = _predict_in_batches(
+        texts_to_predict(),
+        recogniser,
+        recogniser_name,
+        recogniser_params,
+        batch_size,
+        num_workers,
+    )
+    for batch_predictions in predictions:
+        # batches served by the cache entirely come before the predicted one
+        while not pending[0][1]:
+            yield pending.popleft()[0]
+
+        batch, missed = pending.popleft()
+        for item, pred_labels in zip(missed, batch_predictions):
+            item.pred_labels = pred_labels
+        if cache is not None:
+            cache.put_many([item.text for item in missed], entities, batch_predictions)
+        yield batch
+
+    while pending:
+        yield pending.popleft()[0]
+
+
+def _identify_in_batches(
+    items: Iterable[DataItem],
+    recogniser: EntityRecogniser,
+    recogniser_name: str,
+    recogniser_params: Dict,
+    batch_size: int,
+    num_workers: int,
+    cache: Optional[PredictionCache],
+    bucket_window: int = 0,
+) -> Iterator[List[DataItem]]:
+    """Set predictions of items and yield them batch by batch in the given order.
+
+    When bucket_window is positive, items are read bucket_window at a time and
+    batched by the length of their texts within the window, so that recognisers
+    padding a batch to its longest text waste less compute. Items of a window are
+    yielded in the given order once all of them are predicted.
+    """
+    args = (
+        recogniser,
+        recogniser_name,
+        recogniser_params,
+        batch_size,
+        num_workers,
+        cache,
+    )
+    if bucket_window < 1:
+        yield from _identify_batches(batched(items, batch_size), *args)
+        return
+
+    # windows read but not yielded yet, the first one is being predicted
+    windows: Deque[List[DataItem]] = deque()
+
+    def length_bucketed_batches() -> Iterator[List[DataItem]]:
+        for window in batched(items, bucket_window):
+            windows.append(window)
+            lengths = [len(item.text) for item in window]
+            for indices in batch_indices_by_length(lengths, batch_size):
+                yield [window[index] for index in indices]
+
+    predicted = 0
+    for batch in _identify_batches(length_bucketed_batches(), *args):
+        predicted += len(batch)
+        while windows and predicted >= len(windows[0]):
+            window = windows.popleft()
+            predicted -= len(window)
+            yield from batched(window, batch_size)
+
+
 @returns(Data)
 def identify_pii_entities(
-    data: Data, recogniser_name: str, recogniser_params: Dict
+    data: Data,
+    recogniser_name: str,
+    recogniser_params: Dict,
+    batch_size: int = 32,
+    num_workers: int = 1,
+    prediction_cache_path: Optional[str] = None,
+    prediction_cache_size: int = 100000,
+    reuse_recogniser: bool = False,
+    bucket_by_length: bool = False,
 ) -> Data:
-    recogniser: EntityRecogniser = recogniser_registry.create_instance(
-        recogniser_name, recogniser_params
-    )
+    """Predict entities for every data item.
+
+    Items are analysed in batches of batch_size. When num_workers is greater than
+    one, batches are sharded across a pool of processes, each of which constructs
+    its own recogniser; it suits CPU bound recognisers.
 
-    for item in tqdm(data.items):
-        item.pred_labels = recogniser.analyse(item.text, recogniser.supported_entities)
+    When prediction_cache_path is given, predictions are looked up in and saved to a
+    PredictionCache there, and only texts missing the cache are sent to the
+    recogniser.
+
+    When reuse_recogniser is true, the recogniser is kept by the registry and reused
+    by later runs in this process with the same recogniser and params, so its model
+    is loaded once.
+
+    When bucket_by_length is true, texts are batched with others of similar
+    lengths, which saves padding of recognisers such as Flair and Stanza.
+    Predictions are the same, only the batches differ.
+    """
+    recogniser = _create_recogniser(
+        recogniser_name, recogniser_params, reuse_recogniser
+    )
+    cache = _open_prediction_cache(
+        prediction_cache_path,
+        recogniser_name,
+        recogniser_params,
+        prediction_cache_size,
+        recogniser,
+    )
+    args = (
+        recogniser,
+        recogniser_name,
+        recogniser_params,
+        batch_size,
+        num_workers,
+        cache,
+    )
+    batches: Iterator[List[DataItem]]
+    if bucket_by_length:
+        # items are predicted in place, so the whole data is bucketed and progress
+        # is counted as bucketed batches finish rather than in the given order
+        lengths = [len(item.text) for item in data.items]
+        batches = _identify_batches(
+            (
+                [data.items[index] for index in indices]
+                for indices in batch_indices_by_length(lengths, batch_size)
+            ),
+            *args,
+        )
+    else:
+        batches = _identify_in_batches(data.items, *args)
+
+    try:
+        with tqdm(total=len(data.items)) as progress_bar:
+            for batch in batches:
+                progress_bar.update(len(batch))
+    finally:
+        _close_prediction_cache(cache)
     return data
 
 
-@returns(scores=List)
-def calculate_precisions_and_recalls(
-    data: Data,
+def _build_scorer(
     grouped_targeted_labels: List[Set[str]],
-    nontargeted_labels: Optional[Set[str]] = None,
-) -> Dict[str, List[TextScore]]:
+    nontargeted_labels: Optional[Set[str]],
+    evaluation_engine: str,
+) -> Callable[[DataItem], TextScore]:
+    """Build a function scoring predictions of a data item."""
     label_mapping = build_label_mapping(grouped_targeted_labels, nontargeted_labels)
+    (
+        compute_entity_precisions_for_prediction,
+        compute_entity_recalls_for_ground_truth,
+    ) = get_evaluation_engine(evaluation_engine)
 
-    scores = []
-    for item in data.items:
+    def score(item: DataItem) -> TextScore:
         if item.pred_labels:
             pred_labels = item.pred_labels
         else:  # pred_labels could be None
@@ -62,41 +339,54 @@ def calculate_precisions_and_recalls(
         ent_recalls = compute_entity_recalls_for_ground_truth(
             len(item.text), item.true_labels, pred_labels, label_mapping
         )
-        ticket_score = TextScore(
-            text=item.text, precisions=ent_precisions, recalls=ent_recalls
-        )
-        scores.append(ticket_score)
+        return TextScore(text=item.text, precisions=ent_precisions, recalls=ent_recalls)
+
+    return score
+
+
+@returns(scores=List)
+def calculate_precisions_and_recalls(
+    data: Data,
+    grouped_targeted_labels: List[Set[str]],
+    nontargeted_labels: Optional[Set[str]] = None,
+    evaluation_engine: str = "sklearn",
+) -> Dict[str, List[TextScore]]:
+    score = _build_scorer(
+        grouped_targeted_labels, nontargeted_labels, evaluation_engine
+    )
+    scores = [score(item) for item in data.items]
 
     return {"scores": scores}
 
 
+def _format_predictions_and_ground_truths(score: TextScore) -> Dict[str, Dict]:
+    text = score.text
+    predictions = {
+        text[p.entity.start : p.entity.end]: {
+            "type": p.entity.entity_type,
+            "score": round(p.precision, 2),
+            "start": p.entity.start,
+        }
+        for p in score.precisions
+    }
+    ground_truths = {
+        text[r.entity.start : r.entity.end]: {
+            "type": r.entity.entity_type,
+            "score": round(r.recall, 2),
+            "start": r.entity.start,
+        }
+        for r in score.recalls
+    }
+    return {"predicted": predictions, "ground_truth": ground_truths}
+
+
 @returns()
 def log_predictions_and_ground_truths(
     predictions_dump_path: str, scores: List[TextScore]
 ):
     results = dict()
     for score in scores:
-        text = score.text
-        predictions = {
-            text[p.entity.start : p.entity.end]: {
-                "type": p.entity.entity_type,
-                "score": round(p.precision, 2),
-                "start": p.entity.start,
-            }
-            for p in score.precisions
-        }
-        ground_truths = {
-            text[r.entity.start : r.entity.end]: {
-                "type": r.entity.entity_type,
-                "score": round(r.recall, 2),
-                "start": r.entity.start,
-            }
-            for r in score.recalls
-        }
-
-        results.update(
-            {text: {"predicted": predictions, "ground_truth": ground_truths}}
-        )
+        results.update({score.text: _format_predictions_and_ground_truths(score)})
 
     dump_to_json_file(results, predictions_dump_path)
 
@@ -107,20 +397,131 @@ def calculate_aggregate_metrics(
     grouped_targeted_labels: List[Set[str]],
     fbeta: float = 1.0,
 ) -> Dict[Union[str, FrozenSet[str]], float]:
-    results: Dict[Union[str, FrozenSet[str]], float] = dict()
+    accumulator = MetricsAccumulator(grouped_targeted_labels, fbeta)
+    for score in scores:
+        accumulator.update(score)
 
-    results["exact_match_f1"] = get_rollup_fscore_on_pii(
-        scores, fbeta, recall_threshold=None)
-    results["partial_match_f1_threshold_at_50%"] = get_rollup_fscore_on_pii(
-        scores, fbeta, recall_threshold=0.5
-    )
+    return accumulator.results()
 
-    type_scores: Mapping = get_rollup_metrics_on_types(
-        grouped_targeted_labels, scores, fbeta
-    )
-    results.update(type_scores)
 
-    return results
+def _build_label_index(
+    label_sets: Iterable[FrozenSet[str]],
+) -> Dict[str, List[FrozenSet[str]]]:
+    """Map every entity label to the label sets containing it."""
+    label_index: Dict[str, List[FrozenSet[str]]] = dict()
+    for label_set in label_sets:
+        for label in label_set:
+            label_index.setdefault(label, []).append(label_set)
+    return label_index
+
+
+class MetricsAccumulator:
+    """
+    Accumulate the metrics of calculate_aggregate_metrics one text score at a time.
+
+    Only running sums and counts are kept, so memory does not grow with the number
+    of scores. Accumulators of the same label groups, e.g. from parallel workers
+    each ingesting a shard of scores, can be merged.
+
+    Attributes:
+        grouped_targeted_labels: entity labels separated as sets of groups, for
+            example, [{"PER", "PERSON"}, {"ORG"}].
+        fbeta: beta value for f scores.
+    """
+
+    RECALL_THRESHOLDS = {
+        "exact_match_f1": None,
+        "partial_match_f1_threshold_at_50%": 0.5,
+    }
+
+    def __init__(self, grouped_targeted_labels: List[Set[str]], fbeta: float = 1.0):
+        self.grouped_targeted_labels = grouped_targeted_labels
+        self.fbeta = fbeta
+
+        self._num_texts = 0
+        self._fscore_sums = {name: 0.0 for name in self.RECALL_THRESHOLDS}
+        # sum and count of precisions and recalls for every label group
+        self._group_sums: Dict[FrozenSet[str], Dict[str, List]] = {
+            frozenset(label_set): {"precisions": [0.0, 0], "recalls": [0.0, 0]}
+            for label_set in grouped_targeted_labels
+        }
+        self._label_index = _build_label_index(self._group_sums.keys())
+
+    def _add(self, entity_label: str, key: str, value: float):
+        for label_set in self._label_index.get(entity_label, []):
+            sums = self._group_sums[label_set][key]
+            sums[0] += value
+            sums[1] += 1
+
+    def update(self, text_score: TextScore):
+        precisions = [p.precision for p in text_score.precisions]
+        recalls = [r.recall for r in text_score.recalls]
+
+        self._num_texts += 1
+        for name, recall_threshold in self.RECALL_THRESHOLDS.items():
+            self._fscore_sums[name] += compute_pii_detection_fscore(
+                precisions, recalls, recall_threshold, self.fbeta
+            )
+
+        for precision in text_score.precisions:
+            self._add(precision.entity.entity_type, "precisions", precision.precision)
+        for recall in text_score.recalls:
+            self._add(recall.entity.entity_type, "recalls", recall.recall)
+
+    def merge(self, other: "MetricsAccumulator") -> "MetricsAccumulator":
+        """Add sums and counts of another accumulator to this one in place."""
+        if self._group_sums.keys() != other._group_sums.keys() or (
+            self.fbeta != other.fbeta
+        ):
+            raise ValueError(
+                "Cannot merge accumulators of different label groups or fbeta."
+            )
+
+        self._num_texts += other._num_texts
+        for name, fscore_sum in other._fscore_sums.items():
+            self._fscore_sums[name] += fscore_sum
+        for label_set, other_sums in other._group_sums.items():
+            for key, (value_sum, count) in other_sums.items():
+                sums = self._group_sums[label_set][key]
+                sums[0] += value_sum
+                sums[1] += count
+        return self
+
+    def _group_metrics(self, sums: Dict[str, List]) -> Dict[str, Union[float, str]]:
+        precision_sum, num_precisions = sums["precisions"]
+        recall_sum, num_recalls = sums["recalls"]
+
+        # same as compute_pii_detection_fscore without a recall threshold
+        if not num_precisions and not num_recalls:
+            f1 = 1.0
+        elif not num_precisions or not num_recalls:
+            f1 = 0.0
+        else:
+            f1 = compute_f_beta(
+                precision_sum / num_precisions, recall_sum / num_recalls, self.fbeta
+            )
+
+        return {
+            "f1": round(f1, 4),
+            "ave-precision": (
+                round(precision_sum / num_precisions, 4)
+                if num_precisions
+                else "undefined"
+            ),
+            "ave-recall": (
+                round(recall_sum / num_recalls, 4) if num_recalls else "undefined"
+            ),
+        }
+
+    def results(self) -> Dict[Union[str, FrozenSet[str]], Any]:
+        results: Dict[Union[str, FrozenSet[str]], Any] = dict()
+        for name, fscore_sum in self._fscore_sums.items():
+            results[name] = (
+                round(fscore_sum / self._num_texts, 4) if self._num_texts else 0.0
+            )
+        for label_set, sums in self._group_sums.items():
+            results[label_set] = self._group_metrics(sums)
+        return results
 
 
 @returns()
@@ -164,16 +565,17 @@ def get_rollup_fscore_on_pii(
 
 
 def _update_table(
-    table: Dict[FrozenSet[str], Dict], new_item: Union[EntityPrecision, EntityRecall]
+    table: Dict[FrozenSet[str], Dict],
+    new_item: Union[EntityPrecision, EntityRecall],
+    label_index: Dict[str, List[FrozenSet[str]]],
 ) -> Dict[FrozenSet, Dict]:
     """A helper function to log fscores."""
     entity_label = new_item.entity.entity_type
-    for label_set in table.keys():
-        if entity_label in label_set:
-            if isinstance(new_item, EntityPrecision):
-                table[label_set]["precisions"].append(new_item.precision)
-            elif isinstance(new_item, EntityRecall):
-                table[label_set]["recalls"].append(new_item.recall)
+    for label_set in label_index.get(entity_label, []):
+        if isinstance(new_item, EntityPrecision):
+            table[label_set]["precisions"].append(new_item.precision)
+        elif isinstance(new_item, EntityRecall):
+            table[label_set]["recalls"].append(new_item.recall)
     return table
 
 
@@ -202,12 +604,14 @@ def regroup_scores_on_types(
         for label_set in grouped_labels
     }
 
+    label_index = _build_label_index(score_table.keys())
+
     # update score table
     for text_score in scores:
         for precision in text_score.precisions:
-            score_table = _update_table(score_table, precision)
+            score_table = _update_table(score_table, precision, label_index)
         for recall in text_score.recalls:
-            score_table = _update_table(score_table, recall)
+            score_table = _update_table(score_table, recall, label_index)
 
     return score_table
 
@@ -247,16 +651,137 @@ def get_rollup_metrics_on_types(
     return metrics
 
 
-def exec_pipeline(config_yaml_file: str):
-    pipeline = Pipeline(
-        read_benchmark_data,
-        identify_pii_entities,
-        calculate_precisions_and_recalls,
-        log_predictions_and_ground_truths,
-        calculate_aggregate_metrics,
-        report_results,
-        name="pii_validation_pipeline",
+@returns(DataStream)
+def stream_benchmark_data(benchmark_data_file: str) -> DataStream:
+    reader = PresidioFakePiiReader()
+    data = reader.stream_data(benchmark_data_file)
+
+    # remove empty items
+    data.items = filter(lambda item: item.text != "", data.items)
+    return data
+
+
+@returns(DataStream)
+def stream_pii_entities(
+    data: DataStream,
+    recogniser_name: str,
+    recogniser_params: Dict,
+    batch_size: int = 32,
+    num_workers: int = 1,
+    prediction_cache_path: Optional[str] = None,
+    prediction_cache_size: int = 100000,
+    reuse_recogniser: bool = False,
+    bucket_by_length: bool = False,
+    bucket_window: int = 4096,
+) -> DataStream:
+    """Lazy version of identify_pii_entities, items are predicted as they are
+    consumed.
+
+    When bucket_by_length is true, texts are batched by length within windows of
+    bucket_window items, so memory stays bounded by the window.
+    """
+
+    def identified_items() -> Iterator[DataItem]:
+        recogniser = _create_recogniser(
+            recogniser_name, recogniser_params, reuse_recogniser
+        )
+        cache = _open_prediction_cache(
+            prediction_cache_path,
+            recogniser_name,
+            recogniser_params,
+            prediction_cache_size,
+            recogniser,
+        )
+        try:
+            for batch in _identify_in_batches(
+                data.items,
+                recogniser,
+                recogniser_name,
+                recogniser_params,
+                batch_size,
+                num_workers,
+                cache,
+                bucket_window if bucket_by_length else 0,
+            ):
+                yield from batch
+        finally:
+            _close_prediction_cache(cache)
+
+    return DataStream(identified_items(), data.supported_entities, data.is_io_schema)
+
+
+@returns(scores=Iterator)
+def stream_precisions_and_recalls(
+    data: DataStream,
+    grouped_targeted_labels: List[Set[str]],
+    nontargeted_labels: Optional[Set[str]] = None,
+    evaluation_engine: str = "sklearn",
+) -> Dict[str, Iterator[TextScore]]:
+    score = _build_scorer(
+        grouped_targeted_labels, nontargeted_labels, evaluation_engine
     )
+    return {"scores": map(score, data.items)}
+
+
+@returns(scores=Iterator)
+def stream_predictions_and_ground_truths(
+    predictions_dump_path: str, scores: Iterator[TextScore]
+) -> Dict[str, Iterator[TextScore]]:
+    """Log predictions and ground truths in JSON Lines, one line per text, as scores
+    pass through."""
+
+    def logged_scores() -> Iterator[TextScore]:
+        # line buffered, every line is on disk as soon as it is written
+        with open(predictions_dump_path, "w", buffering=1) as f:
+            for score in scores:
+                record: Dict[str, Any] = {"text": score.text}
+                record.update(_format_predictions_and_ground_truths(score))
+                f.write(json.dumps(record) + "\n")
+                yield score
+
+    return {"scores": logged_scores()}
+
+
+@returns(Dict)
+def accumulate_aggregate_metrics(
+    scores: Iterator[TextScore],
+    grouped_targeted_labels: List[Set[str]],
+    fbeta: float = 1.0,
+) -> Dict[Union[str, FrozenSet[str]], Any]:
+    """Online version of calculate_aggregate_metrics, it drives the stream."""
+    accumulator = MetricsAccumulator(grouped_targeted_labels, fbeta)
+    for score in tqdm(scores):
+        accumulator.update(score)
+    return accumulator.results()
+
+
+def exec_pipeline(config_yaml_file: str, streaming: bool = False):
+    """Run the PII validation pipeline on a config.
+
+    In streaming mode, data items flow through prediction, scoring and logging one
+    at a time and metrics are accumulated online, so memory does not grow with the
+    size of the benchmark. Predictions are then logged in JSON Lines.
+    """
+    if streaming:
+        pipeline = Pipeline(
+            stream_benchmark_data,
+            stream_pii_entities,
+            stream_precisions_and_recalls,
+            stream_predictions_and_ground_truths,
+            accumulate_aggregate_metrics,
+            report_results,
+            name="pii_validation_streaming_pipeline",
+        )
+    else:
+        pipeline = Pipeline(
+            read_benchmark_data,
+            identify_pii_entities,
+            calculate_precisions_and_recalls,
+            log_predictions_and_ground_truths,
+            calculate_aggregate_metrics,
+            report_results,
+            name="pii_validation_pipeline",
+        )
 
     config = load_yaml_file(config_yaml_file)
     if config:
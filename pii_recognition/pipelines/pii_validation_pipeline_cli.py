@@ -1,10 +1,19 @@
 """CLI support for running PII validation pipeline."""
 import argparse
+import logging
 
 from pii_recognition.pipelines.pii_validation_pipeline import exec_pipeline
 
 parser = argparse.ArgumentParser(prog="pii_validation_pipeline")
 parser.add_argument("--config_yaml", help="Path of config yaml file")
+parser.add_argument(
+    "--streaming",
+    action="store_true",
+    help="Stream items through the pipeline, predictions are logged in JSON Lines",
+)
 args = parser.parse_args()
 
-exec_pipeline(args.config_yaml)
+# e.g. reports of the prediction cache
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+exec_pipeline(args.config_yaml, args.streaming)
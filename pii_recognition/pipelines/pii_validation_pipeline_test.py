@@ -1,25 +1,34 @@
+import json
+import logging
 import os
 from tempfile import TemporaryDirectory
 
 from mock import patch
 from numpy.testing import assert_array_almost_equal
-from pii_recognition.data_readers.data import Data, DataItem
+from pii_recognition.data_readers.data import Data, DataItem, DataStream
 from pii_recognition.evaluation.character_level_evaluation import (
     EntityPrecision,
     EntityRecall,
     TextScore,
 )
+from pii_recognition.evaluation.prediction_cache import PredictionCache
 from pii_recognition.labels.schema import Entity
 from pii_recognition.utils import load_json_file
+import pytest
 from pytest import fixture
 
 from .pii_validation_pipeline import (
+    MetricsAccumulator,
+    accumulate_aggregate_metrics,
+    calculate_aggregate_metrics,
     calculate_precisions_and_recalls,
     get_rollup_fscore_on_pii,
     get_rollup_metrics_on_types,
     identify_pii_entities,
     log_predictions_and_ground_truths,
     regroup_scores_on_types,
+    stream_pii_entities,
+    stream_predictions_and_ground_truths,
 )
 
 
@@ -151,16 +160,18 @@ def complex_scores():
 
 
 @patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
-def test_identify_pii_entities(mock_registry, data):
-    mock_registry.create_instance.return_value.analyse.return_value = [
-        Entity("test", 0, 4)
-    ]
+def test_identify_pii_entities(mock_registry, data, mock_analyse_batch):
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_recogniser.analyse.return_value = [Entity("test", 0, 4)]
+    mock_analyse_batch(mock_recogniser)
 
     actual = identify_pii_entities(
         data,
         "test_recogniser",
         {"supported_entities": ["test"], "supported_languages": ["test"]},
+        batch_size=1,
     )
+    assert mock_recogniser.analyse_batch.call_count == 2
 
     assert [item.text for item in actual.items] == [
         "It's like that since 12/17/1967",
@@ -176,6 +187,231 @@ def test_identify_pii_entities(mock_registry, data):
     ]
 
 
+def test_identify_pii_entities_with_process_pool(data):
+    recogniser_params = {
+        "supported_entities": ["PER"],
+        "supported_languages": ["en"],
+        "tokeniser_setup": {"name": "TreebankWordTokeniser"},
+    }
+    data.items = data.items * 3
+
+    actual = identify_pii_entities(
+        data,
+        "FirstLetterUppercaseRecogniser",
+        recogniser_params,
+        batch_size=2,
+        num_workers=2,
+    )
+    parallel_predictions = [item.pred_labels for item in actual.items]
+
+    actual = identify_pii_entities(
+        data, "FirstLetterUppercaseRecogniser", recogniser_params, batch_size=2
+    )
+    serial_predictions = [item.pred_labels for item in actual.items]
+
+    assert parallel_predictions == serial_predictions
+    assert parallel_predictions[:2] == [
+        [Entity("PER", 0, 2)],
+        [
+            Entity("PER", 0, 3),
+            Entity("PER", 15, 30),
+            Entity("PER", 34, 43),
+            Entity("PER", 47, 52),
+        ],
+    ]
+
+
+@patch("pii_recognition.pipelines.pii_validation_pipeline.tqdm")
+@patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
+def test_identify_pii_entities_bucketed_by_length(mock_registry, mock_tqdm, data):
+    events = []
+
+    def analyse_batch(texts, entities, batch_size):
+        events.append(("predicted", len(texts)))
+        return [[Entity("test", 0, len(text))] for text in texts]
+
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_recogniser.analyse_batch.side_effect = analyse_batch
+    progress_bar = mock_tqdm.return_value.__enter__.return_value
+    progress_bar.update.side_effect = lambda n: events.append(("progress", n))
+    texts = ["ccc", "a", "eeeee", "bb", "dddd"]
+    data.items = [DataItem(text, true_labels=[]) for text in texts]
+
+    actual = identify_pii_entities(
+        data,
+        "test_recogniser",
+        {"supported_entities": ["test"], "supported_languages": ["en"]},
+        batch_size=2,
+        bucket_by_length=True,
+    )
+    assert [c[0][0] for c in mock_recogniser.analyse_batch.call_args_list] == [
+        ["a", "bb"],
+        ["ccc", "dddd"],
+        ["eeeee"],
+    ]
+    # items keep their order
+    assert [item.text for item in actual.items] == texts
+    assert [item.pred_labels for item in actual.items] == [
+        [Entity("test", 0, len(text))] for text in texts
+    ]
+    # progress is updated as every batch is predicted
+    assert events == [
+        ("predicted", 2),
+        ("progress", 2),
+        ("predicted", 2),
+        ("progress", 2),
+        ("predicted", 1),
+        ("progress", 1),
+    ]
+
+
+@patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
+def test_identify_pii_entities_with_prediction_cache(
+    mock_registry, data, caplog, mock_analyse_batch
+):
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_recogniser.analyse.return_value = [Entity("test", 0, 4)]
+    mock_analyse_batch(mock_recogniser)
+    # entities are those of the recogniser, which its params may not give
+    mock_recogniser.supported_entities = ["test"]
+    mock_recogniser.prediction_version = "1.0"
+    recogniser_params = {"supported_languages": ["en"]}
+    texts = [item.text for item in data.items]
+
+    with TemporaryDirectory() as tmpdirname:
+        cache_path = os.path.join(tmpdirname, "predictions.sqlite")
+        first_data = Data(data.items[:1], data.supported_entities, data.is_io_schema)
+        identify_pii_entities(
+            first_data,
+            "test_recogniser",
+            recogniser_params,
+            prediction_cache_path=cache_path,
+        )
+        assert mock_recogniser.analyse_batch.call_args[0][0] == texts[:1]
+        assert mock_recogniser.analyse_batch.call_args[0][1] == ["test"]
+
+        # only the text missing the cache is sent to the recogniser
+        data.items[0].pred_labels = None
+        with caplog.at_level(logging.INFO):
+            actual = identify_pii_entities(
+                data,
+                "test_recogniser",
+                recogniser_params,
+                prediction_cache_path=cache_path,
+            )
+        # counters are logged rather than printed
+        assert caplog.messages[-1] == (
+            f"Prediction cache {cache_path}: 1 hits, 1 misses (hit rate 50.0%), "
+            "2 entries."
+        )
+
+        # predictions are cached for the entities the recogniser was asked
+        cache = PredictionCache(
+            cache_path, "test_recogniser", recogniser_params, version="1.0"
+        )
+        assert set(cache.get_many(texts, ["test"])) == {0, 1}
+        cache.close()
+        assert mock_recogniser.analyse_batch.call_count == 2
+        assert mock_recogniser.analyse_batch.call_args[0][0] == texts[1:]
+        assert [item.pred_labels for item in actual.items] == [
+            [Entity("test", 0, 4)],
+            [Entity("test", 0, 4)],
+        ]
+
+        # predictions of another version of the recogniser, e.g. with a retrained
+        # model, are stale
+        mock_recogniser.prediction_version = "1.1"
+        identify_pii_entities(
+            data, "test_recogniser", recogniser_params, prediction_cache_path=cache_path
+        )
+        assert mock_recogniser.analyse_batch.call_count == 3
+        assert mock_recogniser.analyse_batch.call_args[0][0] == texts
+
+
+@patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
+def test_identify_pii_entities_closes_prediction_cache_on_failure(mock_registry, data):
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_recogniser.analyse_batch.side_effect = RuntimeError("recogniser failed")
+    mock_recogniser.prediction_version = "1.0"
+
+    with TemporaryDirectory() as tmpdirname:
+        cache_path = os.path.join(tmpdirname, "predictions.sqlite")
+        with patch.object(
+            PredictionCache, "close", autospec=True, side_effect=PredictionCache.close
+        ) as mock_close:
+            with pytest.raises(RuntimeError):
+                identify_pii_entities(
+                    data,
+                    "test_recogniser",
+                    {"supported_entities": ["test"], "supported_languages": ["en"]},
+                    prediction_cache_path=cache_path,
+                )
+        mock_close.assert_called_once()
+
+
+@patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
+def test_stream_pii_entities(mock_registry, mock_analyse_batch):
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_recogniser.analyse.side_effect = lambda text, entities: [
+        Entity("test", 0, len(text))
+    ]
+    mock_analyse_batch(mock_recogniser)
+    mock_recogniser.prediction_version = "1.0"
+    recogniser_params = {"supported_entities": ["test"], "supported_languages": ["en"]}
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    def stream_data(texts):
+        consumed = []
+
+        def items():
+            for text in texts:
+                consumed.append(text)
+                yield DataItem(text, true_labels=[])
+
+        return DataStream(items(), set(), False), consumed
+
+    with TemporaryDirectory() as tmpdirname:
+        cache_path = os.path.join(tmpdirname, "predictions.sqlite")
+        data, consumed = stream_data(["a", "ccc", "dddd"])
+        list(
+            stream_pii_entities(
+                data,
+                "test_recogniser",
+                recogniser_params,
+                batch_size=1,
+                prediction_cache_path=cache_path,
+            ).items
+        )
+
+        data, consumed = stream_data(texts)
+        actual = stream_pii_entities(
+            data,
+            "test_recogniser",
+            recogniser_params,
+            batch_size=2,
+            prediction_cache_path=cache_path,
+        )
+        # items are read and predicted lazily
+        assert consumed == []
+        first_item = next(actual.items)
+        assert first_item.pred_labels == [Entity("test", 0, 1)]
+        assert consumed == ["a", "bb"]
+
+        rest = list(actual.items)
+    assert [item.text for item in rest] == texts[1:]
+    assert [item.pred_labels for item in rest] == [
+        [Entity("test", 0, len(text))] for text in texts[1:]
+    ]
+    # the batch ["ccc", "dddd"] is served by the cache entirely
+    assert [c[0][0] for c in mock_recogniser.analyse_batch.call_args_list] == [
+        ["a"],
+        ["ccc"],
+        ["dddd"],
+        ["bb"],
+        ["eeeee"],
+    ]
+
+
 def test_calculate_precisions_and_recalls_with_empty_predictions(data):
     grouped_targeted_labels = [{"BIRTHDAY"}, {"ORGANIZATION"}, {"LOCATION"}]
 
@@ -228,6 +464,21 @@ def test_calculate_precisions_and_recalls_with_predictions(data):
     )
 
 
+def test_calculate_precisions_and_recalls_with_numpy_engine(data):
+    data.items[0].pred_labels = [Entity("BIRTHDAY", 0, 10)]
+    data.items[1].pred_labels = [
+        Entity("ORGANIZATION", 20, 30),
+        Entity("LOCATION", 30, 46),
+    ]
+    grouped_targeted_labels = [{"BIRTHDAY"}, {"ORGANIZATION"}, {"LOCATION"}]
+
+    expected = calculate_precisions_and_recalls(data, grouped_targeted_labels)
+    actual = calculate_precisions_and_recalls(
+        data, grouped_targeted_labels, evaluation_engine="numpy"
+    )
+    assert actual == expected
+
+
 def test_calculate_precisions_and_recalls_with_nontargeted_labels(data):
     grouped_targeted_labels = [{"ORGANIZATION"}, {"LOCATION"}]
     nontargeted_labels = {"BIRTHDAY", "DATE"}
@@ -296,6 +547,82 @@ def test_get_rollup_metrics_on_types_empty_scores():
     }
 
 
+def test_metrics_accumulator(complex_scores):
+    grouped_labels = [{"BIRTHDAY", "DATE"}, {"LOCATION"}, {"CREDIT_CARD"}, {"URL"}]
+    accumulator = MetricsAccumulator(grouped_labels, fbeta=2.0)
+    for score in complex_scores:
+        accumulator.update(score)
+
+    expected = {
+        "exact_match_f1": get_rollup_fscore_on_pii(complex_scores, 2.0, None),
+        "partial_match_f1_threshold_at_50%": get_rollup_fscore_on_pii(
+            complex_scores, 2.0, 0.5
+        ),
+    }
+    expected.update(get_rollup_metrics_on_types(grouped_labels, complex_scores, 2.0))
+    assert accumulator.results() == expected
+    assert calculate_aggregate_metrics(complex_scores, grouped_labels, 2.0) == expected
+    assert (
+        accumulate_aggregate_metrics(iter(complex_scores), grouped_labels, fbeta=2.0)
+        == expected
+    )
+
+    empty = MetricsAccumulator(grouped_labels)
+    assert empty.results() == {
+        "exact_match_f1": 0.0,
+        "partial_match_f1_threshold_at_50%": 0.0,
+        **get_rollup_metrics_on_types(grouped_labels, [], 1.0),
+    }
+
+
+def test_metrics_accumulator_merge(complex_scores):
+    grouped_labels = [{"BIRTHDAY", "DATE"}, {"LOCATION"}, {"CREDIT_CARD"}]
+    expected = calculate_aggregate_metrics(complex_scores, grouped_labels)
+
+    shards = [complex_scores[:2], complex_scores[2:5], complex_scores[5:]]
+    accumulators = []
+    for shard in shards:
+        accumulator = MetricsAccumulator(grouped_labels)
+        for score in shard:
+            accumulator.update(score)
+        accumulators.append(accumulator)
+
+    merged = MetricsAccumulator(grouped_labels)
+    for accumulator in accumulators:
+        merged.merge(accumulator)
+    assert merged.results() == expected
+
+    with pytest.raises(ValueError) as err:
+        merged.merge(MetricsAccumulator([{"LOCATION"}]))
+    assert str(err.value) == (
+        "Cannot merge accumulators of different label groups or fbeta."
+    )
+
+
+def test_stream_predictions_and_ground_truths(scores):
+    with TemporaryDirectory() as tempdir:
+        fake_path = os.path.join(tempdir, "fake_path")
+        logged_scores = stream_predictions_and_ground_truths(fake_path, iter(scores))[
+            "scores"
+        ]
+        assert next(logged_scores) == scores[0]
+        # the first line is written before the stream is exhausted
+        with open(fake_path) as f:
+            assert len(f.readlines()) == 1
+        assert list(logged_scores) == scores[1:]
+
+        with open(fake_path) as f:
+            actual = [json.loads(line) for line in f]
+
+    assert [item["text"] for item in actual] == [score.text for score in scores]
+    assert actual[0]["predicted"] == {
+        "It's like ": {"type": "BIRTHDAY", "score": 0.0, "start": 0}
+    }
+    assert actual[0]["ground_truth"] == {
+        "9/23/1993": {"type": "BIRTHDAY", "score": 0.0, "start": 21},
+    }
+
+
 def test_log_mistakes(scores):
     with TemporaryDirectory() as tempdir:
         fake_path = os.path.join(tempdir, "fake_path")
@@ -336,3 +663,36 @@ def test_regroup_scores_on_types(scores):
     assert_array_almost_equal(
         actual[frozenset({"ORGANIZATION"})]["recalls"], [0.6666666666666666]
     )
+
+
+@patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
+def test_stream_pii_entities_bucketed_by_length(mock_registry, mock_analyse_batch):
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_recogniser.analyse.side_effect = lambda text, entities: [
+        Entity("test", 0, len(text))
+    ]
+    mock_analyse_batch(mock_recogniser)
+    texts = ["ccc", "a", "bb", "eeeee", "dddd", "f"]
+    data = DataStream((DataItem(text, true_labels=[]) for text in texts), set(), False)
+
+    actual = stream_pii_entities(
+        data,
+        "test_recogniser",
+        {"supported_entities": ["test"], "supported_languages": ["en"]},
+        batch_size=2,
+        bucket_by_length=True,
+        bucket_window=3,
+    )
+    items = list(actual.items)
+
+    # texts are sorted within windows of three items
+    assert [c[0][0] for c in mock_recogniser.analyse_batch.call_args_list] == [
+        ["a", "bb"],
+        ["ccc"],
+        ["f", "dddd"],
+        ["eeeee"],
+    ]
+    assert [item.text for item in items] == texts
+    assert [item.pred_labels for item in items] == [
+        [Entity("test", 0, len(text))] for text in texts
+    ]
@@ -3,22 +3,19 @@ from pii_recognition.registration.registry import Registry
 
 
 def init() -> Registry:
-    from .crf_recogniser import CrfRecogniser
-    from .first_letter_uppercase_recogniser import FirstLetterUppercaseRecogniser
-    from .flair_recogniser import FlairRecogniser
-    from .spacy_recogniser import SpacyRecogniser
-    from .stanza_recogniser import StanzaRecogniser
-    from .comprehend_recogniser import ComprehendRecogniser
-    from .google_recogniser import GoogleRecogniser
-
+    # recognisers are imported on first use, so that frameworks and credentials of
+    # those not used, e.g. torch for Flair, are never loaded
     registry = Registry[EntityRecogniser]()
-    registry.register(CrfRecogniser)
-    registry.register(FirstLetterUppercaseRecogniser)
-    registry.register(FlairRecogniser)
-    registry.register(SpacyRecogniser)
-    registry.register(StanzaRecogniser)
-    registry.register(ComprehendRecogniser)
-    registry.register(GoogleRecogniser)
+    registry.register_lazy(f"{__name__}.crf_recogniser.CrfRecogniser")
+    registry.register_lazy(
+        f"{__name__}.first_letter_uppercase_recogniser.FirstLetterUppercaseRecogniser"
+    )
+    registry.register_lazy(f"{__name__}.flair_recogniser.FlairRecogniser")
+    registry.register_lazy(f"{__name__}.spacy_recogniser.SpacyRecogniser")
+    registry.register_lazy(f"{__name__}.stanza_recogniser.StanzaRecogniser")
+    registry.register_lazy(f"{__name__}.comprehend_recogniser.ComprehendRecogniser")
+    registry.register_lazy(f"{__name__}.google_recogniser.GoogleRecogniser")
+    registry.register_lazy(f"{__name__}.chunked_recogniser.ChunkedRecogniser")
 
     return registry
 
@@ -0,0 +1,160 @@
+from typing import Dict, List, Optional, Tuple
+
+from pii_recognition.labels.schema import Entity
+from pii_recognition.recognisers import registry as recogniser_registry
+from pii_recognition.utils import _validate_chunk_args, split_text_with_overlap
+
+from .entity_recogniser import EntityRecogniser
+from .request_engine import ConcurrentRequestEngine
+
+
+class ChunkedRecogniser(EntityRecogniser):
+    """
+    Analyse long texts chunk by chunk with another recogniser.
+
+    Texts are split at sentence or word boundaries into chunks of at most
+    max_chunk_chars characters, adjacent chunks share about overlap_chars characters
+    so that an entity cut by one chunk is found whole by the next one. Entities are
+    shifted back to offsets in the text. An entity found in the overlap of two chunks
+    is taken from the chunk where it lies farther from the edges, the other chunk's
+    version is dropped.
+
+    Texts no longer than max_chunk_chars are analysed as they are.
+
+    Attributes:
+        recogniser_setup: name and config of a recogniser in the recogniser registry.
+        max_chunk_chars: maximum number of characters of a chunk.
+        overlap_chars: number of characters adjacent chunks share, it should be
+            longer than the entities expected.
+        max_workers: number of chunks analysed concurrently with analyse of the
+            recogniser, which suits recognisers calling remote services. With one
+            worker chunks are analysed with analyse_batch of the recogniser.
+    """
+
+    def __init__(
+        self,
+        recogniser_setup: Dict,
+        max_chunk_chars: int = 4096,
+        overlap_chars: int = 256,
+        max_workers: int = 1,
+    ):
+        # validate before a model is loaded
+        _validate_chunk_args(max_chunk_chars, overlap_chars)
+
+        self.recogniser: EntityRecogniser = recogniser_registry.create_instance(
+            recogniser_setup["name"], recogniser_setup.get("config")
+        )
+        self.max_chunk_chars = max_chunk_chars
+        self.overlap_chars = overlap_chars
+        self.max_workers = max_workers
+        self._request_engine = ConcurrentRequestEngine(max_in_flight=max_workers)
+        super().__init__(
+            supported_entities=self.recogniser.supported_entities,
+            supported_languages=self.recogniser.supported_languages,
+        )
+
+    def model_version(self) -> str:
+        return self.recogniser.prediction_version
+
+    def analyse(self, text: str, entities: List[str]) -> Optional[List[Entity]]:
+        return self.analyse_batch([text], entities)[0]
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        # chunks of all texts are analysed together
+        chunks = [
+            (text_index, offset, chunk)
+            for text_index, text in enumerate(texts)
+            for offset, chunk in split_text_with_overlap(
+                text, self.max_chunk_chars, self.overlap_chars
+            )
+        ]
+        chunk_texts = [chunk for _, _, chunk in chunks]
+        if self.max_workers > 1:
+            predictions = self._request_engine.map(
+                lambda chunk: self.recogniser.analyse(chunk, entities), chunk_texts
+            )
+        else:
+            predictions = self.recogniser.analyse_batch(
+                chunk_texts, entities, batch_size=batch_size
+            )
+
+        text_chunks: List[List[Tuple[int, str, Optional[List[Entity]]]]] = [
+            [] for _ in texts
+        ]
+        for (text_index, offset, chunk), prediction in zip(chunks, predictions):
+            text_chunks[text_index].append((offset, chunk, prediction))
+        return [_stitch(chunk_predictions) for chunk_predictions in text_chunks]
+
+    def close(self):
+        close = getattr(self.recogniser, "close", None)
+        if callable(close):
+            close()
+
+
+def _stitch(
+    chunk_predictions: List[Tuple[int, str, Optional[List[Entity]]]]
+) -> Optional[List[Entity]]:
+    """Shift entities of chunks to offsets in the text and drop those found again by
+    another chunk."""
+    if len(chunk_predictions) == 1:
+        return chunk_predictions[0][2]
+    if all(prediction is None for _, _, prediction in chunk_predictions):
+        return None
+
+    spans = [(offset, offset + len(chunk)) for offset, chunk, _ in chunk_predictions]
+    # entities in a region shared with another chunk, only these may be found twice
+    shared = []
+    stitched = []
+    for chunk_index, (offset, chunk, prediction) in enumerate(chunk_predictions):
+        chunk_start, chunk_end = spans[chunk_index]
+        for entity in prediction or []:
+            shifted = Entity(
+                entity.entity_type, entity.start + offset, entity.end + offset
+            )
+            if not _is_shared(shifted, chunk_index, spans):
+                stitched.append(shifted)
+                continue
+
+            # distance to the edges where the chunk was cut from its neighbours,
+            # entities close to a cut may be truncated
+            margin = min(
+                shifted.start - chunk_start if chunk_index > 0 else len(chunk),
+                chunk_end - shifted.end
+                if chunk_index < len(spans) - 1
+                else len(chunk),
+            )
+            shared.append((margin, chunk_index, shifted))
+
+    # entities of a chunk may overlap each other as the recogniser gave them, an
+    # entity overlapping one of another chunk with a larger margin is dropped
+    kept: List[Tuple[int, Entity]] = []
+    for _, chunk_index, entity in sorted(
+        shared, key=lambda candidate: (-candidate[0], candidate[1])
+    ):
+        if not any(
+            kept_chunk != chunk_index
+            and entity.start < kept_entity.end
+            and kept_entity.start < entity.end
+            for kept_chunk, kept_entity in kept
+        ):
+            kept.append((chunk_index, entity))
+    stitched.extend(entity for _, entity in kept)
+
+    return sorted(
+        stitched, key=lambda entity: (entity.start, entity.end, entity.entity_type)
+    )
+
+
+def _is_shared(entity: Entity, chunk_index: int, spans: List[Tuple[int, int]]) -> bool:
+    """Whether an entity of a chunk overlaps another chunk, spans of chunks are in
+    the order of their starts."""
+    before = chunk_index - 1
+    while before >= 0 and spans[before][0] < entity.end:
+        if spans[before][1] > entity.start:
+            return True
+        before -= 1
+
+    after = chunk_index + 1
+    return after < len(spans) and spans[after][0] < entity.end
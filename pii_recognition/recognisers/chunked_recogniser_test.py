@@ -0,0 +1,129 @@
+from unittest.mock import patch
+
+import pytest
+
+from pii_recognition.labels.schema import Entity
+
+from . import registry as recogniser_registry
+from .chunked_recogniser import ChunkedRecogniser
+
+
+@pytest.fixture
+def wrapped_recogniser(stub_recogniser):
+    # runs of capitalised words
+    recogniser = stub_recogniser(pattern=r"[A-Z]\w*(?: [A-Z]\w*)*")
+    with patch.object(
+        recogniser_registry, "create_instance", return_value=recogniser
+    ) as mock_create_instance:
+        yield recogniser
+    mock_create_instance.assert_called_once_with("StubRecogniser", {"key": "value"})
+
+
+def get_chunked_recogniser(**kwargs) -> ChunkedRecogniser:
+    return ChunkedRecogniser(
+        {"name": "StubRecogniser", "config": {"key": "value"}}, **kwargs
+    )
+
+
+def test_ChunkedRecogniser_for_short_texts(wrapped_recogniser):
+    recogniser = get_chunked_recogniser(max_chunk_chars=20, overlap_chars=5)
+    assert recogniser.supported_entities == ["PER", "LOC"]
+    assert recogniser.supported_languages == ["en"]
+
+    actual = recogniser.analyse_batch(["I met Bob Smith.", ""], ["PER"])
+    assert actual == [[Entity("PER", 0, 1), Entity("PER", 6, 15)], []]
+    assert wrapped_recogniser.batches == [(["I met Bob Smith.", ""], ["PER"])]
+
+    recogniser.close()
+    assert wrapped_recogniser.closed
+
+
+def test_ChunkedRecogniser_for_long_texts(wrapped_recogniser):
+    text = " ".join(
+        f"Then {name} went to the shops with an umbrella."
+        for name in ["Bob Smith", "Ann Lee", "Tom Kerr"] * 20
+    )
+    recogniser = get_chunked_recogniser(max_chunk_chars=120, overlap_chars=40)
+
+    actual = recogniser.analyse(text, ["PER"])
+    # same as analysing the text whole, entities in overlaps are kept once
+    assert actual == wrapped_recogniser.analyse(text, ["PER"])
+    # chunks of the text are analysed in one batch
+    assert len(wrapped_recogniser.batches) == 1
+    assert len(wrapped_recogniser.batches[0][0]) > 1
+
+
+def test_ChunkedRecogniser_for_entities_cut_by_chunks(wrapped_recogniser):
+    text = "it was a sunny day and Bob Smith went out"
+    recogniser = get_chunked_recogniser(max_chunk_chars=27, overlap_chars=12)
+
+    actual = recogniser.analyse(text, ["PER"])
+    # the first chunk ends in the middle of the name, the second one has it whole
+    assert wrapped_recogniser.batches == [
+        (["it was a sunny day and Bob ", "day and Bob Smith went out"], ["PER"])
+    ]
+    assert actual == [Entity("PER", 23, 32)]
+
+
+def test_ChunkedRecogniser_for_concurrent_chunks(wrapped_recogniser):
+    texts = [
+        "Bob Smith went to the shops. Ann Lee went to the beach. Tom went home.",
+        "Nobody here.",
+    ]
+    recogniser = get_chunked_recogniser(
+        max_chunk_chars=30, overlap_chars=10, max_workers=4
+    )
+
+    actual = recogniser.analyse_batch(texts, ["PER"])
+    assert actual == [wrapped_recogniser.analyse(text, ["PER"]) for text in texts]
+    # chunks are analysed one by one
+    assert wrapped_recogniser.batches == []
+
+
+def test_ChunkedRecogniser_for_failed_chunks(wrapped_recogniser):
+    recogniser = get_chunked_recogniser(max_chunk_chars=10, overlap_chars=0)
+    with patch.object(wrapped_recogniser, "analyse_batch", return_value=[None, None]):
+        assert recogniser.analyse("Bob Smith went out", ["PER"]) is None
+
+    predictions = [None, [Entity("PER", 0, 3)]]
+    with patch.object(wrapped_recogniser, "analyse_batch", return_value=predictions):
+        assert recogniser.analyse("Bob Smith went out", ["PER"]) == [
+            Entity("PER", 10, 13)
+        ]
+
+
+def test_ChunkedRecogniser_for_invalid_inputs():
+    # validated before the wrapped recogniser is created
+    with patch.object(recogniser_registry, "create_instance") as mock_create_instance:
+        with pytest.raises(ValueError) as err:
+            get_chunked_recogniser(max_chunk_chars=10, overlap_chars=10)
+    mock_create_instance.assert_not_called()
+    assert str(err.value) == (
+        "overlap_chars must be between 0 and max_chars 10 but got 10"
+    )
+
+
+def test_ChunkedRecogniser_in_registry():
+    recogniser = recogniser_registry.create_instance(
+        "ChunkedRecogniser",
+        {
+            "recogniser_setup": {
+                "name": "FirstLetterUppercaseRecogniser",
+                "config": {
+                    "supported_entities": ["PER"],
+                    "supported_languages": ["en"],
+                    "tokeniser_setup": {"name": "FastTreebankWordTokeniser"},
+                },
+            },
+            "max_chunk_chars": 20,
+            "overlap_chars": 8,
+        },
+    )
+    actual = recogniser.analyse("We saw Bob and Ann at the Opera House.", ["PER"])
+    assert actual == [
+        Entity("PER", 0, 2),
+        Entity("PER", 7, 10),
+        Entity("PER", 15, 18),
+        Entity("PER", 26, 37),
+    ]
+    assert len(recogniser.analyse_batch(["We saw Bob and Ann."] * 3, ["PER"])) == 3
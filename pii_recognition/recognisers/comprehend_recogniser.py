@@ -1,12 +1,28 @@
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional
 
 from boto3.session import Session
 from botocore.client import BaseClient
+from botocore.exceptions import ClientError
 from decouple import config
 from pii_recognition.aws.config_session import config_cognito_session
 from pii_recognition.labels.schema import Entity
+from pii_recognition.utils import batched, split_text_by_bytes
 
 from .entity_recogniser import EntityRecogniser
+from .request_engine import ConcurrentRequestEngine
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ProvisionedThroughputExceededException",
+}
+
+
+def is_throttling_error(err: Exception) -> bool:
+    return (
+        isinstance(err, ClientError)
+        and err.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+    )
 
 
 class ModelMapping(dict):
@@ -21,15 +37,39 @@ class ModelMapping(dict):
 
 
 class ComprehendRecogniser(EntityRecogniser):
+    """
+    Amazon Comprehend entity recogniser.
+
+    Attributes:
+        supported_entities: the entities supported by this recogniser.
+        supported_languages: the languages supported by this recogniser.
+        model_name: "ner" for entity detection or "pii" for PII entity detection.
+        max_concurrency: maximum number of requests in flight in analyse_batch.
+        max_requests_per_second: request rate limit to stay under service quotas,
+            no limit if None.
+        max_retries: maximum number of retries for a throttled request.
+    """
+
     # read from .env
     IDENTITY_POOL_ID = config("IDENTITY_POOL_ID")
     AWS_REGION = "us-west-2"
+    # TODO: Add multilingual support
+    # based on boto3 Comprehend doc Comprehend supports
+    # 'en'|'es'|'fr'|'de'|'it'|'pt'|'ar'|'hi'|'ja'|'ko'|'zh'|'zh-TW'
+    DEFAULT_LANG = "en"
+    # service limits of batch APIs
+    # https://docs.aws.amazon.com/comprehend/latest/dg/guidelines-and-limits.html
+    MAX_BATCH_SIZE = 25
+    MAX_BATCH_DOCUMENT_BYTES = 5000
 
     def __init__(
         self,
         supported_entities: List[str],
         supported_languages: List[str],
         model_name: str,
+        max_concurrency: int = 1,
+        max_requests_per_second: Optional[float] = None,
+        max_retries: int = 3,
     ):
         sess = config_cognito_session(self.IDENTITY_POOL_ID, self.AWS_REGION)
         comprehend = self._initiate_comprehend(sess)
@@ -37,7 +77,16 @@ class ComprehendRecogniser(EntityRecogniser):
             ner=comprehend.detect_entities, pii=comprehend.detect_pii_entities
         )
         self.model_func = model_mapping[model_name]
+        # PII detection has no batch API
+        batch_model_mapping = {"ner": comprehend.batch_detect_entities}
+        self.batch_model_func: Optional[Callable] = batch_model_mapping.get(model_name)
         self.model_name = model_name
+        self._request_engine = ConcurrentRequestEngine(
+            max_in_flight=max_concurrency,
+            max_rate=max_requests_per_second,
+            max_retries=max_retries,
+            is_retryable=is_throttling_error,
+        )
 
         super().__init__(
             supported_entities=supported_entities,
@@ -47,23 +96,93 @@ class ComprehendRecogniser(EntityRecogniser):
     def _initiate_comprehend(self, session: Session) -> BaseClient:
         return session.client(service_name="comprehend", region_name=self.AWS_REGION)
 
+    def _parse_entities(self, predicted_entities: List[Dict]) -> List[Entity]:
+        return [
+            Entity(ent["Type"], ent["BeginOffset"], ent["EndOffset"])
+            for ent in predicted_entities
+        ]
+
+    def _detect(self, text: str) -> List[Entity]:
+        response = self.model_func(Text=text, LanguageCode=self.DEFAULT_LANG)
+        return self._parse_entities(response["Entities"])
+
+    def _batch_detect(self, texts: List[str]) -> List[Optional[List[Entity]]]:
+        """Detect entities in up to MAX_BATCH_SIZE texts with a single request.
+
+        A document Comprehend fails on is retried alone, if that fails as well its
+        result is None rather than failing the whole batch.
+        """
+        assert self.batch_model_func is not None
+        response = self.batch_model_func(TextList=texts, LanguageCode=self.DEFAULT_LANG)
+
+        results: List[Optional[List[Entity]]] = [None] * len(texts)
+        answered = set()
+        for result in response["ResultList"]:
+            results[result["Index"]] = self._parse_entities(result["Entities"])
+            answered.add(result["Index"])
+        # errors are reported per document, retry those documents one by one
+        for error in response.get("ErrorList", []):
+            answered.add(error["Index"])
+            try:
+                results[error["Index"]] = self._detect(texts[error["Index"]])
+            except ClientError as err:
+                # throttled requests are retried by the request engine
+                if is_throttling_error(err):
+                    raise
+
+        assert len(answered) == len(texts), "Comprehend batch response misses documents"
+        return results
+
     def analyse(self, text: str, entities: List[str]) -> List[Entity]:
         self.validate_entities(entities)
 
-        # TODO: Add multilingual support
-        # based on boto3 Comprehend doc Comprehend supports
-        # 'en'|'es'|'fr'|'de'|'it'|'pt'|'ar'|'hi'|'ja'|'ko'|'zh'|'zh-TW'
-        DEFAULT_LANG = "en"
-
-        response = self.model_func(Text=text, LanguageCode=DEFAULT_LANG)
+        span_labels = self._detect(text)
 
-        # parse response
-        predicted_entities = response["Entities"]
         # Remove entities we are not interested
-        filtered = filter(lambda ent: ent["Type"] in entities, predicted_entities)
-        span_labels = map(
-            lambda ent: Entity(ent["Type"], ent["BeginOffset"], ent["EndOffset"]),
-            filtered,
+        return [span for span in span_labels if span.entity_type in entities]
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        """Analyse texts with the batch API when the model has one.
+
+        Texts beyond the per-document byte limit of the batch API are split into
+        pieces and entities found in a piece are shifted back to offsets of its
+        text. Batches are sent through the request engine, i.e., concurrently when
+        max_concurrency is greater than one.
+        """
+        self.validate_entities(entities)
+
+        if self.batch_model_func is None:
+            return self._request_engine.map(
+                lambda text: self.analyse(text, entities), texts
+            )
+
+        # a piece is (index of text, character offset in text, content)
+        pieces = [
+            (text_index, offset, content)
+            for text_index, text in enumerate(texts)
+            for offset, content in split_text_by_bytes(
+                text, self.MAX_BATCH_DOCUMENT_BYTES
+            )
+        ]
+        piece_batches = list(batched(pieces, min(batch_size, self.MAX_BATCH_SIZE)))
+        batch_results = self._request_engine.map(
+            self._batch_detect,
+            [[content for _, _, content in batch] for batch in piece_batches],
         )
 
-        return list(span_labels)
+        span_labels: List[Optional[List[Entity]]] = [[] for _ in texts]
+        for batch, results in zip(piece_batches, batch_results):
+            for (text_index, offset, _), piece_labels in zip(batch, results):
+                text_labels = span_labels[text_index]
+                if piece_labels is None or text_labels is None:
+                    # a text fails when any of its pieces fails
+                    span_labels[text_index] = None
+                    continue
+                text_labels.extend(
+                    Entity(label.entity_type, label.start + offset, label.end + offset)
+                    for label in piece_labels
+                    if label.entity_type in entities
+                )
+        return span_labels
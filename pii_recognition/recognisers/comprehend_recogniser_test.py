@@ -1,9 +1,13 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
+from botocore.exceptions import ClientError
 from moto import mock_cognitoidentity
 from pii_recognition.labels.schema import Entity
-from pii_recognition.recognisers.comprehend_recogniser import ComprehendRecogniser
+from pii_recognition.recognisers.comprehend_recogniser import (
+    ComprehendRecogniser,
+    is_throttling_error,
+)
 
 
 @pytest.fixture
@@ -123,3 +127,174 @@ def test_comprehend_recogniser_analyse_for_non_supported_entities(text):
         "Only support ['LOCATION', 'OTHER'], but got "
         "['THOSE', 'ENTITIES', 'ARE', 'NOT', 'SUPPORTED']"
     )
+
+
+def test_is_throttling_error():
+    throttling = ClientError(
+        {"Error": {"Code": "ThrottlingException"}}, "DetectEntities"
+    )
+    assert is_throttling_error(throttling)
+
+    invalid = ClientError({"Error": {"Code": "TextSizeLimitExceededException"}}, "")
+    assert not is_throttling_error(invalid)
+    assert not is_throttling_error(ValueError())
+
+
+@patch("pii_recognition.recognisers.comprehend_recogniser.config_cognito_session")
+def test_comprehend_recogniser_analyse_batch_concurrently(mock_session):
+    responses = {
+        "Bob": {"Entities": [{"Type": "PERSON", "BeginOffset": 0, "EndOffset": 3}]},
+        "Melbourne": {
+            "Entities": [{"Type": "LOCATION", "BeginOffset": 0, "EndOffset": 9}]
+        },
+    }
+    throttled = []
+
+    # a local stub of the Comprehend client throttling the first call
+    def stub_detect_entities(Text, LanguageCode):
+        if not throttled:
+            throttled.append(Text)
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException"}}, "DetectEntities"
+            )
+        return responses[Text]
+
+    recogniser = ComprehendRecogniser(
+        supported_entities=["LOCATION", "PERSON"],
+        supported_languages=["en"],
+        model_name="ner",
+        max_concurrency=4,
+        max_retries=1,
+    )
+    recogniser.model_func = stub_detect_entities
+    # send a request per text
+    recogniser.batch_model_func = None
+    recogniser._request_engine.backoff = 0.0
+
+    actual = recogniser.analyse_batch(
+        ["Bob", "Melbourne", "Bob"], ["LOCATION", "PERSON"]
+    )
+    assert actual == [
+        [Entity("PERSON", 0, 3)],
+        [Entity("LOCATION", 0, 9)],
+        [Entity("PERSON", 0, 3)],
+    ]
+    assert len(throttled) == 1
+
+    with pytest.raises(AssertionError):
+        recogniser.analyse_batch(["Bob"], ["TIME"])
+
+
+@patch("pii_recognition.recognisers.comprehend_recogniser.config_cognito_session")
+def test_comprehend_recogniser_analyse_batch_with_batch_api(mock_session):
+    requests = []
+
+    # a local stub of the Comprehend batch API failing on a document
+    def stub_batch_detect_entities(TextList, LanguageCode):
+        requests.append(TextList)
+        result_list = [
+            {
+                "Index": index,
+                "Entities": [
+                    {"Type": "PERSON", "BeginOffset": 0, "EndOffset": 3},
+                    {"Type": "TIME", "BeginOffset": 4, "EndOffset": 7},
+                ],
+            }
+            for index, text in enumerate(TextList)
+            if text != "Fail"
+        ]
+        error_list = [
+            {"Index": index, "ErrorCode": "InternalServerException"}
+            for index, text in enumerate(TextList)
+            if text == "Fail"
+        ]
+        return {"ResultList": result_list, "ErrorList": error_list}
+
+    def stub_detect_entities(Text, LanguageCode):
+        return {"Entities": [{"Type": "PERSON", "BeginOffset": 0, "EndOffset": 4}]}
+
+    recogniser = ComprehendRecogniser(
+        supported_entities=["PERSON", "TIME"],
+        supported_languages=["en"],
+        model_name="ner",
+    )
+    recogniser.model_func = stub_detect_entities
+    recogniser.batch_model_func = stub_batch_detect_entities
+    recogniser.MAX_BATCH_DOCUMENT_BYTES = 8
+
+    actual = recogniser.analyse_batch(
+        ["Bob now", "Fail", "Tim now Ann Sun"], ["PERSON"], batch_size=2
+    )
+    assert actual == [
+        [Entity("PERSON", 0, 3)],
+        [Entity("PERSON", 0, 4)],
+        [Entity("PERSON", 0, 3), Entity("PERSON", 8, 11)],
+    ]
+    # the last text is split into two pieces due to the byte limit
+    assert requests == [["Bob now", "Fail"], ["Tim now ", "Ann Sun"]]
+
+
+@patch("pii_recognition.recognisers.comprehend_recogniser.config_cognito_session")
+def test_comprehend_recogniser_analyse_batch_with_failed_retries(mock_session):
+    # a local stub of the Comprehend batch API failing on a document
+    def stub_batch_detect_entities(TextList, LanguageCode):
+        return {
+            "ResultList": [
+                {
+                    "Index": index,
+                    "Entities": [{"Type": "PERSON", "BeginOffset": 0, "EndOffset": 3}],
+                }
+                for index, text in enumerate(TextList)
+                if not text.startswith("Fail")
+            ],
+            "ErrorList": [
+                {"Index": index, "ErrorCode": "InternalServerException"}
+                for index, text in enumerate(TextList)
+                if text.startswith("Fail")
+            ],
+        }
+
+    # and the retry of the document failing as well
+    def stub_detect_entities(Text, LanguageCode):
+        raise ClientError(
+            {"Error": {"Code": "InternalServerException"}}, "DetectEntities"
+        )
+
+    recogniser = ComprehendRecogniser(
+        supported_entities=["PERSON"], supported_languages=["en"], model_name="ner"
+    )
+    recogniser.model_func = stub_detect_entities
+    recogniser.batch_model_func = stub_batch_detect_entities
+    recogniser.MAX_BATCH_DOCUMENT_BYTES = 8
+
+    # only texts with a failed document fail, including pieces of long texts
+    actual = recogniser.analyse_batch(
+        ["Bob now", "Fail", "Tim now Fail", "Ann"], ["PERSON"]
+    )
+    assert actual == [[Entity("PERSON", 0, 3)], None, None, [Entity("PERSON", 0, 3)]]
+
+    # throttled retries still fail the batch for the request engine to retry
+    def stub_throttled_detect_entities(Text, LanguageCode):
+        raise ClientError({"Error": {"Code": "ThrottlingException"}}, "DetectEntities")
+
+    recogniser.model_func = stub_throttled_detect_entities
+    recogniser._request_engine.max_retries = 0
+    with pytest.raises(ClientError):
+        recogniser.analyse_batch(["Fail"], ["PERSON"])
+
+
+@patch("pii_recognition.recognisers.comprehend_recogniser.config_cognito_session")
+def test_comprehend_recogniser_analyse_batch_without_batch_api(mock_session):
+    recogniser = ComprehendRecogniser(
+        supported_entities=["PERSON"], supported_languages=["en"], model_name="pii"
+    )
+    assert recogniser.batch_model_func is None
+
+    recogniser.model_func = MagicMock(
+        return_value={
+            "Entities": [{"Type": "PERSON", "BeginOffset": 0, "EndOffset": 3}]
+        }
+    )
+    actual = recogniser.analyse_batch(["Bob", "Tim"], ["PERSON"])
+    assert actual == [[Entity("PERSON", 0, 3)], [Entity("PERSON", 0, 3)]]
+    assert recogniser.model_func.call_count == 2
@@ -1,26 +1,54 @@
-from typing import Dict, List
+import threading
+from typing import Any, Dict, List, Optional
 
-from pycrfsuite import Tagger
+from pycrfsuite import ItemSequence, Tagger
 
-from pii_recognition.features.word_to_features import word2features
-from pii_recognition.labels.schema import Entity, TokenLabel
-from pii_recognition.labels.span import token_labels_to_span_labels
+from pii_recognition.features.word_to_features import (
+    SentenceFeatureExtractor,
+    word2features,
+)
+from pii_recognition.labels.schema import Entity
+from pii_recognition.labels.span import tags_to_span_labels
 from pii_recognition.tokenisation import tokeniser_registry
 from pii_recognition.tokenisation.token_schema import Token
-from pii_recognition.utils import cached_property
+from pii_recognition.utils import batched, file_digest
 
 from .entity_recogniser import EntityRecogniser
 
 
 class CrfRecogniser(EntityRecogniser):
+    """
+    Conditional random field entity recogniser.
+
+    A crfsuite tagger is not safe to share across threads, so every thread tags
+    with its own tagger opened from model_path on first use, and the recogniser can
+    be driven from a thread pool.
+
+    Attributes:
+        supported_entities: the entities supported by this recogniser.
+        supported_languages: the languages supported by this recogniser.
+        model_path: path to a trained crfsuite model.
+        tokeniser_setup: name and config of a tokeniser in the tokeniser registry.
+        sentence_features: build features of a sentence at once rather than token
+            by token, features are identical either way.
+        feature_memo_size: maximum number of words whose features are kept across
+            sentences, only used with sentence_features.
+    """
+
     def __init__(
         self,
         supported_entities: List[str],
         supported_languages: List[str],
         model_path: str,
         tokeniser_setup: Dict,
+        sentence_features: bool = False,
+        feature_memo_size: int = 10000,
     ):
         self._model_path = model_path
+        self._local = threading.local()
+        self._sentence_feature_extractor: Optional[SentenceFeatureExtractor] = (
+            SentenceFeatureExtractor(feature_memo_size) if sentence_features else None
+        )
         self._tokeniser = tokeniser_registry.create_instance(
             tokeniser_setup["name"], tokeniser_setup.get("config")
         )
@@ -29,38 +57,87 @@ class CrfRecogniser(EntityRecogniser):
             supported_languages=supported_languages,
         )
 
-    @cached_property
+    @property
     def model(self) -> Tagger:
-        tagger = Tagger()
-        tagger.open(self._model_path)
+        """Tagger of the calling thread."""
+        tagger = getattr(self._local, "tagger", None)
+        if tagger is None:
+            tagger = Tagger()
+            tagger.open(self._model_path)
+            self._local.tagger = tagger
         return tagger
 
+    def model_version(self) -> str:
+        # a model retrained to the same path changes its content
+        return file_digest(self._model_path)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # taggers are reopened in the process the recogniser is sent to
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
     def preprocess_text(self, text: str) -> List[Token]:
         return self._tokeniser.tokenise(text)
 
     def build_features(self, tokenised_sentence: List[str]) -> List[List[str]]:
+        if self._sentence_feature_extractor is not None:
+            return self._sentence_feature_extractor(tokenised_sentence)
         return [
             word2features(tokenised_sentence, i) for i in range(len(tokenised_sentence))
         ]
 
+    def build_item_sequence(self, tokenised_sentence: List[str]) -> ItemSequence:
+        """Features of a sentence converted to crfsuite items, which the tagger
+        would otherwise convert on every call."""
+        return ItemSequence(self.build_features(tokenised_sentence))
+
+    def tag_sentences(self, tokenised_sentences: List[List[str]]) -> List[List[str]]:
+        """Tag many sentences with the tagger of the calling thread."""
+        tagger = self.model
+        return [
+            tagger.tag(self.build_item_sequence(tokens))
+            for tokens in tokenised_sentences
+        ]
+
+    def _to_span_labels(
+        self, tokens: List[Token], entity_tags: List[str], entities: List[str]
+    ) -> List[Entity]:
+        assert len(entity_tags) == len(tokens)
+        return tags_to_span_labels(
+            entity_tags,
+            [token.start for token in tokens],
+            [token.end for token in tokens],
+            entities,
+        )
+
     def analyse(self, text: str, entities: List[str]) -> List[Entity]:
         self.validate_entities(entities)
         # TODO: validate languages
 
         preprocessed_text = self.preprocess_text(text)
         tokens = [token.text for token in preprocessed_text]
-        features = self.build_features(tokens)
-        entity_tags = self.model.tag(features)
-
-        assert len(entity_tags) == len(tokens) == len(preprocessed_text)
-        token_labels = [
-            TokenLabel(
-                entity_type=entity_tags[i],
-                start=preprocessed_text[i].start,
-                end=preprocessed_text[i].end,
-            )
-            for i in range(len(entity_tags))
-        ]
+        (entity_tags,) = self.tag_sentences([tokens])
+        return self._to_span_labels(preprocessed_text, entity_tags, entities)
 
-        spans = token_labels_to_span_labels(token_labels)
-        return [span for span in spans if span.entity_type in entities]
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        """Tag batch_size texts at a time with the tagger of the calling thread."""
+        self.validate_entities(entities)
+
+        span_labels: List[Optional[List[Entity]]] = []
+        for batch in batched(texts, batch_size):
+            preprocessed_texts = [self.preprocess_text(text) for text in batch]
+            batch_tags = self.tag_sentences(
+                [[token.text for token in tokens] for tokens in preprocessed_texts]
+            )
+            span_labels.extend(
+                self._to_span_labels(tokens, entity_tags, entities)
+                for tokens, entity_tags in zip(preprocessed_texts, batch_tags)
+            )
+        return span_labels
@@ -1,3 +1,8 @@
+import os
+import pickle
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
 from unittest.mock import Mock, patch
 
 import pytest
@@ -58,3 +63,89 @@ def test_crf_recogniser_analyse(mock_tokeniser):
     assert (
         str(err.value) == "Only support ['PER', 'LOC'], but got ['PER', 'LOC', 'TIME']"
     )
+
+
+@patch.object(
+    target=tokeniser_registry,
+    attribute="create_instance",
+    new_callable=get_mock_tokeniser,
+)
+def test_crf_recogniser_sentence_features(mock_tokeniser):
+    tokeniser_setup = {"name": "fake_tokeniser"}
+    tokens = ["This", "is", "Bob", "from", "Melbourne", "."]
+    recogniser = CrfRecogniser(["PER"], ["en"], "fake_path", tokeniser_setup)
+    fast_recogniser = CrfRecogniser(
+        ["PER"],
+        ["en"],
+        "fake_path",
+        tokeniser_setup,
+        sentence_features=True,
+        feature_memo_size=100,
+    )
+
+    assert fast_recogniser.build_features(tokens) == recogniser.build_features(
+        tokens
+    )
+
+
+@patch.object(target=CrfRecogniser, attribute="model", new=get_mock_model())
+@patch.object(
+    target=tokeniser_registry,
+    attribute="create_instance",
+    new_callable=get_mock_tokeniser,
+)
+def test_crf_recogniser_analyse_batch(mock_tokeniser):
+    recogniser = CrfRecogniser(
+        ["PER", "LOC"], ["en"], "fake_path", {"name": "fake_tokeniser"}
+    )
+
+    actual = recogniser.analyse_batch(["fake_text"] * 3, ["PER"], batch_size=2)
+    assert actual == [[Entity("PER", 8, 11)]] * 3
+
+    with pytest.raises(AssertionError):
+        recogniser.analyse_batch(["fake_text"], entities=["TIME"])
+
+
+def test_crf_recogniser_with_exported_model():
+    recogniser = CrfRecogniser(
+        ["PER", "LOC", "ORG", "MISC"],
+        ["en"],
+        "pii_recognition/exported_models/conll2003-en.crfsuite",
+        {"name": "TreebankWordTokeniser"},
+    )
+    texts = [
+        "My name is Bob Smith and I live in Melbourne.",
+        "John works for Google in London.",
+        "",
+    ] * 4
+    entities = ["PER", "LOC", "ORG"]
+
+    expected = [recogniser.analyse(text, entities) for text in texts]
+    assert recogniser.analyse_batch(texts, entities, batch_size=5) == expected
+
+    # every thread tags with its own tagger
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        actual = list(executor.map(lambda t: recogniser.analyse(t, entities), texts))
+        taggers = set(executor.map(lambda _: id(recogniser.model), range(16)))
+    assert actual == expected
+    assert id(recogniser.model) not in taggers
+
+    # taggers are reopened after unpickling
+    restored = pickle.loads(pickle.dumps(recogniser))
+    assert restored.analyse_batch(texts, entities) == expected
+
+
+def test_crf_recogniser_prediction_version():
+    with TemporaryDirectory() as tmpdirname:
+        model_path = os.path.join(tmpdirname, "model.crfsuite")
+        shutil.copy("pii_recognition/exported_models/conll2003-en.crfsuite", model_path)
+        recogniser = CrfRecogniser(
+            ["PER"], ["en"], model_path, {"name": "TreebankWordTokeniser"}
+        )
+        actual = recogniser.prediction_version
+        assert actual == recogniser.prediction_version
+
+        # a model retrained to the same path changes the version
+        with open(model_path, "ab") as f:
+            f.write(b"retrained")
+        assert recogniser.prediction_version != actual
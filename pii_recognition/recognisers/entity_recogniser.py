@@ -1,7 +1,12 @@
+import hashlib
+import inspect
 from abc import ABCMeta, abstractmethod
+from functools import lru_cache
 from typing import List, Optional
 
+from pii_recognition import __version__
 from pii_recognition.labels.schema import Entity
+from pii_recognition.utils import file_digest
 
 
 class EntityRecogniser(metaclass=ABCMeta):
@@ -22,6 +27,25 @@ class EntityRecogniser(metaclass=ABCMeta):
         self.supported_entities = supported_entities
         self.supported_languages = supported_languages
 
+    @property
+    def prediction_version(self) -> str:
+        """Version of the predictions of the recogniser, predictions of another
+        version, e.g. cached ones, are stale.
+
+        It changes with the package, the version of the recogniser, the code of its
+        class and the version of its model.
+        """
+        parts = [__version__, self.version, _code_version(type(self))]
+        model_version = self.model_version()
+        if model_version is not None:
+            parts.append(model_version)
+        return "/".join(parts)
+
+    def model_version(self) -> Optional[str]:
+        """Version of the model predictions are made with, recognisers loading a
+        model should return one that changes when the model changes."""
+        return None
+
     def validate_entities(self, asked_entities: List[str]):
         """Check whether asked entities are supported by the model."""
         assert all(
@@ -38,3 +62,36 @@ class EntityRecogniser(metaclass=ABCMeta):
     def analyse(self, text: str, entities: List[str]) -> Optional[List[Entity]]:
         """Anotate asked entities in the text."""
         ...
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        """Anotate asked entities in every text of a batch.
+
+        The default implementation analyses texts one by one. Recognisers backed by
+        libraries with native batching should override it.
+
+        Args:
+            texts: texts to be annotated.
+            entities: entities asked to be annotated.
+            batch_size: number of texts a model processes at a time.
+
+        Returns:
+            Entities of every text, in the same order as texts.
+        """
+        return [self.analyse(text, entities) for text in texts]
+
+
+@lru_cache(maxsize=None)
+def _code_version(recogniser_class: type) -> str:
+    """Digest of the source files of a recogniser class and its base classes."""
+    digest = hashlib.sha256()
+    for cls in recogniser_class.__mro__:
+        try:
+            path = inspect.getsourcefile(cls)
+        except TypeError:
+            # built-in classes have no source
+            continue
+        if path is not None:
+            digest.update(file_digest(path).encode())
+    return digest.hexdigest()[:16]
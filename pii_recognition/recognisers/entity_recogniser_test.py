@@ -2,6 +2,9 @@ from unittest.mock import patch
 
 import pytest
 
+from pii_recognition import __version__
+from pii_recognition.labels.schema import Entity
+
 from .entity_recogniser import EntityRecogniser
 
 
@@ -41,3 +44,39 @@ def test_entity_recogniser_validation():
     with pytest.raises(AssertionError) as err:
         actual.validate_languages(["en", "pt"])
     assert str(err.value) == "Only support ['en'], but got ['en', 'pt']"
+
+
+@patch.object(target=EntityRecogniser, attribute="__abstractmethods__", new=set())
+def test_entity_recogniser_analyse_batch():
+    recogniser = EntityRecogniser(  # type: ignore
+        supported_entities=["PER"], supported_languages=["en"]
+    )
+
+    with patch.object(recogniser, "analyse") as mock_analyse:
+        mock_analyse.side_effect = lambda text, entities: [Entity("PER", 0, len(text))]
+        actual = recogniser.analyse_batch(["Bob", "Alice"], ["PER"], batch_size=1)
+
+    assert actual == [[Entity("PER", 0, 3)], [Entity("PER", 0, 5)]]
+
+
+@patch.object(target=EntityRecogniser, attribute="__abstractmethods__", new=set())
+def test_entity_recogniser_prediction_version():
+    recogniser = EntityRecogniser(  # type: ignore
+        supported_entities=["PER"], supported_languages=["en"]
+    )
+    actual = recogniser.prediction_version
+    assert actual.startswith(f"{__version__}/0.0.1/")
+    # stable across instances
+    assert actual == EntityRecogniser(  # type: ignore
+        supported_entities=["LOC"], supported_languages=["en"]
+    ).prediction_version
+
+    # changes with the version of the recogniser and of its model
+    recogniser.version = "0.0.2"
+    assert recogniser.prediction_version != actual
+    recogniser.version = "0.0.1"
+    with patch.object(recogniser, "model_version", return_value="model-a"):
+        model_a = recogniser.prediction_version
+    with patch.object(recogniser, "model_version", return_value="model-b"):
+        model_b = recogniser.prediction_version
+    assert len({actual, model_a, model_b}) == 3
@@ -1,7 +1,7 @@
 from typing import Dict, List
 
-from pii_recognition.labels.schema import Entity, TokenLabel
-from pii_recognition.labels.span import token_labels_to_span_labels
+from pii_recognition.labels.schema import Entity
+from pii_recognition.labels.span import tags_to_span_labels
 from pii_recognition.tokenisation import tokeniser_registry
 
 from .entity_recogniser import EntityRecogniser
@@ -39,12 +39,9 @@ class FirstLetterUppercaseRecogniser(EntityRecogniser):
         entity_tags = [self.PER if token.text.istitle() else "O" for token in tokens]
         assert len(tokens) == len(entity_tags)
 
-        token_labels = [
-            TokenLabel(
-                entity_type=entity_tags[i], start=tokens[i].start, end=tokens[i].end
-            )
-            for i in range(len(tokens))
-        ]
-
-        spans = token_labels_to_span_labels(token_labels)
-        return [span for span in spans if span.entity_type in entities]
+        return tags_to_span_labels(
+            entity_tags,
+            [token.start for token in tokens],
+            [token.end for token in tokens],
+            entities,
+        )
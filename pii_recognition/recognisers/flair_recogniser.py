@@ -1,10 +1,12 @@
-from typing import List
+import os
+from typing import List, Optional
 
+import flair
 from flair.data import Sentence
 from flair.models import SequenceTagger
 
 from pii_recognition.labels.schema import Entity
-from pii_recognition.utils import cached_property
+from pii_recognition.utils import cached_property, file_digest
 
 from .entity_recogniser import EntityRecogniser
 
@@ -36,15 +38,34 @@ class FlairRecogniser(EntityRecogniser):
     def model(self):
         return SequenceTagger.load(self.model_name)
 
-    def analyse(self, text: str, entities: List[str]) -> List[Entity]:
-        self.validate_entities(entities)
-
-        sentence = Sentence(text)
-        self.model.predict(sentence)
+    def model_version(self) -> str:
+        # a model file, otherwise a named model downloaded by this flair version
+        if os.path.isfile(self.model_name):
+            return file_digest(self.model_name)
+        return f"flair={flair.__version__} {self.model_name}"
 
+    def _parse_sentence(self, sentence: Sentence, entities: List[str]) -> List[Entity]:
         span_labels = []
         for entity in sentence.get_spans("ner"):
             if entity.tag in entities:
                 span_labels.append(Entity(entity.tag, entity.start_pos, entity.end_pos))
 
         return span_labels
+
+    def analyse(self, text: str, entities: List[str]) -> List[Entity]:
+        self.validate_entities(entities)
+
+        sentence = Sentence(text)
+        self.model.predict(sentence)
+
+        return self._parse_sentence(sentence, entities)
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        self.validate_entities(entities)
+
+        sentences = [Sentence(text) for text in texts]
+        self.model.predict(sentences, mini_batch_size=batch_size)
+
+        return [self._parse_sentence(sentence, entities) for sentence in sentences]
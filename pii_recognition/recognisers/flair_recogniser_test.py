@@ -50,3 +50,23 @@ def test_flair_analyse():
         str(err.value)
         == "Only support ['PER', 'LOC', 'ORG', 'MISC'], but got ['PER', 'LOC', 'TIME']"
     )
+
+
+@patch("pii_recognition.recognisers.flair_recogniser.Sentence", new=mock_sentence())
+@patch("pii_recognition.recognisers.flair_recogniser.SequenceTagger")
+def test_flair_analyse_batch(mock_tagger):
+    recogniser = FlairRecogniser(
+        supported_entities=["PER", "LOC", "ORG", "MISC"],
+        supported_languages=["en"],
+        model_name="fake_model",
+    )
+
+    actual = recogniser.analyse_batch([text, text], entities=["PER"], batch_size=16)
+    assert actual == [[Entity("PER", 8, 11)], [Entity("PER", 8, 11)]]
+
+    # sentences are predicted in one call
+    mock_predict = mock_tagger.load.return_value.predict
+    mock_predict.assert_called_once()
+    args, kwargs = mock_predict.call_args
+    assert len(args[0]) == 2
+    assert kwargs == {"mini_batch_size": 16}
@@ -1,30 +1,64 @@
-from typing import Dict, List
+import threading
+from typing import Dict, List, Optional
 
 from decouple import config
+from google.api_core.exceptions import ServiceUnavailable, TooManyRequests
 from google.cloud import language_v1
 from google.cloud.language_v1 import AnalyzeEntitiesResponse, LanguageServiceClient
 from pii_recognition.labels.schema import Entity
 from pii_recognition.utils import TextIndexer
 
 from .entity_recogniser import EntityRecogniser
+from .request_engine import ConcurrentRequestEngine
+
+
+def is_throttling_error(err: Exception) -> bool:
+    # ResourceExhausted, quota errors in gRPC, is a subclass of TooManyRequests
+    return isinstance(err, (TooManyRequests, ServiceUnavailable))
 
 
 class GoogleRecogniser(EntityRecogniser):
+    """
+    Google Cloud Natural Language entity recogniser.
+
+    Attributes:
+        supported_entities: the entities supported by this recogniser.
+        supported_languages: the languages supported by this recogniser.
+        max_concurrency: maximum number of requests in flight in analyse_batch.
+        max_requests_per_second: request rate limit to stay under service quotas,
+            no limit if None.
+        max_retries: maximum number of retries for a throttled request.
+    """
+
     CREDENTIALS_PATH = config("GOOGLE_APPLICATION_CREDENTIALS")
 
-    def __init__(self, supported_entities: List[str], supported_languages: List[str]):
+    def __init__(
+        self,
+        supported_entities: List[str],
+        supported_languages: List[str],
+        max_concurrency: int = 1,
+        max_requests_per_second: Optional[float] = None,
+        max_retries: int = 3,
+    ):
+        self._request_engine = ConcurrentRequestEngine(
+            max_in_flight=max_concurrency,
+            max_rate=max_requests_per_second,
+            max_retries=max_retries,
+            is_retryable=is_throttling_error,
+        )
+        self._client: Optional[LanguageServiceClient] = None
+        self._client_lock = threading.Lock()
         super().__init__(
             supported_entities=supported_entities,
             supported_languages=supported_languages,
         )
 
-    @property
-    def request_template(self) -> Dict:
+    def _build_request(self, text: str) -> Dict:
         # supported languages: zh zh-Hant en fr de it ja ko pt ru es
         # https://cloud.google.com/natural-language/docs/languages
         return {
             "document": {
-                "content": None,  # it's a placeholder
+                "content": text,
                 "type_": language_v1.Document.Type.PLAIN_TEXT,
                 "language": "en",  # Start with english
             },
@@ -33,9 +67,28 @@ class GoogleRecogniser(EntityRecogniser):
 
     @property
     def client(self) -> LanguageServiceClient:
-        return language_v1.LanguageServiceClient.from_service_account_json(
-            self.CREDENTIALS_PATH
-        )
+        """A client created on first use and then shared by all calls.
+
+        Reading credentials and setting up the gRPC channel is far more expensive than
+        analysing a short text, so the channel is reused until close is called. The
+        client is thread safe, so is its creation.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = (
+                        language_v1.LanguageServiceClient.from_service_account_json(
+                            self.CREDENTIALS_PATH
+                        )
+                    )
+        return self._client
+
+    def close(self):
+        """Close the gRPC channel of the client, a new one is created on next use."""
+        with self._client_lock:
+            if self._client is not None:
+                self._client.transport.grpc_channel.close()
+                self._client = None
 
     def _parse_response(
         self, response: AnalyzeEntitiesResponse, indexer: TextIndexer
@@ -63,12 +116,18 @@ class GoogleRecogniser(EntityRecogniser):
     def analyse(self, text: str, entities: List[str]) -> List[Entity]:
         self.validate_entities(entities)
 
-        # this avoids mutating state of request template
-        request = self.request_template
-        request["document"]["content"] = text
-
+        request = self._build_request(text)
         response = self.client.analyze_entities(request)
         text_indexer = TextIndexer(text)
         span_labels = self._parse_response(response, text_indexer)
 
         return list(filter(lambda ent: ent.entity_type in entities, span_labels))
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        self.validate_entities(entities)
+
+        return self._request_engine.map(
+            lambda text: self.analyse(text, entities), texts
+        )
@@ -1,11 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 
+from google.api_core.exceptions import InvalidArgument, ResourceExhausted
 from google.cloud.language_v1 import AnalyzeEntitiesResponse
 from mock import patch
 from pii_recognition.labels.schema import Entity
 from pytest import fixture, raises
 
-from .google_recogniser import GoogleRecogniser
+from .google_recogniser import GoogleRecogniser, is_throttling_error
 
 
 @fixture
@@ -84,3 +86,66 @@ def test_google_recogniser_for_analyse(mock_client, text, response):
     )
     actual = recogniser.analyse(text, recogniser.supported_entities)
     assert actual == [Entity("OTHER", 14, 21), Entity("NUMBER", 42, 44)]
+
+
+def test_is_throttling_error():
+    assert is_throttling_error(ResourceExhausted("quota"))
+    assert not is_throttling_error(InvalidArgument("bad request"))
+
+
+@patch("pii_recognition.recognisers.google_recogniser.GoogleRecogniser.client")
+def test_google_recogniser_for_analyse_batch(mock_client, text, response):
+    # the stub client is throttled once before responding
+    mock_client.analyze_entities.side_effect = [
+        ResourceExhausted("quota"),
+        response,
+        response,
+    ]
+
+    recogniser = GoogleRecogniser(
+        supported_entities=["OTHER", "NUMBER"],
+        supported_languages=["en"],
+        max_concurrency=2,
+        max_requests_per_second=100,
+    )
+    recogniser._request_engine.backoff = 0.0
+
+    actual = recogniser.analyse_batch([text, text], ["NUMBER"])
+    assert actual == [[Entity("NUMBER", 42, 44)], [Entity("NUMBER", 42, 44)]]
+    assert mock_client.analyze_entities.call_count == 3
+
+
+@patch(
+    "pii_recognition.recognisers.google_recogniser.language_v1.LanguageServiceClient"
+    ".from_service_account_json"
+)
+def test_google_recogniser_for_client_reuse(mock_from_json, text, response):
+    mock_from_json.return_value.analyze_entities.return_value = response
+    recogniser = GoogleRecogniser(
+        supported_entities=["OTHER", "NUMBER"], supported_languages=["en"]
+    )
+
+    # client is created lazily
+    mock_from_json.assert_not_called()
+
+    # and once only, even with concurrent callers
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        actual = list(
+            executor.map(lambda t: recogniser.analyse(t, ["NUMBER"]), [text] * 8)
+        )
+    assert actual == [[Entity("NUMBER", 42, 44)]] * 8
+    mock_from_json.assert_called_once_with("TestingPath")
+
+    # request is built with the text
+    request = mock_from_json.return_value.analyze_entities.call_args[0][0]
+    assert request["document"]["content"] == text
+
+    # closing releases the channel and a new client is created on next use
+    recogniser.close()
+    channel = mock_from_json.return_value.transport.grpc_channel
+    channel.close.assert_called_once()
+    recogniser.close()
+    channel.close.assert_called_once()
+
+    recogniser.analyse(text, ["NUMBER"])
+    assert mock_from_json.call_count == 2
@@ -0,0 +1,230 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from pii_recognition.labels.schema import Entity
+from pii_recognition.utils import percentile
+
+from .entity_recogniser import EntityRecogniser
+
+
+class _Request(NamedTuple):
+    text: str
+    entities: List[str]
+    future: Future
+    submitted: float
+
+
+class MicroBatchScheduler:
+    """
+    Accumulate concurrent analyse calls into batches of a recogniser.
+
+    Texts submitted from any number of threads are queued and dispatched by a single
+    thread to analyse_batch of the recogniser. A batch is dispatched once it has
+    max_batch_size texts or its first text has waited max_wait seconds, so a lone
+    text waits at most max_wait and texts queued while a batch is analysed are taken
+    at once. Texts asking different entities are dispatched in separate calls. When
+    a batch fails, its texts are analysed one by one so that a bad text only fails
+    its own caller.
+
+    The recogniser is only called from the dispatching thread, which is started by
+    the first submitted text.
+
+    Attributes:
+        recogniser: the recogniser texts are dispatched to.
+        max_batch_size: maximum number of texts in a batch.
+        max_wait: maximum seconds the first text of a batch waits for others.
+        window: number of most recent waits percentiles are computed on.
+        clock: a monotonic clock returning time in seconds.
+    """
+
+    def __init__(
+        self,
+        recogniser: EntityRecogniser,
+        max_batch_size: int = 32,
+        max_wait: float = 0.002,
+        window: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(
+                f"max_batch_size must be a positive integer but got {max_batch_size}"
+            )
+        if max_wait < 0:
+            raise ValueError(f"max_wait must not be negative but got {max_wait}")
+
+        self.recogniser = recogniser
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.window = window
+        self.clock = clock
+
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+        self._batch_sizes: Counter = Counter()
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._max_queue_depth = 0
+
+    def submit(self, text: str, entities: List[str]) -> Future:
+        """Queue a text to be analysed.
+
+        Returns:
+            A future resolving to entities of the text, or to the error the
+            recogniser raised on it.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot submit to a closed scheduler.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+            future: Future = Future()
+            self._queue.put(_Request(text, entities, future, self.clock()))
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return future
+
+    def analyse(self, text: str, entities: List[str]) -> Optional[List[Entity]]:
+        """Analyse a text in a batch with texts of other callers and wait for it."""
+        return self.submit(text, entities).result()
+
+    def close(self):
+        """Dispatch texts already queued and stop the dispatching thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch sizes and seconds texts waited in the queue before dispatched."""
+        with self._lock:
+            batch_sizes = dict(self._batch_sizes)
+            waits = list(self._waits)
+        batches = sum(batch_sizes.values())
+        texts = sum(size * count for size, count in batch_sizes.items())
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self._max_queue_depth,
+            "batches": batches,
+            "mean_batch_size": texts / batches if batches else 0.0,
+            "batch_sizes": {
+                str(size): batch_sizes[size] for size in sorted(batch_sizes)
+            },
+            "wait_p50_ms": percentile(waits, 50) * 1000,
+            "wait_p99_ms": percentile(waits, 99) * 1000,
+        }
+
+    def __enter__(self) -> "MicroBatchScheduler":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = first.submitted + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self.clock()
+                try:
+                    if timeout > 0:
+                        request = self._queue.get(timeout=timeout)
+                    else:
+                        request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            # texts cancelled by their callers are not analysed, the others can no
+            # longer be cancelled
+            batch = [request for request in batch if _start(request.future)]
+            try:
+                self._dispatch(batch)
+            except Exception as err:
+                # keep dispatching, texts of the failed batch fail their callers
+                for request in batch:
+                    _set_exception(request.future, err)
+
+    def _dispatch(self, batch: List[_Request]):
+        dispatched = self.clock()
+        groups: Dict[Tuple[str, ...], List[_Request]] = dict()
+        for request in batch:
+            groups.setdefault(tuple(request.entities), []).append(request)
+
+        with self._lock:
+            self._waits.extend(dispatched - request.submitted for request in batch)
+            self._batch_sizes.update(len(group) for group in groups.values())
+
+        for key, group in groups.items():
+            entities = list(key)
+            texts = [request.text for request in group]
+            try:
+                predictions = self.recogniser.analyse_batch(
+                    texts, entities, batch_size=len(texts)
+                )
+            except Exception as err:
+                if len(group) == 1:
+                    _set_exception(group[0].future, err)
+                    continue
+                for request in group:
+                    _resolve(
+                        request.future, self.recogniser.analyse, request.text, entities
+                    )
+                continue
+
+            if len(predictions) != len(group):
+                mismatch = RuntimeError(
+                    f"Recogniser returned {len(predictions)} predictions for "
+                    f"{len(group)} texts."
+                )
+                for request in group:
+                    _set_exception(request.future, mismatch)
+                continue
+
+            for request, prediction in zip(group, predictions):
+                _set_result(request.future, prediction)
+
+
+# futures are guarded as a caller may resolve or cancel its future at any time
+def _start(future: Future) -> bool:
+    try:
+        return future.set_running_or_notify_cancel()
+    except RuntimeError:
+        # already resolved
+        return False
+
+
+def _set_result(future: Future, result: Any):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: Future, err: Exception):
+    if not future.done():
+        future.set_exception(err)
+
+
+def _resolve(future: Future, function: Callable, *args):
+    try:
+        result = function(*args)
+    except Exception as err:
+        _set_exception(future, err)
+        return
+    _set_result(future, result)
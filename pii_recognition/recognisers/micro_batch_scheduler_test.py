@@ -0,0 +1,132 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pii_recognition.labels.schema import Entity
+
+from .micro_batch_scheduler import MicroBatchScheduler
+
+
+def test_MicroBatchScheduler_for_max_batch_size(stub_recogniser):
+    recogniser = stub_recogniser()
+    with MicroBatchScheduler(recogniser, max_batch_size=4, max_wait=0) as scheduler:
+        blocking = scheduler.submit("block", ["PER"])
+        recogniser.entered.wait()
+        # texts are queued while the recogniser is busy
+        futures = [scheduler.submit(f"Bob {i}", ["PER"]) for i in range(10)]
+        recogniser.released.set()
+
+        assert blocking.result() == []
+        assert [future.result() for future in futures] == [[Entity("PER", 0, 3)]] * 10
+        stats = scheduler.stats()
+
+    assert [len(texts) for texts, _ in recogniser.batches] == [1, 4, 4, 2]
+    assert stats["batches"] == 4
+    assert stats["batch_sizes"] == {"1": 1, "2": 1, "4": 2}
+    assert stats["mean_batch_size"] == 11 / 4
+    assert stats["max_queue_depth"] >= 10
+    assert stats["queue_depth"] == 0
+    assert stats["wait_p99_ms"] >= stats["wait_p50_ms"] > 0
+
+
+def test_MicroBatchScheduler_for_max_wait(stub_recogniser):
+    recogniser = stub_recogniser()
+    with MicroBatchScheduler(recogniser, max_batch_size=4, max_wait=0.2) as scheduler:
+        start = time.perf_counter()
+        futures = [scheduler.submit("Bob", ["PER"]), scheduler.submit("Ann", ["PER"])]
+        assert [future.result() for future in futures] == [[Entity("PER", 0, 3)], []]
+        # the first text waited for others until max_wait
+        assert time.perf_counter() - start >= 0.2
+
+    assert recogniser.batches == [(["Bob", "Ann"], ["PER"])]
+
+
+def test_MicroBatchScheduler_for_entities_and_failures(stub_recogniser):
+    recogniser = stub_recogniser()
+    with MicroBatchScheduler(recogniser, max_batch_size=8, max_wait=0.2) as scheduler:
+        futures = [
+            scheduler.submit("Bob", ["PER"]),
+            scheduler.submit("Bob", ["LOC"]),
+            scheduler.submit("crash", ["PER"]),
+            scheduler.submit("Bob", ["PER"]),
+        ]
+        assert futures[0].result() == [Entity("PER", 0, 3)]
+        assert futures[1].result() == [Entity("PER", 0, 3)]
+        with pytest.raises(RuntimeError) as err:
+            futures[2].result()
+        assert str(err.value) == "crashed"
+        # a bad text only fails itself
+        assert futures[3].result() == [Entity("PER", 0, 3)]
+
+    # texts asking different entities are dispatched separately
+    assert recogniser.batches == [
+        (["Bob", "crash", "Bob"], ["PER"]),
+        (["Bob"], ["LOC"]),
+    ]
+
+
+def test_MicroBatchScheduler_for_cancelled_texts(stub_recogniser):
+    recogniser = stub_recogniser()
+    with MicroBatchScheduler(recogniser, max_batch_size=4, max_wait=0) as scheduler:
+        blocking = scheduler.submit("block", ["PER"])
+        recogniser.entered.wait()
+        cancelled = scheduler.submit("Bob cancelled", ["PER"])
+        assert cancelled.cancel()
+        future = scheduler.submit("Bob", ["PER"])
+        recogniser.released.set()
+
+        assert blocking.result() == []
+        assert future.result(timeout=5) == [Entity("PER", 0, 3)]
+        # the scheduler keeps dispatching after a caller resolved its own future
+        blocking = scheduler.submit("Bob", ["PER"])
+        blocking.set_result([])
+        assert scheduler.analyse("Bob", ["PER"]) == [Entity("PER", 0, 3)]
+
+    assert recogniser.batches[:2] == [(["block"], ["PER"]), (["Bob"], ["PER"])]
+
+
+def test_MicroBatchScheduler_for_missing_predictions(stub_recogniser):
+    recogniser = stub_recogniser()
+    with MicroBatchScheduler(recogniser, max_batch_size=4, max_wait=0.2) as scheduler:
+        with patch.object(recogniser, "analyse_batch", return_value=[[]]):
+            futures = [scheduler.submit("Bob", ["PER"]) for _ in range(2)]
+            for future in futures:
+                with pytest.raises(RuntimeError) as err:
+                    future.result(timeout=5)
+                assert str(err.value) == (
+                    "Recogniser returned 1 predictions for 2 texts."
+                )
+
+        # the scheduler keeps dispatching after a failed batch
+        with patch.object(scheduler, "_dispatch", side_effect=KeyError("failed")):
+            with pytest.raises(KeyError):
+                scheduler.analyse("Bob", ["PER"])
+        assert scheduler.analyse("Bob", ["PER"]) == [Entity("PER", 0, 3)]
+
+
+def test_MicroBatchScheduler_close(stub_recogniser):
+    recogniser = stub_recogniser()
+    scheduler = MicroBatchScheduler(recogniser, max_wait=10)
+    future = scheduler.submit("Bob", ["PER"])
+    # texts already queued are dispatched without waiting
+    scheduler.close()
+    assert future.result(timeout=0) == [Entity("PER", 0, 3)]
+
+    with pytest.raises(RuntimeError) as err:
+        scheduler.analyse("Bob", ["PER"])
+    assert str(err.value) == "Cannot submit to a closed scheduler."
+    scheduler.close()
+
+    # nothing to close when nothing has been submitted
+    MicroBatchScheduler(recogniser).close()
+
+
+def test_MicroBatchScheduler_for_invalid_inputs(stub_recogniser):
+    with pytest.raises(ValueError) as err:
+        MicroBatchScheduler(stub_recogniser(), max_batch_size=0)
+    assert str(err.value) == "max_batch_size must be a positive integer but got 0"
+
+    with pytest.raises(ValueError) as err:
+        MicroBatchScheduler(stub_recogniser(), max_wait=-1)
+    assert str(err.value) == "max_wait must not be negative but got -1"
@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimiter:
+    """
+    Space out requests evenly so that no more than max_rate requests are started
+    per second. It is safe to share a limiter across threads.
+
+    Attributes:
+        max_rate: maximum number of requests per second.
+        clock: a monotonic clock returning time in seconds.
+        sleep: a function blocking the calling thread for given seconds.
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if max_rate <= 0:
+            raise ValueError(f"max_rate must be positive but got {max_rate}")
+
+        self._interval = 1.0 / max_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the caller is allowed to send a request."""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+
+        wait = slot - now
+        if wait > 0:
+            self._sleep(wait)
+
+
+class ConcurrentRequestEngine:
+    """
+    Send blocking requests concurrently from a thread pool.
+
+    Results are returned in the order of the requested items. Requests failing with
+    a retryable error, e.g. throttling by a cloud service, are retried with
+    exponential backoff.
+
+    Attributes:
+        max_in_flight: maximum number of requests waiting for responses at a time.
+        max_rate: maximum number of requests per second, no limit if None.
+        max_retries: maximum number of retries for a failed request.
+        backoff: seconds to wait before the first retry, doubled on every retry.
+        is_retryable: a function telling whether an error is worth retrying.
+        sleep: a function blocking the calling thread for given seconds.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 1,
+        max_rate: Optional[float] = None,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        is_retryable: Callable[[Exception], bool] = lambda err: False,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if max_in_flight < 1:
+            raise ValueError(
+                f"max_in_flight must be a positive integer but got {max_in_flight}"
+            )
+
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._is_retryable = is_retryable
+        self._sleep = sleep
+        self._rate_limiter = (
+            RateLimiter(max_rate, sleep=sleep) if max_rate is not None else None
+        )
+
+    def _send(self, request: Callable[[T], R], item: T) -> R:
+        attempt = 0
+        while True:
+            if self._rate_limiter:
+                self._rate_limiter.acquire()
+            try:
+                return request(item)
+            except Exception as err:
+                if attempt >= self.max_retries or not self._is_retryable(err):
+                    raise
+                self._sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+
+    def map(self, request: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Apply request to every item concurrently and keep the order of items.
+
+        The first error that is not retried is raised once all submitted requests
+        have finished.
+        """
+        send = partial(self._send, request)
+        if self.max_in_flight == 1:
+            return [send(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            return list(executor.map(send, items))
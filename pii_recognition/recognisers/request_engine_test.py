@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+from typing import List
+
+import pytest
+
+from .request_engine import ConcurrentRequestEngine, RateLimiter
+
+
+class ThrottlingError(Exception):
+    pass
+
+
+class StubClient:
+    """A local stand-in of a cloud service which throttles some requests."""
+
+    def __init__(self, throttle_times: int = 0):
+        self.throttle_times = throttle_times
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def detect(self, text: str) -> str:
+        with self._lock:
+            self.calls.append(text)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            throttled = self.throttle_times > 0
+            if throttled:
+                self.throttle_times -= 1
+
+        time.sleep(random.uniform(0, 0.01))
+        with self._lock:
+            self.in_flight -= 1
+
+        if throttled:
+            raise ThrottlingError(text)
+        return text.upper()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_rate_limiter():
+    clock = FakeClock()
+    limiter = RateLimiter(max_rate=4, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == [0.25, 0.25]
+
+    # no wait once the schedule has been caught up
+    clock.now += 10
+    limiter.acquire()
+    assert clock.sleeps == [0.25, 0.25]
+
+    with pytest.raises(ValueError) as err:
+        RateLimiter(max_rate=0)
+    assert str(err.value) == "max_rate must be positive but got 0"
+
+
+def test_concurrent_request_engine_preserves_order():
+    client = StubClient()
+    engine = ConcurrentRequestEngine(max_in_flight=4)
+    texts = [f"text {i}" for i in range(20)]
+
+    actual = engine.map(client.detect, texts)
+    assert actual == [text.upper() for text in texts]
+    assert 1 < client.max_in_flight <= 4
+
+
+def test_concurrent_request_engine_serial():
+    client = StubClient()
+    engine = ConcurrentRequestEngine(max_in_flight=1)
+
+    actual = engine.map(client.detect, ["a", "b", "c"])
+    assert actual == ["A", "B", "C"]
+    assert client.calls == ["a", "b", "c"]
+    assert client.max_in_flight == 1
+
+
+def test_concurrent_request_engine_retries_on_throttling():
+    client = StubClient(throttle_times=2)
+    sleeps: List[float] = []
+    engine = ConcurrentRequestEngine(
+        max_in_flight=1,
+        max_retries=3,
+        backoff=0.1,
+        is_retryable=lambda err: isinstance(err, ThrottlingError),
+        sleep=sleeps.append,
+    )
+
+    actual = engine.map(client.detect, ["a", "b"])
+    assert actual == ["A", "B"]
+    assert client.calls == ["a", "a", "a", "b"]
+    assert sleeps == [0.1, 0.2]
+
+
+def test_concurrent_request_engine_gives_up_retrying():
+    client = StubClient(throttle_times=3)
+    engine = ConcurrentRequestEngine(
+        max_in_flight=2,
+        max_retries=2,
+        is_retryable=lambda err: isinstance(err, ThrottlingError),
+        sleep=lambda seconds: None,
+    )
+
+    with pytest.raises(ThrottlingError):
+        engine.map(client.detect, ["a"])
+    assert client.calls == ["a", "a", "a"]
+
+
+def test_concurrent_request_engine_does_not_retry_other_errors():
+    calls = []
+
+    def failing_request(text: str):
+        calls.append(text)
+        raise KeyError(text)
+
+    engine = ConcurrentRequestEngine(
+        is_retryable=lambda err: isinstance(err, ThrottlingError)
+    )
+    with pytest.raises(KeyError):
+        engine.map(failing_request, ["a"])
+    assert calls == ["a"]
+
+    with pytest.raises(ValueError) as err:
+        ConcurrentRequestEngine(max_in_flight=0)
+    assert str(err.value) == "max_in_flight must be a positive integer but got 0"
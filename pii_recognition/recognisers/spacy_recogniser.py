@@ -1,7 +1,9 @@
-from typing import List
+import os
+from typing import List, Optional
 
 import spacy
 from spacy.lang.xx import MultiLanguage
+from spacy.tokens import Doc
 
 from pii_recognition.labels.schema import Entity
 from pii_recognition.utils import cached_property
@@ -36,10 +38,14 @@ class SpacyRecogniser(EntityRecogniser):
     def model(self) -> MultiLanguage:
         return spacy.load(self._model_name, disable=["parser", "tagger"])
 
-    def analyse(self, text: str, entities: List[str]) -> List[Entity]:
-        self.validate_entities(entities)
+    def model_version(self) -> str:
+        # models are installed as packages or loaded from a directory
+        model_version = spacy.util.get_package_version(self._model_name)
+        if model_version is None and os.path.isdir(self._model_name):
+            model_version = spacy.util.get_model_meta(self._model_name)["version"]
+        return f"spacy={spacy.__version__} {self._model_name}={model_version}"
 
-        doc = self.model(text)
+    def _parse_doc(self, doc: Doc, entities: List[str]) -> List[Entity]:
         spacy_entities = [entity for entity in doc.ents]
 
         filtered_entities = list(filter(lambda x: x.label_ in entities, spacy_entities))
@@ -50,3 +56,17 @@ class SpacyRecogniser(EntityRecogniser):
             )
             for entity in filtered_entities
         ]
+
+    def analyse(self, text: str, entities: List[str]) -> List[Entity]:
+        self.validate_entities(entities)
+
+        doc = self.model(text)
+        return self._parse_doc(doc, entities)
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        self.validate_entities(entities)
+
+        docs = self.model.pipe(texts, batch_size=batch_size)
+        return [self._parse_doc(doc, entities) for doc in docs]
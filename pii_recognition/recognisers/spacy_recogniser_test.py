@@ -18,6 +18,9 @@ class MockEntity(NamedTuple):
 def get_mock_model():
     model = Mock()
     model.return_value.ents = [MockEntity("PER", 8, 11), MockEntity("LOC", 17, 26)]
+    model.pipe.side_effect = lambda texts, batch_size: [
+        model.return_value for _ in texts
+    ]
 
     load_model = Mock()
     load_model.return_value = model
@@ -44,3 +47,15 @@ def test_spacy_recogniser(text):
     assert (
         str(err.value) == "Only support ['PER', 'LOC'], but got ['PER', 'LOC', 'TIME']"
     )
+
+
+@patch.object(target=SpacyRecogniser, attribute="model", new_callable=get_mock_model())
+def test_spacy_recogniser_analyse_batch(text):
+    recogniser = SpacyRecogniser(["PER", "LOC"], ["en"], model_name="fake_model")
+
+    actual = recogniser.analyse_batch([text, text], entities=["LOC"], batch_size=8)
+    assert actual == [[Entity("LOC", 17, 26)], [Entity("LOC", 17, 26)]]
+    recogniser.model.pipe.assert_called_once_with([text, text], batch_size=8)
+
+    with pytest.raises(AssertionError):
+        recogniser.analyse_batch([text], entities=["TIME"])
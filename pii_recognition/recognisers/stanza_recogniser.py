@@ -1,9 +1,10 @@
-from typing import List
+from typing import List, Optional
 
-from stanza import Pipeline
+import stanza
+from stanza import Document, Pipeline
 
 from pii_recognition.labels.schema import Entity
-from pii_recognition.utils import cached_property
+from pii_recognition.utils import batched, cached_property
 
 from .entity_recogniser import EntityRecogniser
 
@@ -37,15 +38,40 @@ class StanzaRecogniser(EntityRecogniser):
         # environmental variable called STANZA_RESOURCES_DIR
         return Pipeline(self.model_name)
 
-    def analyse(self, text: str, entities: List[str]) -> List[Entity]:
-        self.validate_entities(entities)
-
-        results = self.model(text)
+    def model_version(self) -> str:
+        # models are downloaded for the version of stanza
+        return f"stanza={stanza.__version__} {self.model_name}"
 
+    def _parse_document(self, document: Document, entities: List[str]) -> List[Entity]:
         span_labels = []
-        for entity in results.entities:
+        for entity in document.entities:
             if entity.type in entities:
                 span_labels.append(
                     Entity(entity.type, entity.start_char, entity.end_char)
                 )
         return span_labels
+
+    def analyse(self, text: str, entities: List[str]) -> List[Entity]:
+        self.validate_entities(entities)
+
+        results = self.model(text)
+        return self._parse_document(results, entities)
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str], batch_size: int = 32
+    ) -> List[Optional[List[Entity]]]:
+        self.validate_entities(entities)
+
+        # bulk processing is available from stanza 1.2.1
+        if not hasattr(self.model, "bulk_process"):
+            return [self.analyse(text, entities) for text in texts]
+
+        span_labels: List[Optional[List[Entity]]] = []
+        for batch in batched(texts, batch_size):
+            documents = self.model.bulk_process(
+                [Document([], text=text) for text in batch]
+            )
+            span_labels.extend(
+                [self._parse_document(document, entities) for document in documents]
+            )
+        return span_labels
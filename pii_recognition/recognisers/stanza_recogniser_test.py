@@ -21,6 +21,9 @@ def mock_pipeline():
         MockStanzaSpan("PERSON", 8, 11),
         MockStanzaSpan("LOC", 17, 26),
     ]
+    pipeline.return_value.bulk_process.side_effect = lambda documents: [
+        pipeline.return_value.return_value for _ in documents
+    ]
     return pipeline
 
 
@@ -49,3 +52,35 @@ def test_stanza_analyse(text):
         str(err.value)
         == "Only support ['PERSON', 'LOC', 'ORG'], but got ['PERSON', 'LOC', 'TIME']"
     )
+
+
+@patch("pii_recognition.recognisers.stanza_recogniser.Pipeline", new=mock_pipeline())
+def test_stanza_analyse_batch(text):
+    recogniser = StanzaRecogniser(
+        supported_entities=["PERSON", "LOC", "ORG"],
+        supported_languages=["en"],
+        model_name="en",
+    )
+
+    actual = recogniser.analyse_batch([text] * 3, entities=["LOC"], batch_size=2)
+    assert actual == [[Entity("LOC", 17, 26)]] * 3
+
+    # documents are processed in bulk, one call per batch
+    bulk_calls = recogniser.model.bulk_process.call_args_list
+    assert [len(args[0]) for args, _ in bulk_calls] == [2, 1]
+    assert bulk_calls[0][0][0][0].text == text
+
+
+@patch("pii_recognition.recognisers.stanza_recogniser.Pipeline")
+def test_stanza_analyse_batch_without_bulk_process(mock_pipeline, text):
+    mock_pipeline.return_value = Mock(spec=["__call__"])
+    mock_pipeline.return_value.return_value.entities = [MockStanzaSpan("LOC", 17, 26)]
+    recogniser = StanzaRecogniser(
+        supported_entities=["PERSON", "LOC", "ORG"],
+        supported_languages=["en"],
+        model_name="en",
+    )
+
+    actual = recogniser.analyse_batch([text] * 2, entities=["LOC"])
+    assert actual == [[Entity("LOC", 17, 26)]] * 2
+    assert mock_pipeline.return_value.call_count == 2
@@ -1,17 +1,147 @@
-from typing import Dict, Generic, Optional, Type, TypeVar
+import importlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, Tuple, Type, TypeVar
 
 T_co = TypeVar("T_co", covariant=True)
 
 
+def canonicalise_config(config: Optional[Dict]) -> str:
+    """A string equal for equal configs regardless of key order, no config is the
+    same as an empty config."""
+    try:
+        return json.dumps(config or {}, sort_keys=True, separators=(",", ":"))
+    except TypeError as err:
+        raise TypeError(f"Config must be JSON serialisable to be cached: {err}")
+
+
 class Registry(dict, Generic[T_co]):
+    """
+    Classes registered by name and created from configs.
+
+    A class registered lazily is recorded by its dotted import path and imported on
+    first lookup, so registering it does not load its module and dependencies.
+
+    Instances created with cached=True are kept and returned again for the same name
+    and config, so heavyweight models are loaded once in a long-lived process. An
+    instance is built once however many threads ask for it at the same time, and
+    building it does not hold up threads asking for other instances. When more than
+    max_cached_instances are kept, the least recently used one is dropped but not
+    closed, as callers may still be using it; it is released once they are done.
+
+    Attributes:
+        max_cached_instances: maximum number of instances kept.
+    """
+
+    def __init__(self, max_cached_instances: int = 4):
+        super().__init__()
+        if max_cached_instances < 1:
+            raise ValueError(
+                f"max_cached_instances must be a positive integer but got "
+                f"{max_cached_instances}"
+            )
+
+        self.max_cached_instances = max_cached_instances
+        self._instances: "OrderedDict[Tuple[str, str], T_co]" = OrderedDict()
+        self._instances_lock = threading.RLock()
+        # a lock per instance being built, threads asking for it wait on its lock
+        self._build_locks: Dict[Tuple[str, str], threading.Lock] = dict()
+
     def register(self, item: Type[T_co], name: Optional[str] = None):
         if name:
             self[name] = item
         else:
             self[getattr(item, "__name__")] = item
 
-    def create_instance(self, name: str, config: Optional[Dict] = None) -> T_co:
+    def register_lazy(self, path: str, name: Optional[str] = None):
+        """Register a class by its dotted import path, e.g. "package.module.Class",
+        under the class name unless a name is given."""
+        module_name, _, class_name = path.rpartition(".")
+        if not module_name:
+            raise ValueError(f"Expect a dotted import path of a class but got {path}")
+
+        self[name or class_name] = path
+
+    def __getitem__(self, name: str) -> Any:
+        item = super().__getitem__(name)
+        if isinstance(item, str):
+            item = _import_class(item)
+            self[name] = item
+        return item
+
+    def create_instance(
+        self, name: str, config: Optional[Dict] = None, cached: bool = False
+    ) -> T_co:
         if config is None:
             config = {}
 
-        return self[name](**config)
+        if not cached:
+            return self[name](**config)
+
+        key = (name, canonicalise_config(config))
+        with self._instances_lock:
+            if key in self._instances:
+                self._instances.move_to_end(key)
+                return self._instances[key]
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._instances_lock:
+                # built by the thread this one waited for
+                if key in self._instances:
+                    self._instances.move_to_end(key)
+                    return self._instances[key]
+
+            try:
+                instance = self[name](**config)
+                with self._instances_lock:
+                    self._instances[key] = instance
+                    while len(self._instances) > self.max_cached_instances:
+                        self._instances.popitem(last=False)
+            finally:
+                with self._instances_lock:
+                    self._build_locks.pop(key, None)
+            return instance
+
+    def evict_instance(self, name: str, config: Optional[Dict] = None) -> bool:
+        """Drop and close the cached instance of a name and config.
+
+        Returns:
+            Whether there was such an instance.
+        """
+        key = (name, canonicalise_config(config))
+        with self._instances_lock:
+            if key not in self._instances:
+                return False
+            instance = self._instances.pop(key)
+
+        _close(instance)
+        return True
+
+    def clear_instances(self):
+        """Drop and close all cached instances."""
+        with self._instances_lock:
+            instances = list(self._instances.values())
+            self._instances.clear()
+        for instance in instances:
+            _close(instance)
+
+    @property
+    def cached_instances(self) -> int:
+        return len(self._instances)
+
+
+def _import_class(path: str) -> Type:
+    module_name, _, class_name = path.rpartition(".")
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, class_name)
+    except AttributeError:
+        raise ImportError(f"Module {module_name} has no class {class_name}")
+
+
+def _close(instance: object):
+    close = getattr(instance, "close", None)
+    if callable(close):
+        close()
@@ -1,5 +1,10 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+import pytest
+
 from .registry import Registry
 
 
@@ -31,3 +36,141 @@ def test_Registry_create_instance():
     actual = registry.create_instance(name="ToyClass", config={"a": "value_a"})
     assert isinstance(actual, ToyClass)
     assert actual.a == "value_a"
+
+
+def test_Registry_create_cached_instance():
+    class ToyModel:
+        def __init__(self, a, b=None):
+            self.a = a
+            self.b = b
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    registry = Registry[Any](max_cached_instances=2)
+    registry.register(ToyModel)
+
+    config = {"a": 1, "b": [1, 2]}
+    first = registry.create_instance("ToyModel", config, cached=True)
+    # the same config in another key order
+    actual = registry.create_instance("ToyModel", {"b": [1, 2], "a": 1}, cached=True)
+    assert actual is first
+    assert registry.create_instance("ToyModel", config) is not first
+    assert registry.cached_instances == 1
+
+    second = registry.create_instance("ToyModel", {"a": 2}, cached=True)
+    # first is the most recently used now
+    assert registry.create_instance("ToyModel", config, cached=True) is first
+    third = registry.create_instance("ToyModel", {"a": 3}, cached=True)
+    assert registry.cached_instances == 2
+    # the evicted instance may still be in use, so it is not closed
+    assert not second.closed and not first.closed and not third.closed
+
+    assert registry.evict_instance("ToyModel", {"a": 3})
+    assert not registry.evict_instance("ToyModel", {"a": 3})
+    assert third.closed
+    assert registry.create_instance("ToyModel", {"a": 3}, cached=True) is not third
+
+    registry.clear_instances()
+    assert registry.cached_instances == 0
+    assert first.closed
+    assert registry.create_instance("ToyModel", {"a": 2}, cached=True) is not second
+
+
+def test_Registry_create_cached_instance_concurrently():
+    building = threading.Event()
+    release = threading.Event()
+    built = []
+
+    class SlowModel:
+        def __init__(self, a):
+            built.append(a)
+            if a == "slow":
+                building.set()
+                release.wait(timeout=10)
+
+    registry = Registry[Any]()
+    registry.register(SlowModel)
+    fast = registry.create_instance("SlowModel", {"a": "fast"}, cached=True)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        slow = [
+            executor.submit(registry.create_instance, "SlowModel", {"a": "slow"}, True)
+            for _ in range(3)
+        ]
+        building.wait()
+        # other instances are not held up while one is built
+        assert registry.create_instance("SlowModel", {"a": "fast"}, cached=True) is fast
+        assert registry.create_instance("SlowModel", {"a": "new"}, cached=True)
+        assert not any(future.done() for future in slow)
+        release.set()
+        instances = [future.result() for future in slow]
+
+    # built once for all threads asking for it
+    assert built == ["fast", "slow", "new"]
+    assert instances[0] is instances[1] is instances[2]
+
+    # a failed build lets the next caller try again
+    class BrokenModel:
+        def __init__(self):
+            raise RuntimeError("broken")
+
+    registry.register(BrokenModel)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            registry.create_instance("BrokenModel", cached=True)
+    assert registry._build_locks == {}
+
+
+def test_Registry_create_cached_instance_for_invalid_inputs():
+    class ToyClass:
+        def __init__(self, a):
+            self.a = a
+
+    registry = Registry[Any]()
+    registry.register(ToyClass)
+
+    with pytest.raises(TypeError) as err:
+        registry.create_instance("ToyClass", {"a": object()}, cached=True)
+    assert str(err.value).startswith("Config must be JSON serialisable to be cached")
+
+    with pytest.raises(ValueError) as err:
+        Registry[Any](max_cached_instances=0)
+    assert str(err.value) == "max_cached_instances must be a positive integer but got 0"
+
+
+def test_Registry_register_lazy(tmp_path, monkeypatch):
+    (tmp_path / "toy_module.py").write_text(
+        "class ToyClass:\n    def __init__(self, a):\n        self.a = a\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    registry = Registry[Any]()
+    registry.register_lazy("toy_module.ToyClass")
+    registry.register_lazy("toy_module.ToyClass", "TClass")
+    assert "ToyClass" in registry and "TClass" in registry
+    assert "toy_module" not in sys.modules
+
+    actual = registry.create_instance(name="ToyClass", config={"a": "value_a"})
+    assert "toy_module" in sys.modules
+    assert actual.a == "value_a"
+    assert registry["TClass"] is registry["ToyClass"] is type(actual)
+    monkeypatch.delitem(sys.modules, "toy_module")
+
+
+def test_Registry_register_lazy_for_invalid_paths():
+    registry = Registry[Any]()
+
+    with pytest.raises(ValueError) as err:
+        registry.register_lazy("ToyClass")
+    assert str(err.value) == "Expect a dotted import path of a class but got ToyClass"
+
+    registry.register_lazy("json.ToyClass")
+    with pytest.raises(ImportError) as err:
+        registry.create_instance("ToyClass")
+    assert str(err.value) == "Module json has no class ToyClass"
+
+    registry.register_lazy("not_a_module.ToyClass")
+    with pytest.raises(ModuleNotFoundError):
+        registry.create_instance("ToyClass")
@@ -0,0 +1,79 @@
+import json
+import socket
+from http.client import HTTPConnection
+from typing import Any, Dict, List, Optional
+
+from pii_recognition.labels.schema import Entity
+
+from .server import parse_address
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        # the host only fills the Host header
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class RecogniserClient:
+    """
+    A client of RecogniserServer keeping its connection alive across requests.
+
+    A client is not thread safe, every thread should have its own.
+
+    Attributes:
+        address: "unix:<path>" or "<host>:<port>" of the server.
+        timeout: seconds to wait for the server, forever if None.
+    """
+
+    def __init__(self, address: str, timeout: Optional[float] = None):
+        self.address = address
+        self.timeout = timeout
+        parsed = parse_address(address)
+        if isinstance(parsed, str):
+            self._connection: HTTPConnection = _UnixHTTPConnection(parsed, timeout)
+        else:
+            host, port = parsed
+            self._connection = HTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method: str, path: str, body: Optional[Dict] = None) -> Any:
+        content = None if body is None else json.dumps(body).encode()
+        headers = {"Content-Type": "application/json"} if content else {}
+        self._connection.request(method, path, content, headers)
+        response = self._connection.getresponse()
+        result = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(
+                f"Server responded {response.status} to {path}: {result['error']}"
+            )
+        return result
+
+    def analyse(self, text: str, entities: List[str]) -> Optional[List[Entity]]:
+        result = self._request("POST", "/analyse", {"text": text, "entities": entities})
+        return _deserialise(result["entities"])
+
+    def analyse_batch(
+        self, texts: List[str], entities: List[str]
+    ) -> List[Optional[List[Entity]]]:
+        result = self._request(
+            "POST", "/analyse_batch", {"texts": texts, "entities": entities}
+        )
+        return [_deserialise(prediction) for prediction in result["entities"]]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request("GET", "/stats")
+
+    def close(self):
+        self._connection.close()
+
+
+def _deserialise(prediction: Optional[List[Dict]]) -> Optional[List[Entity]]:
+    if prediction is None:
+        return None
+    return [Entity(**entity) for entity in prediction]
@@ -0,0 +1,310 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from pii_recognition.labels.schema import Entity
+from pii_recognition.recognisers import registry as recogniser_registry
+from pii_recognition.recognisers.entity_recogniser import EntityRecogniser
+from pii_recognition.recognisers.micro_batch_scheduler import MicroBatchScheduler
+from pii_recognition.utils import percentile
+
+UNIX_PREFIX = "unix:"
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """Parse "unix:<path>" to a socket path or "<host>:<port>" to a host and port."""
+    if address.startswith(UNIX_PREFIX):
+        return address[len(UNIX_PREFIX) :]
+
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(
+            f"Expect an address of unix:<path> or <host>:<port> but got {address}"
+        )
+    return host, int(port)
+
+
+def _remove_stale_socket(path: str):
+    """Remove a socket file left by a server that was killed. Anything else at the
+    path, including the socket of a running server, is kept and raises an error."""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"Cannot bind to {path}, it is not a socket.")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+    raise FileExistsError(f"Cannot bind to {path}, a server is listening on it.")
+
+
+class LatencyStats:
+    """
+    Latencies of the most recent requests and counters since the server started.
+
+    Attributes:
+        window: number of most recent latencies percentiles are computed on.
+        requests: number of requests served.
+        errors: number of requests failed.
+    """
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self.requests = 0
+        self.errors = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, failed: bool = False):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.requests += 1
+            self.errors += failed
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            latencies = list(self._latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+
+
+def _serialise(prediction: Optional[List[Entity]]) -> Optional[List[Dict]]:
+    if prediction is None:
+        return None
+    return [asdict(entity) for entity in prediction]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # keep connections alive so that clients do not connect on every request
+    protocol_version = "HTTP/1.1"
+    server: Any
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._respond(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._respond(200, self.server.recogniser_server.stats())
+        else:
+            self._respond(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        recogniser_server = self.server.recogniser_server
+        failed = True
+        try:
+            status, body = self._post(recogniser_server)
+            failed = status != 200
+        finally:
+            recogniser_server.latency.record(time.perf_counter() - start, failed)
+        self._respond(status, body)
+
+    def _post(self, recogniser_server: "RecogniserServer") -> Tuple[int, Dict]:
+        if self.path not in ("/analyse", "/analyse_batch"):
+            return 404, {"error": f"Unknown path {self.path}"}
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            texts = [request["text"]] if self.path == "/analyse" else request["texts"]
+            if not isinstance(texts, list) or not all(
+                isinstance(text, str) for text in texts
+            ):
+                raise TypeError("text must be a string and texts a list of strings")
+            entities = request["entities"]
+            recogniser_server.recogniser.validate_entities(entities)
+        except (ValueError, KeyError, TypeError, AssertionError) as err:
+            return 400, {"error": f"Invalid request: {err!r}"}
+
+        futures = [recogniser_server.submit(text, entities) for text in texts]
+        try:
+            predictions = [_serialise(future.result()) for future in futures]
+        except Exception as err:
+            return 500, {"error": f"Recogniser failed: {err!r}"}
+
+        if self.path == "/analyse":
+            return 200, {"entities": predictions[0]}
+        return 200, {"entities": predictions}
+
+    def _respond(self, status: int, body: Dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def address_string(self) -> str:
+        # clients of a Unix socket have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args):
+        # requests are accounted in the stats rather than logged one by one
+        ...
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class RecogniserServer:
+    """
+    Serve a recogniser over HTTP on a TCP or Unix socket.
+
+    Texts of concurrent requests are coalesced into batches of the recogniser by a
+    MicroBatchScheduler.
+    Endpoints are:
+        POST /analyse {"text": str, "entities": [str]}
+        POST /analyse_batch {"texts": [str], "entities": [str]}
+        GET /stats, latency percentiles, queue depth and batch sizes
+        GET /health
+
+    Entities are returned as {"entity_type": str, "start": int, "end": int}.
+
+    Attributes:
+        recogniser: the recogniser serving requests.
+        address: "unix:<path>" or "<host>:<port>", the port is the one bound when
+            port 0 is asked.
+        scheduler: the scheduler batching texts of requests.
+        latency: latencies of requests.
+    """
+
+    def __init__(
+        self,
+        recogniser: EntityRecogniser,
+        address: str,
+        max_batch_size: int = 32,
+        max_wait: float = 0.002,
+        latency_window: int = 10000,
+    ):
+        self.recogniser = recogniser
+        # the dispatching thread starts on the first request, after workers forked
+        self.scheduler = MicroBatchScheduler(
+            recogniser, max_batch_size, max_wait, latency_window
+        )
+        self.latency = LatencyStats(latency_window)
+        self._started = time.time()
+
+        parsed = parse_address(address)
+        self._socket_path: Optional[str] = None
+        self._http_server: socketserver.BaseServer
+        if isinstance(parsed, str):
+            _remove_stale_socket(parsed)
+            self._socket_path = parsed
+            self._http_server = _UnixHTTPServer(parsed, _RequestHandler)
+            self.address = address
+        else:
+            tcp_server = ThreadingHTTPServer(parsed, _RequestHandler)
+            self._http_server = tcp_server
+            self.address = f"{parsed[0]}:{tcp_server.server_port}"
+        self._http_server.recogniser_server = self  # type: ignore
+        self._owner_pid = os.getpid()
+
+    def submit(self, text: str, entities: List[str]) -> Future:
+        """Queue a text to be analysed, the future resolves to its entities."""
+        return self.scheduler.submit(text, entities)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": time.time() - self._started,
+            **self.latency.summary(),
+            **self.scheduler.stats(),
+        }
+
+    def serve_forever(self):
+        """Serve requests until shutdown is called from another thread."""
+        try:
+            self._http_server.serve_forever()
+        finally:
+            self.scheduler.close()
+
+    def shutdown(self):
+        self._http_server.shutdown()
+
+    def close(self):
+        self._http_server.server_close()
+        # workers forked from the owner share the socket file
+        if self._socket_path and os.getpid() == self._owner_pid:
+            os.remove(self._socket_path)
+            self._socket_path = None
+
+
+def serve(
+    recogniser_name: str,
+    recogniser_params: Optional[Dict],
+    address: str,
+    num_workers: int = 1,
+    max_batch_size: int = 32,
+    max_wait: float = 0.002,
+):
+    """Load a recogniser once and serve it from num_workers processes.
+
+    The socket is bound and the model loaded before workers are forked, workers
+    accept connections on the same socket and share the memory of the model until
+    they write to it. Stats are kept per worker. The server stops on SIGINT or
+    SIGTERM.
+    """
+    if num_workers < 1:
+        raise ValueError(
+            f"num_workers must be a positive integer but got {num_workers}"
+        )
+
+    recogniser = recogniser_registry.create_instance(recogniser_name, recogniser_params)
+    server = RecogniserServer(recogniser, address, max_batch_size, max_wait)
+    print(f"Serving {recogniser_name} on {server.address} with {num_workers} workers")
+
+    if num_workers == 1:
+        _serve_until_signalled(server)
+        server.close()
+        return
+
+    pids = []
+    for _ in range(num_workers):
+        pid = os.fork()
+        if pid == 0:
+            _serve_until_signalled(server)
+            os._exit(0)
+        pids.append(pid)
+
+    def stop_workers(signum, frame):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop_workers)
+    signal.signal(signal.SIGTERM, stop_workers)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    server.close()
+
+
+def _serve_until_signalled(server: RecogniserServer):
+    def stop(signum, frame):
+        # shutdown blocks until serve_forever returns, so it cannot be called from
+        # the thread serving
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    server.serve_forever()
@@ -0,0 +1,38 @@
+"""CLI support for serving a recogniser."""
+import argparse
+
+from pii_recognition.serving.server import serve
+from pii_recognition.utils import load_yaml_file
+
+parser = argparse.ArgumentParser(prog="recogniser_server")
+parser.add_argument(
+    "--config_yaml",
+    help="Path of config yaml file with recogniser_name and recogniser_params",
+)
+parser.add_argument(
+    "--address",
+    default="unix:/tmp/pii_recogniser.sock",
+    help="unix:<path> of a Unix socket or <host>:<port> to listen on",
+)
+parser.add_argument("--num_workers", type=int, default=1)
+parser.add_argument("--max_batch_size", type=int, default=32)
+parser.add_argument(
+    "--max_wait_ms",
+    type=float,
+    default=2.0,
+    help="Maximum milliseconds a text waits for others to be batched with",
+)
+args = parser.parse_args()
+
+config = load_yaml_file(args.config_yaml)
+if not config:
+    raise ValueError("Config YAML is empty.")
+
+serve(
+    config["recogniser_name"],
+    config.get("recogniser_params"),
+    args.address,
+    args.num_workers,
+    args.max_batch_size,
+    args.max_wait_ms / 1000,
+)
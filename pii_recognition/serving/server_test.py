@@ -0,0 +1,157 @@
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import pytest
+
+from pii_recognition.labels.schema import Entity
+
+from .client import RecogniserClient
+from .server import LatencyStats, RecogniserServer, parse_address
+
+
+@pytest.fixture
+def serving():
+    servers = []
+
+    def start(address: str, **kwargs) -> RecogniserServer:
+        server = RecogniserServer(kwargs.pop("recogniser"), address, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.close()
+
+
+def test_parse_address():
+    assert parse_address("unix:/tmp/a.sock") == "/tmp/a.sock"
+    assert parse_address("127.0.0.1:8080") == ("127.0.0.1", 8080)
+
+    with pytest.raises(ValueError) as err:
+        parse_address("127.0.0.1")
+    assert str(err.value) == (
+        "Expect an address of unix:<path> or <host>:<port> but got 127.0.0.1"
+    )
+
+
+def test_LatencyStats():
+    stats = LatencyStats(window=2)
+    stats.record(1.0)
+    stats.record(0.002, failed=True)
+    stats.record(0.001)
+
+    actual = stats.summary()
+    assert actual == {"requests": 3, "errors": 1, "p50_ms": 2.0, "p99_ms": 2.0}
+
+
+def test_RecogniserServer_on_unix_socket(tmp_path, serving, stub_recogniser):
+    address = f"unix:{tmp_path / 'server.sock'}"
+    server = serving(address, recogniser=stub_recogniser())
+    client = RecogniserClient(address)
+
+    assert client.analyse("Bob is here", ["PER"]) == [Entity("PER", 0, 3)]
+    assert client.analyse_batch(["Bob", "Alice"], ["PER"]) == [
+        [Entity("PER", 0, 3)],
+        [],
+    ]
+
+    stats = client.stats()
+    assert stats["requests"] == 2
+    assert stats["errors"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["p99_ms"] >= stats["p50_ms"] > 0
+    client.close()
+
+    server.shutdown()
+    server.close()
+    assert not (tmp_path / "server.sock").exists()
+
+
+def test_RecogniserServer_for_existing_socket_paths(tmp_path, serving, stub_recogniser):
+    path = tmp_path / "server.sock"
+    address = f"unix:{path}"
+
+    # a socket left by a server that was killed is replaced
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    serving(address, recogniser=stub_recogniser())
+    assert RecogniserClient(address).analyse("Bob", ["PER"]) == [Entity("PER", 0, 3)]
+
+    # the socket of a running server is kept
+    with pytest.raises(FileExistsError) as err:
+        RecogniserServer(stub_recogniser(), address)
+    assert str(err.value) == f"Cannot bind to {path}, a server is listening on it."
+    assert RecogniserClient(address).analyse("Bob", ["PER"]) == [Entity("PER", 0, 3)]
+
+    # so is any other file
+    other = tmp_path / "other"
+    other.write_text("keep me")
+    with pytest.raises(FileExistsError) as err:
+        RecogniserServer(stub_recogniser(), f"unix:{other}")
+    assert str(err.value) == f"Cannot bind to {other}, it is not a socket."
+    assert other.read_text() == "keep me"
+
+
+def test_RecogniserServer_for_coalescing(serving, stub_recogniser):
+    recogniser = stub_recogniser(delay=0.05)
+    server = serving("127.0.0.1:0", recogniser=recogniser, max_batch_size=8)
+
+    def analyse(index: int) -> Optional[List[Entity]]:
+        client = RecogniserClient(server.address)
+        prediction = client.analyse(f"Bob {index}", ["PER"])
+        client.close()
+        return prediction
+
+    with ThreadPoolExecutor(16) as executor:
+        predictions = list(executor.map(analyse, range(32)))
+
+    assert predictions == [[Entity("PER", 0, 3)]] * 32
+    batch_sizes = [len(texts) for texts, _ in recogniser.batches]
+    assert sum(batch_sizes) == 32
+    assert max(batch_sizes) <= 8
+    # requests arriving while a batch is analysed are coalesced
+    assert len(batch_sizes) < 32
+    assert server.stats()["mean_batch_size"] > 1
+
+
+def test_RecogniserServer_for_failures(serving, stub_recogniser):
+    server = serving("127.0.0.1:0", recogniser=stub_recogniser())
+    client = RecogniserClient(server.address)
+
+    with pytest.raises(RuntimeError) as err:
+        client.analyse("Bob", ["ORG"])
+    assert str(err.value).startswith("Server responded 400 to /analyse")
+
+    with pytest.raises(RuntimeError) as err:
+        client.analyse_batch(["Bob", "crash"], ["PER"])
+    assert str(err.value) == (
+        "Server responded 500 to /analyse_batch: "
+        "Recogniser failed: RuntimeError('crashed')"
+    )
+
+    # malformed texts are rejected before reaching the recogniser
+    for path, body in [
+        ("/analyse", {"text": ["Bob"], "entities": ["PER"]}),
+        ("/analyse_batch", {"texts": "Bob", "entities": ["PER"]}),
+        ("/analyse_batch", {"texts": ["Bob", 1], "entities": ["PER"]}),
+    ]:
+        with pytest.raises(RuntimeError) as err:
+            client._request("POST", path, body)
+        assert str(err.value) == (
+            f"Server responded 400 to {path}: Invalid request: "
+            "TypeError('text must be a string and texts a list of strings')"
+        )
+
+    # the connection is still usable
+    assert client.analyse("Bob", ["PER"]) == [Entity("PER", 0, 3)]
+    assert client.stats()["errors"] == 5
+    client.close()
+
+    with pytest.raises(ValueError) as err:
+        RecogniserServer(stub_recogniser(), "127.0.0.1:0", max_batch_size=0)
+    assert str(err.value) == "max_batch_size must be a positive integer but got 0"
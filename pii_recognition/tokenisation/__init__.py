@@ -4,12 +4,17 @@ from pii_recognition.tokenisation.detokenisers import (
     SpaceJoinDetokeniser,
     TreebankWordDetokeniser,
 )
-from pii_recognition.tokenisation.tokenisers import Tokeniser, TreebankWordTokeniser
+from pii_recognition.tokenisation.tokenisers import (
+    FastTreebankWordTokeniser,
+    Tokeniser,
+    TreebankWordTokeniser,
+)
 
 
 def tokeniser_init() -> Registry:
     registry = Registry[Tokeniser]()
     registry.register(TreebankWordTokeniser)
+    registry.register(FastTreebankWordTokeniser)
 
     return registry
 
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 
 @dataclass
 class Token:
+    __slots__ = ("text", "start", "end")
+
     text: str
     start: int
     end: int
@@ -1,5 +1,11 @@
+import re
+import threading
 from abc import ABCMeta, abstractmethod
-from typing import List
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import chain
+from typing import List, Set, Tuple
 
 from nltk.tokenize import TreebankWordTokenizer as TreebankWordTokenizer_
 
@@ -27,3 +33,157 @@ class TreebankWordTokeniser(Tokeniser):
             Token(text=text[span[0] : span[1]], start=span[0], end=span[1])
             for span in spans
         ]
+
+
+# Treebank rules for a text free of double quotes and rare contractions, where they
+# can all be found on the original text, see _find_cuts
+_COMMA_COLON = re.compile(r"([:,])([^\d])")
+_FINAL_COMMA_COLON = re.compile(r"[:,]\n?\Z")
+_ELLIPSIS = re.compile(r"\.\.\.")
+_PADDED = re.compile(r"[;@#$%&?!]")
+_PARENS_DASH = re.compile(r"[\]\[(){}<>]|--")
+_FINAL_PERIOD = re.compile(r"\.([\]\)}>']*)\s*\Z")
+_APOSTROPHE = re.compile(r"'")
+_CONTRACTION = re.compile(r"'(?:ll|LL|re|RE|ve|VE)|n't|N'T")
+_PUNCTUATION = re.compile(r"[,:.;@#$%&?!\]\[(){}<>'-]")
+_NON_SPACE = re.compile(r"\S+")
+# double quotes and rare contractions go through the full cascade of NLTK
+_NEEDS_NLTK = re.compile(
+    r"[\"`]|''|cannot|d'ye|gimme|gonna|gotta|lemme|more'n|'tis|'twas|wanna",
+    re.IGNORECASE,
+)
+
+
+def _find_cuts(text: str) -> List[int]:
+    """Positions where the Treebank rules split a text, in ascending order.
+
+    Rules are applied in the order of TreebankWordTokenizer. A rule looking at
+    spaces sees a space wherever an earlier rule has cut, rather than the text
+    being rewritten for every rule.
+    """
+    cuts: Set[int] = set()
+    for match in _COMMA_COLON.finditer(text):
+        cuts.update(match.span(1))
+
+    final_comma = _FINAL_COMMA_COLON.search(text)
+    if final_comma:
+        cuts.update((final_comma.start(), final_comma.start() + 1))
+
+    ellipsis_ends = set()
+    for match in _ELLIPSIS.finditer(text):
+        cuts.update(match.span())
+        ellipsis_ends.add(match.end())
+
+    for match in _PADDED.finditer(text):
+        cuts.update(match.span())
+
+    # the final period is split unless it follows another period, a period ending
+    # an ellipsis does not count as it has been split already
+    final_period = _FINAL_PERIOD.search(text)
+    if final_period:
+        start = final_period.start()
+        if start > 0 and (text[start - 1] != "." or start in ellipsis_ends):
+            cuts.update((start, final_period.end(1)))
+
+    apostrophes = [match.start() for match in _APOSTROPHE.finditer(text)]
+
+    def followed_by_space(i: int) -> bool:
+        return i in cuts or (i < len(text) and text[i] == " ")
+
+    # an apostrophe followed by a space is split
+    cuts.update([i for i in apostrophes if followed_by_space(i + 1)])
+
+    for match in _PARENS_DASH.finditer(text):
+        cuts.update(match.span())
+
+    # texts are padded with spaces before splitting off 's, 'm, 'd and the like
+    cuts.add(len(text))
+    cuts.update(
+        [
+            i
+            for i in apostrophes
+            if i > 0
+            and (
+                followed_by_space(i + 1)
+                or (text[i + 1] in "sSmMdD" and followed_by_space(i + 2))
+            )
+        ]
+    )
+    cuts.update(
+        [
+            match.start()
+            for match in _CONTRACTION.finditer(text)
+            if match.start() > 0
+            and text[match.start() - 1] != "'"
+            and followed_by_space(match.end())
+        ]
+    )
+    return sorted(cuts)
+
+
+class FastTreebankWordTokeniser(Tokeniser):
+    """
+    Produce the same tokens as TreebankWordTokeniser.
+
+    Split positions of the Treebank rules are found on the original text with a few
+    precompiled regexes, rather than rewriting the text rule by rule and aligning
+    tokens back to it. Texts with double quotes or rare contractions, e.g. "gonna",
+    fall back to NLTK. Token offsets of the last cache_size texts are kept, so a
+    text tokenised again, e.g. by an evaluator and then a recogniser, is looked up.
+
+    Attributes:
+        cache_size: maximum number of texts whose token offsets are kept, no cache
+            if 0.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        if cache_size < 0:
+            raise ValueError(f"cache_size must not be negative but got {cache_size}")
+
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @cached_property
+    def _engine(self) -> TreebankWordTokenizer_:
+        return TreebankWordTokenizer_()
+
+    def span_tokenise(self, text: str) -> List[Tuple[int, int]]:
+        if _NEEDS_NLTK.search(text):
+            return list(self._engine.span_tokenize(text))
+
+        chunks = [match.span() for match in _NON_SPACE.finditer(text)]
+        if not _PUNCTUATION.search(text):
+            return chunks
+
+        cuts = _find_cuts(text)
+        spans = []
+        for start, end in chunks:
+            i = bisect_right(cuts, start)
+            while i < len(cuts) and cuts[i] < end:
+                spans.append((start, cuts[i]))
+                start = cuts[i]
+                i += 1
+            spans.append((start, end))
+        return spans
+
+    def tokenise(self, text: str) -> List[Token]:
+        with self._lock:
+            offsets = self._cache.get(text)
+            if offsets is not None:
+                self._cache.move_to_end(text)
+
+        if offsets is None:
+            # a flat array is invisible to the garbage collector unlike tuples, which
+            # would slow down every collection as the cache grows
+            offsets = array("l", chain.from_iterable(self.span_tokenise(text)))
+            if self.cache_size > 0:
+                with self._lock:
+                    self._cache[text] = offsets
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        return [
+            Token(text[start:end], start, end)
+            for start, end in zip(offsets[::2], offsets[1::2])
+        ]
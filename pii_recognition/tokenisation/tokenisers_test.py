@@ -1,5 +1,13 @@
+from unittest.mock import patch
+
+import pytest
+
+from pii_recognition.data_readers.conll_reader import ConllReader
+from pii_recognition.data_readers.wnut_reader import WnutReader
+
+from .detokenisers import SpaceJoinDetokeniser, TreebankWordDetokeniser
 from .token_schema import Token
-from .tokenisers import TreebankWordTokeniser
+from .tokenisers import FastTreebankWordTokeniser, TreebankWordTokeniser
 
 
 def test_nltk_word_tokenizer():
@@ -18,3 +26,68 @@ def test_nltk_word_tokenizer():
     text = "I'm here"
     actual = treebank_word_tokeniser.tokenise(text)
     assert actual == [Token("I", 0, 1), Token("'m", 1, 3), Token("here", 4, 8)]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "This is a test.",
+        "I'm here",
+        "Good muffins cost $3.88\nin New (York).  Please (buy) me\ntwo of them.\n"
+        "(Thanks).",
+        "They'll save and invest more.",
+        "hi, my name can't hello,",
+        "1,000 people: a,,b ... c.... d--e---f (g.)' h's i'S j'll K'LL",
+        "Mr. O'Neil's dogs' bones? Don't! We've won't they'd; 'tis...",
+        'I said, "I\'d like to buy some \'\'good muffins" which cost $3.88\n each',
+        "He's gonna wanna do it, cannot he? GIMME",
+    ],
+)
+def test_fast_treebank_word_tokeniser(text):
+    expected = TreebankWordTokeniser().tokenise(text)
+    assert FastTreebankWordTokeniser(cache_size=0).tokenise(text) == expected
+
+
+@pytest.mark.parametrize(
+    "reader,file_path",
+    [
+        (ConllReader, "pii_recognition/datasets/conll2003/eng.testb"),
+        (WnutReader, "pii_recognition/datasets/wnut2017/emerging.test.annotated"),
+    ],
+)
+def test_fast_treebank_word_tokeniser_on_datasets(reader, file_path):
+    tokeniser = TreebankWordTokeniser()
+    fast_tokeniser = FastTreebankWordTokeniser(cache_size=0)
+
+    for detokeniser in [SpaceJoinDetokeniser(), TreebankWordDetokeniser()]:
+        with patch.object(reader, "_validate_entity"):
+            texts = reader(detokeniser).get_test_data(file_path, []).sentences
+        for text in texts:
+            assert fast_tokeniser.tokenise(text) == tokeniser.tokenise(text)
+
+
+def test_fast_treebank_word_tokeniser_cache():
+    tokeniser = FastTreebankWordTokeniser(cache_size=2)
+
+    with patch.object(
+        tokeniser, "span_tokenise", wraps=tokeniser.span_tokenise
+    ) as mock_span_tokenise:
+        for text in ["a b", "c d", "a b", "e f", "c d"]:
+            actual = tokeniser.tokenise(text)
+            assert [token.text for token in actual] == text.split()
+    # "c d" was evicted by "e f" being the least recently used
+    assert [args for args, _ in mock_span_tokenise.call_args_list] == [
+        ("a b",),
+        ("c d",),
+        ("e f",),
+        ("c d",),
+    ]
+
+    # cached tokens are not shared
+    tokeniser.tokenise("c d")[0].text = "x"
+    assert tokeniser.tokenise("c d")[0].text == "c"
+
+    with pytest.raises(ValueError) as err:
+        FastTreebankWordTokeniser(cache_size=-1)
+    assert str(err.value) == "cache_size must not be negative but got -1"
@@ -1,72 +1,63 @@
 # Copyright
 # https://github.com/scrapinghub/python-crfsuite/blob/master/examples/CoNLL%202002.ipynb
-from itertools import chain
+"""Train CRF models on CoNLL 2003 over a grid of hyper-parameters.
+
+Every configuration is trained in its own process, the model and its metadata are
+written to the output directory. Existing models, such as the exported
+conll2003-en.crfsuite, are only overwritten with --force.
+
+Usage, from the project root:
+    poetry run python -m pii_recognition.training.crf_model \
+        --c1 1.0 0.1 --c2 1e-3 --max_iterations 50 --num_workers 2
+"""
+import argparse
+import datetime
+import os
+import resource
+import time
+from dataclasses import asdict, dataclass
+from itertools import chain, product
+from multiprocessing import Pool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pycrfsuite
 from nltk.corpus.reader import ConllCorpusReader
 from sklearn.metrics import classification_report
 from sklearn.preprocessing import LabelBinarizer
 
-train = ConllCorpusReader(
-    "datasets/conll2003", "eng.train", ["words", "pos", "ignore", "chunk"]
-)
-test = ConllCorpusReader(
-    "datasets/conll2003", "eng.testb", ["words", "pos", "ignore", "chunk"]
-)
-
-train_sents = list(train.iob_sents())
-test_sents = list(test.iob_sents())
-
-
-def word2features(sent, i):
-    # remove postag
-    word = sent[i][0]
-    # postag = sent[i][1]
-    features = [
-        "bias",
-        "word.lower=" + word.lower(),
-        "word[-3:]=" + word[-3:],
-        "word[-2:]=" + word[-2:],
-        "word.isupper=%s" % word.isupper(),
-        "word.istitle=%s" % word.istitle(),
-        "word.isdigit=%s" % word.isdigit(),
-        # 'postag=' + postag,
-        # 'postag[:2]=' + postag[:2],
-    ]
-    if i > 0:
-        word1 = sent[i - 1][0]
-        # postag1 = sent[i-1][1]
-        features.extend(
-            [
-                "-1:word.lower=" + word1.lower(),
-                "-1:word.istitle=%s" % word1.istitle(),
-                "-1:word.isupper=%s" % word1.isupper(),
-                # '-1:postag=' + postag1,
-                # '-1:postag[:2]=' + postag1[:2],
-            ]
-        )
-    else:
-        features.append("BOS")
-
-    if i < len(sent) - 1:
-        word1 = sent[i + 1][0]
-        # postag1 = sent[i+1][1]
-        features.extend(
-            [
-                "+1:word.lower=" + word1.lower(),
-                "+1:word.istitle=%s" % word1.istitle(),
-                "+1:word.isupper=%s" % word1.isupper(),
-                # '+1:postag=' + postag1,
-                # '+1:postag[:2]=' + postag1[:2],
-            ]
-        )
-    else:
-        features.append("EOS")
-    return features
+from pii_recognition import __version__
+from pii_recognition.features.word_to_features import SentenceFeatureExtractor
+from pii_recognition.utils import dump_to_json_file
+
+CONLL_COLUMNS = ["words", "pos", "ignore", "chunk"]
+FEATURE_MEMO_SIZE = 100000
+
+
+@dataclass
+class TrainingConfig:
+    """
+    A CRF configuration to train.
+
+    Attributes:
+        c1: coefficient for L1 penalty.
+        c2: coefficient for L2 penalty.
+        max_iterations: maximum number of iterations of the optimiser.
+        model_name: file name of the model without extension.
+    """
+
+    c1: float
+    c2: float
+    max_iterations: int
+    model_name: str
 
 
-def sent2features(sent):
-    return [word2features(sent, i) for i in range(len(sent))]
+def iter_conll_sentences(
+    data_dir: str, file_id: str
+) -> Iterator[Tuple[List[str], List[str]]]:
+    """Lazily yield tokens and IOB labels of every sentence in a CoNLL file."""
+    reader = ConllCorpusReader(data_dir, file_id, CONLL_COLUMNS)
+    for sent in reader.iob_sents():
+        yield sent2tokens(sent), sent2labels(sent)
 
 
 def sent2labels(sent):
@@ -77,36 +68,81 @@ def sent2tokens(sent):
     return [token for token, postag, label in sent]
 
 
-X_train = [sent2features(s) for s in train_sents]
-y_train = [sent2labels(s) for s in train_sents]
+def peak_rss_mib() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
 
-X_test = [sent2features(s) for s in test_sents]
-y_test = [sent2labels(s) for s in test_sents]
+def train(
+    config: TrainingConfig,
+    data_dir: str,
+    train_file: str,
+    output_dir: str,
+    test_file: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Train a model, feature sequences are streamed into the trainer rather than
+    held in memory.
+
+    Returns:
+        Metadata of the model, also written next to the model as JSON.
+    """
+    start = time.perf_counter()
+    extractor = SentenceFeatureExtractor(memo_size=FEATURE_MEMO_SIZE)
+    trainer = pycrfsuite.Trainer(verbose=False)
 
-trainer = pycrfsuite.Trainer(verbose=False)
+    num_sentences = 0
+    for tokens, labels in iter_conll_sentences(data_dir, train_file):
+        trainer.append(pycrfsuite.ItemSequence(extractor(tokens)), labels)
+        num_sentences += 1
 
-for xseq, yseq in zip(X_train, y_train):
-    trainer.append(xseq, yseq)
+    trainer.set_params(
+        {
+            "c1": config.c1,
+            "c2": config.c2,
+            "max_iterations": config.max_iterations,
+            # include transitions that are possible, but not observed
+            "feature.possible_transitions": True,
+        }
+    )
+    model_path = os.path.join(output_dir, config.model_name + ".crfsuite")
+    trainer.train(model_path)
+    seconds = time.perf_counter() - start
 
-trainer.set_params(
-    {
-        "c1": 1.0,  # coefficient for L1 penalty
-        "c2": 1e-3,  # coefficient for L2 penalty
-        "max_iterations": 50,  # stop earlier
-        # include transitions that are possible, but not observed
-        "feature.possible_transitions": True,
+    metadata = {
+        "config": asdict(config),
+        "algorithm": "lbfgs",
+        "features": "features.word_to_features.word2features",
+        "train_data": os.path.join(data_dir, train_file),
+        "num_train_sentences": num_sentences,
+        "package_version": __version__,
+        "created_at": datetime.datetime.now().isoformat(),
+        "train_seconds": seconds,
+        "peak_rss_mib": peak_rss_mib(),
     }
-)
+    if test_file is not None:
+        metadata["test_data"] = os.path.join(data_dir, test_file)
+        metadata["test_report"] = evaluate(model_path, data_dir, test_file, extractor)
+
+    dump_to_json_file(metadata, os.path.join(output_dir, config.model_name + ".json"))
+    return metadata
 
-trainer.train("conll2003-en.crfsuite")
 
-tagger = pycrfsuite.Tagger()
-tagger.open("conll2003-en.crfsuite")
+def evaluate(
+    model_path: str,
+    data_dir: str,
+    test_file: str,
+    extractor: SentenceFeatureExtractor,
+) -> Dict[str, Any]:
+    tagger = pycrfsuite.Tagger()
+    tagger.open(model_path)
 
-example_sent = test_sents[0]
-print(" ".join(sent2tokens(example_sent)), end="\n\n")
-print("Predicted:", " ".join(tagger.tag(sent2features(example_sent))))
-print("Correct:  ", " ".join(sent2labels(example_sent)))
+    y_true = []
+    y_pred = []
+    for tokens, labels in iter_conll_sentences(data_dir, test_file):
+        y_true.append(labels)
+        y_pred.append(tagger.tag(pycrfsuite.ItemSequence(extractor(tokens))))
+    tagger.close()
+    return bio_classification_report(y_true, y_pred)
 
 
 def bio_classification_report(y_true, y_pred):
@@ -130,8 +166,104 @@ def bio_classification_report(y_true, y_pred):
         y_pred_combined,
         labels=[class_indices[cls] for cls in taglist],
         target_names=taglist,
+        output_dict=True,
     )
 
 
-y_pred = [tagger.tag(xseq) for xseq in X_test]
-print(bio_classification_report(y_test, y_pred))
+def build_grid(
+    c1s: List[float], c2s: List[float], max_iterations: List[int], model_name: str
+) -> List[TrainingConfig]:
+    """All combinations of hyper-parameters, model names are suffixed by their
+    hyper-parameters unless there is only one combination."""
+    combinations = list(product(c1s, c2s, max_iterations))
+    if len(combinations) == 1:
+        ((c1, c2, iterations),) = combinations
+        return [TrainingConfig(c1, c2, iterations, model_name)]
+
+    return [
+        TrainingConfig(
+            c1, c2, iterations, f"{model_name}_c1={c1}_c2={c2}_it={iterations}"
+        )
+        for c1, c2, iterations in combinations
+    ]
+
+
+def _train_star(args: Tuple) -> Dict[str, Any]:
+    return train(*args)
+
+
+def train_grid(
+    configs: List[TrainingConfig],
+    data_dir: str,
+    train_file: str,
+    output_dir: str,
+    test_file: Optional[str] = None,
+    num_workers: int = 1,
+    overwrite: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Train configurations in a process pool and yield metadata as models are done.
+
+    A process trains a single configuration so that its peak memory is that of the
+    configuration alone. Existing models are not overwritten unless overwrite is
+    true, e.g. the exported model loaded by CrfRecogniser configs.
+    """
+    model_paths = [
+        os.path.join(output_dir, config.model_name + ".crfsuite") for config in configs
+    ]
+    existing = [path for path in model_paths if os.path.exists(path)]
+    if existing and not overwrite:
+        raise FileExistsError(
+            f"Models {existing} exist, use another model name or output directory, "
+            f"or overwrite them."
+        )
+
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [
+        (config, data_dir, train_file, output_dir, test_file) for config in configs
+    ]
+    with Pool(num_workers, maxtasksperchild=1) as pool:
+        yield from pool.imap_unordered(_train_star, tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="crf_model")
+    parser.add_argument(
+        "--data_dir", type=str, default="pii_recognition/datasets/conll2003"
+    )
+    parser.add_argument("--train_file", type=str, default="eng.train")
+    parser.add_argument("--test_file", type=str, default=None)
+    parser.add_argument(
+        "--output_dir", type=str, default="pii_recognition/exported_models"
+    )
+    parser.add_argument("--model_name", type=str, default="conll2003-en")
+    parser.add_argument("--c1", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--c2", type=float, nargs="+", default=[1e-3])
+    parser.add_argument("--max_iterations", type=int, nargs="+", default=[50])
+    parser.add_argument("--num_workers", type=int, default=1)
+    parser.add_argument(
+        "--force", action="store_true", help="overwrite existing models"
+    )
+    args = parser.parse_args()
+
+    configs = build_grid(args.c1, args.c2, args.max_iterations, args.model_name)
+    for metadata in train_grid(
+        configs,
+        args.data_dir,
+        args.train_file,
+        args.output_dir,
+        args.test_file,
+        args.num_workers,
+        args.force,
+    ):
+        line = (
+            f"{metadata['config']['model_name']}: "
+            f"time={metadata['train_seconds']:.1f}s "
+            f"peak_rss={metadata['peak_rss_mib']:.1f}MiB"
+        )
+        if "test_report" in metadata:
+            line += f" micro_f1={metadata['test_report']['micro avg']['f1-score']:.4f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
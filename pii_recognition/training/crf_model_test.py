@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+from .crf_model import TrainingConfig, build_grid, train, train_grid
+
+CONLL_TEXT = """Bob NNP I-NP I-PER
+lives VBZ I-VP O
+in IN I-PP O
+Melbourne NNP I-NP I-LOC
+. . O O
+
+Alice NNP I-NP I-PER
+works VBZ I-VP O
+at IN I-PP O
+Google NNP I-NP I-ORG
+. . O O
+
+"""
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    (tmp_path / "tiny.train").write_text(CONLL_TEXT)
+    return str(tmp_path)
+
+
+def test_build_grid():
+    assert build_grid([1.0], [1e-3], [50], "conll") == [
+        TrainingConfig(1.0, 1e-3, 50, "conll")
+    ]
+    assert build_grid([1.0, 0.1], [1e-3], [50], "conll") == [
+        TrainingConfig(1.0, 1e-3, 50, "conll_c1=1.0_c2=0.001_it=50"),
+        TrainingConfig(0.1, 1e-3, 50, "conll_c1=0.1_c2=0.001_it=50"),
+    ]
+
+
+def test_train(data_dir, tmp_path):
+    output_dir = str(tmp_path / "models")
+    os.makedirs(output_dir)
+    config = TrainingConfig(0.1, 1e-3, 5, "tiny")
+
+    metadata = train(config, data_dir, "tiny.train", output_dir, "tiny.train")
+
+    assert os.path.exists(os.path.join(output_dir, "tiny.crfsuite"))
+    with open(os.path.join(output_dir, "tiny.json")) as f:
+        assert json.load(f) == metadata
+    assert metadata["config"] == {
+        "c1": 0.1,
+        "c2": 1e-3,
+        "max_iterations": 5,
+        "model_name": "tiny",
+    }
+    assert metadata["train_data"] == os.path.join(data_dir, "tiny.train")
+    assert metadata["num_train_sentences"] == 2
+    assert metadata["train_seconds"] > 0
+    assert set(metadata["test_report"]) >= {"I-PER", "I-LOC", "I-ORG", "micro avg"}
+
+
+def test_train_grid_for_existing_models(data_dir, tmp_path):
+    output_dir = str(tmp_path / "models")
+    configs = [TrainingConfig(0.1, 1e-3, 5, "tiny")]
+    assert len(list(train_grid(configs, data_dir, "tiny.train", output_dir))) == 1
+
+    model_path = os.path.join(output_dir, "tiny.crfsuite")
+    with pytest.raises(FileExistsError) as err:
+        next(train_grid(configs, data_dir, "tiny.train", output_dir))
+    assert str(err.value) == (
+        f"Models ['{model_path}'] exist, use another model name or output "
+        f"directory, or overwrite them."
+    )
+
+    metadata = list(
+        train_grid(configs, data_dir, "tiny.train", output_dir, overwrite=True)
+    )
+    assert [item["config"]["model_name"] for item in metadata] == ["tiny"]
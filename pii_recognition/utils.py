@@ -1,5 +1,20 @@
+import hashlib
 import json
-from typing import Any, Dict, Iterable, Optional, Sequence, Type
+import re
+from bisect import bisect_right
+from itertools import accumulate, islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 import yaml
 
@@ -31,6 +46,55 @@ def is_ascending(sequence: Sequence) -> bool:
     return all(sequence[i] < sequence[i + 1] for i in range(len(sequence) - 1))
 
 
+T = TypeVar("T")
+
+
+def batched(iterable: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """Split an iterable into lists of batch_size elements, the last one may be
+    shorter. Elements are consumed lazily so iterators are not materialised."""
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be a positive integer but got {batch_size}")
+
+    iterator = iter(iterable)
+    batch = list(islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
+def batch_indices_by_length(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """Batch indices of items sorted by their lengths, so that items of similar
+    lengths are batched together and models padding a batch to its longest item
+    waste less compute. Items of equal lengths keep their order.
+
+    Args:
+        lengths: length of every item.
+        batch_size: maximum number of indices in a batch.
+
+    Returns:
+        Batches of indices into lengths, from the shortest items to the longest.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    return list(batched(order, batch_size))
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """The nearest-rank q-th percentile of values, 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of the content of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def load_yaml_file(path: str) -> Optional[Dict]:
     with open(path, "r") as stream:
         data = yaml.safe_load(stream)
@@ -49,6 +113,55 @@ def load_json_file(path: str):
         return json.load(f)
 
 
+def iter_json_records(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Lazily yield records of a JSON file which is either an array of records or
+    JSON Lines, i.e., one record per line.
+
+    The file is read in chunks of chunk_size characters and records are decoded as
+    soon as they are complete, so memory is bounded by the largest record rather than
+    the file size.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        in_array: Optional[bool] = None
+
+        while True:
+            # skip whitespaces and separators between records
+            while pos < len(buffer) and (
+                buffer[pos].isspace() or (in_array and buffer[pos] == ",")
+            ):
+                pos += 1
+
+            if pos == len(buffer) and eof:
+                return
+            if in_array is not None and pos < len(buffer):
+                if in_array and buffer[pos] == "]":
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    # a record ending the buffer, e.g. a number, may not be complete
+                    if end < len(buffer) or eof:
+                        yield record
+                        pos = end
+                        continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            elif pos < len(buffer):
+                in_array = buffer[pos] == "["
+                pos += in_array
+                continue
+
+            # read more, dropping what has been consumed
+            chunk = f.read(chunk_size)
+            eof = chunk == ""
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
 # Any is not a precise signature but it's ergonomic in practice
 def dump_to_json_file(obj: Any, path: str):
     # TODO: enable write to directories that do not exist
@@ -103,3 +216,116 @@ class TextIndexer:
             raise Exception(
                 f"Index {byte_index} is an invalid boundary converting to UTF8."
             )
+
+
+def split_text_by_bytes(text: str, max_bytes: int) -> List[Tuple[int, str]]:
+    """Split a text into pieces no longer than max_bytes when encoded in UTF8.
+
+    Pieces are cut after the last whitespace that fits, a word longer than max_bytes
+    is cut wherever the limit falls. Joining all pieces gives the text back.
+
+    Args:
+        text: a text to be split.
+        max_bytes: maximum number of UTF8 bytes of a piece.
+
+    Returns:
+        A list of pieces paired with their character offsets in the text.
+    """
+    # byte_ends[i] is the number of bytes encoding text[:i + 1]
+    byte_ends = list(accumulate(len(char.encode()) for char in text))
+    if not byte_ends or byte_ends[-1] <= max_bytes:
+        return [(0, text)]
+
+    pieces = []
+    start = 0
+    while start < len(text):
+        consumed = byte_ends[start - 1] if start > 0 else 0
+        end = bisect_right(byte_ends, consumed + max_bytes, lo=start)
+        if end == start:
+            raise ValueError(
+                f"Cannot split text by {max_bytes} bytes, character at {start} "
+                f"takes more than that."
+            )
+
+        if end < len(text):
+            last_space = max(text.rfind(space, start, end) for space in " \t\n\r")
+            if last_space >= start:
+                end = last_space + 1
+
+        pieces.append((start, text[start:end]))
+        start = end
+    return pieces
+
+
+def _validate_chunk_args(max_chunk_chars: int, overlap_chars: int):
+    """Check the chunk size and overlap of split_text_with_overlap."""
+    if max_chunk_chars < 1:
+        raise ValueError(
+            f"max_chars must be a positive integer but got {max_chunk_chars}"
+        )
+    if not 0 <= overlap_chars < max_chunk_chars:
+        raise ValueError(
+            f"overlap_chars must be between 0 and max_chars {max_chunk_chars} but "
+            f"got {overlap_chars}"
+        )
+
+
+# a sentence end followed by a whitespace, or a line break
+_SENTENCE_BOUNDARY = re.compile(r"[.!?]\s|\n")
+
+
+def _last_boundary(text: str, start: int, end: int) -> int:
+    """Index after the last sentence boundary in the second half of text[start:end],
+    otherwise after the last whitespace in it, otherwise end."""
+    last_sentence = None
+    for last_sentence in _SENTENCE_BOUNDARY.finditer(
+        text, start + (end - start) // 2, end
+    ):
+        pass
+    if last_sentence is not None:
+        return last_sentence.end()
+
+    last_space = max(text.rfind(space, start, end) for space in " \t\n\r")
+    return last_space + 1 if last_space >= start else end
+
+
+def split_text_with_overlap(
+    text: str, max_chars: int, overlap_chars: int
+) -> List[Tuple[int, str]]:
+    """Split a text into chunks of at most max_chars characters, adjacent chunks
+    sharing about overlap_chars characters.
+
+    A chunk ends at a sentence boundary, or at a whitespace when there is no
+    sentence boundary in the second half of the chunk, a word longer than the chunk
+    is cut wherever the limit falls. The next chunk starts overlap_chars before the
+    end of the previous one, moved back to the start of a word.
+
+    Args:
+        text: a text to be split.
+        max_chars: maximum number of characters of a chunk.
+        overlap_chars: number of characters adjacent chunks should share.
+
+    Returns:
+        A list of chunks paired with their character offsets in the text.
+    """
+    _validate_chunk_args(max_chars, overlap_chars)
+
+    chunks = []
+    start = end = 0
+    while start + max_chars < len(text):
+        previous_end = end
+        end = _last_boundary(text, start, start + max_chars)
+        if end <= previous_end:
+            # a word longer than the overlap, cut it rather than repeat the chunk
+            end = start + max_chars
+        chunks.append((start, text[start:end]))
+
+        next_start = max(end - overlap_chars, start + 1)
+        word_start = next_start
+        while word_start > start + 1 and not text[word_start - 1].isspace():
+            word_start -= 1
+        # a word started within the previous chunk is kept whole
+        start = word_start if text[word_start - 1].isspace() else next_start
+
+    chunks.append((start, text[start:]))
+    return chunks
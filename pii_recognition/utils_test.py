@@ -5,12 +5,18 @@ from unittest.mock import Mock, call, mock_open, patch
 
 from pii_recognition.utils import (
     TextIndexer,
+    batch_indices_by_length,
+    batched,
     cached_property,
     dump_to_json_file,
     dump_yaml_file,
     is_ascending,
+    iter_json_records,
     load_json_file,
     load_yaml_file,
+    percentile,
+    split_text_by_bytes,
+    split_text_with_overlap,
     stringify_keys,
     write_iterable_to_file,
 )
@@ -67,6 +73,38 @@ def test_is_ascending():
     assert actual is True
 
 
+def test_batched():
+    actual = list(batched([1, 2, 3, 4, 5], 2))
+    assert actual == [[1, 2], [3, 4], [5]]
+
+    actual = list(batched(iter(range(4)), 2))
+    assert actual == [[0, 1], [2, 3]]
+
+    actual = list(batched([], 3))
+    assert actual == []
+
+    with raises(ValueError) as err:
+        list(batched([1], 0))
+    assert str(err.value) == "batch_size must be a positive integer but got 0"
+
+
+def test_batch_indices_by_length():
+    actual = batch_indices_by_length([5, 1, 3, 1, 9], 2)
+    assert actual == [[1, 3], [2, 0], [4]]
+
+    assert batch_indices_by_length([], 2) == []
+
+    with raises(ValueError) as err:
+        batch_indices_by_length([1], 0)
+    assert str(err.value) == "batch_size must be a positive integer but got 0"
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile(list(range(100)), 99) == 99
+
+
 def test_load_yaml_file():
     with patch("builtins.open", mock_open(read_data="TEST-KEY: TEST-VALUE\n")):
         data = load_yaml_file("fake_path")
@@ -182,3 +220,100 @@ def test_text_indexer_byte_index_to_utf8_index_failed():
     with raises(Exception) as err:
         indexer.byte_index_to_utf8_index(48)
     assert str(err.value) == "Index 48 is an invalid boundary converting to UTF8."
+
+
+def test_split_text_by_bytes():
+    # fits in one piece
+    assert split_text_by_bytes("I love Melbourne", 16) == [(0, "I love Melbourne")]
+    assert split_text_by_bytes("", 5) == [(0, "")]
+
+    # cut after whitespaces
+    actual = split_text_by_bytes("I love Melbourne", 8)
+    assert actual == [(0, "I love "), (7, "Melbourn"), (15, "e")]
+
+    # multi-byte characters count by bytes
+    text = "Straße Müller"
+    actual = split_text_by_bytes(text, 8)
+    assert actual == [(0, "Straße "), (7, "Müller")]
+    assert "".join(piece for _, piece in actual) == text
+    assert all(len(piece.encode()) <= 8 for _, piece in actual)
+
+    with raises(ValueError) as err:
+        split_text_by_bytes("ßß", 1)
+    assert str(err.value) == (
+        "Cannot split text by 1 bytes, character at 0 takes more than that."
+    )
+
+
+def test_split_text_with_overlap():
+    # fits in one chunk
+    assert split_text_with_overlap("I love Melbourne.", 17, 5) == [
+        (0, "I love Melbourne.")
+    ]
+    assert split_text_with_overlap("", 5, 0) == [(0, "")]
+
+    # cut after sentences or whitespaces, the next chunk starts at the word where
+    # the overlap starts
+    text = "I love Melbourne. Bob lives in Sydney. Ann works at Google."
+    actual = split_text_with_overlap(text, 24, 8)
+    assert actual == [
+        (0, "I love Melbourne. "),
+        (7, "Melbourne. Bob lives in "),
+        (22, "lives in Sydney. "),
+        (31, "Sydney. Ann works at "),
+        (43, "works at Google."),
+    ]
+
+    # words too long are cut
+    actual = split_text_with_overlap("Melbourne Sydney", 8, 0)
+    assert actual == [(0, "Melbourn"), (8, "e Sydney")]
+
+    for max_chars, overlap_chars in [(10, 0), (24, 8), (50, 30), (7, 6)]:
+        chunks = split_text_with_overlap(text, max_chars, overlap_chars)
+        assert all(text[start:].startswith(chunk) for start, chunk in chunks)
+        assert all(len(chunk) <= max_chars for _, chunk in chunks)
+        # chunks cover the text
+        assert chunks[0][0] == 0
+        assert chunks[-1][0] + len(chunks[-1][1]) == len(text)
+        assert all(
+            next_start <= start + len(chunk)
+            for (start, chunk), (next_start, _) in zip(chunks, chunks[1:])
+        )
+
+    with raises(ValueError) as err:
+        split_text_with_overlap(text, 0, 0)
+    assert str(err.value) == "max_chars must be a positive integer but got 0"
+
+    with raises(ValueError) as err:
+        split_text_with_overlap(text, 8, 8)
+    assert str(err.value) == "overlap_chars must be between 0 and max_chars 8 but got 8"
+
+
+def test_iter_json_records():
+    records = [{"name": "John", "tags": ["a", "b"]}, 12345, "Mia", None]
+
+    with TemporaryDirectory() as tmpdirname:
+        array_path = os.path.join(tmpdirname, "records.json")
+        with open(array_path, "w") as f:
+            json.dump(records, f, indent=2)
+        lines_path = os.path.join(tmpdirname, "records.jsonl")
+        with open(lines_path, "w") as f:
+            f.write("\n".join(json.dumps(record) for record in records))
+
+        # small chunks cut records in the middle
+        for chunk_size in [1, 3, 1024]:
+            assert list(iter_json_records(array_path, chunk_size)) == records
+            assert list(iter_json_records(lines_path, chunk_size)) == records
+
+        empty_path = os.path.join(tmpdirname, "empty.json")
+        with open(empty_path, "w") as f:
+            f.write("[ ]")
+        assert list(iter_json_records(empty_path)) == []
+
+        broken_path = os.path.join(tmpdirname, "broken.json")
+        with open(broken_path, "w") as f:
+            f.write('[{"name": "John"}, {"name": ')
+        records_iter = iter_json_records(broken_path, 4)
+        assert next(records_iter) == {"name": "John"}
+        with raises(json.JSONDecodeError):
+            next(records_iter)
@@ -0,0 +1,2 @@
+# fixtures shared with unit tests
+from pii_recognition.conftest import mock_analyse_batch  # noqa: F401
@@ -1,3 +1,4 @@
+import json
 import os
 from tempfile import TemporaryDirectory
 
@@ -45,8 +46,10 @@ def predictions():
 
 
 @patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
-def test_execute_pii_validation_pipeline(mock_registry):
-    mock_registry.create_instance.return_value.analyse.side_effect = predictions()
+def test_execute_pii_validation_pipeline(mock_registry, mock_analyse_batch):
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_recogniser.analyse.side_effect = predictions()
+    mock_analyse_batch(mock_recogniser)
     config_yaml = "tests/assets/config/pii_validation.yaml"
 
     with TemporaryDirectory() as tempdir:
@@ -141,3 +144,40 @@ def test_execute_pii_validation_pipeline(mock_registry):
 
         assert item_five["predicted"] == {}
         assert item_five["ground_truth"] == {}
+
+
+@patch("pii_recognition.pipelines.pii_validation_pipeline.recogniser_registry")
+def test_execute_pii_validation_pipeline_in_streaming_mode(
+    mock_registry, mock_analyse_batch
+):
+    mock_recogniser = mock_registry.create_instance.return_value
+    mock_analyse_batch(mock_recogniser)
+    config_yaml = "tests/assets/config/pii_validation.yaml"
+
+    with TemporaryDirectory() as tempdir:
+        scores = []
+        for streaming in [False, True]:
+            mock_recogniser.analyse.side_effect = predictions()
+            temp_config_yaml = os.path.join(tempdir, "config.yaml")
+            config = load_yaml_file(config_yaml)
+            config["predictions_dump_path"] = preds_dump_path = os.path.join(
+                tempdir, f"test_predictions_{streaming}.json"
+            )
+            config["scores_dump_path"] = scores_dump_path = os.path.join(
+                tempdir, f"test_scores_{streaming}.json"
+            )
+            dump_yaml_file(temp_config_yaml, config)
+
+            exec_pipeline(temp_config_yaml, streaming=streaming)
+            scores.append(load_json_file(scores_dump_path))
+
+        batch_preds = load_json_file(
+            os.path.join(tempdir, "test_predictions_False.json")
+        )
+        with open(preds_dump_path) as f:
+            streamed_preds = [json.loads(line) for line in f]
+
+    assert scores[0] == scores[1]
+    assert len(streamed_preds) == 5
+    for item in streamed_preds:
+        assert batch_preds[item.pop("text")] == item